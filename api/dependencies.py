@@ -2,8 +2,10 @@
 FastAPI Dependencies
 """
 
+import asyncio
 from fastapi import HTTPException
 from .services.trading_service import TradingService
+from shared.instrument_master import InstrumentMaster, get_instrument_master
 
 # Global app state - will be set by main.py
 _app_state = None
@@ -20,4 +22,16 @@ async def get_trading_service() -> TradingService:
             status_code=503, 
             detail="Trading service not initialized. Please wait for service startup."
         )
-    return _app_state.trading_service 
\ No newline at end of file
+    return _app_state.trading_service 
+
+async def get_instruments() -> InstrumentMaster:
+    """Dependency function to get the shared instrument master"""
+    instruments = get_instrument_master()
+    if not instruments.loaded:
+        await asyncio.to_thread(instruments.load)
+    if not instruments.loaded:
+        raise HTTPException(
+            status_code=503,
+            detail="Instrument master not available."
+        )
+    return instruments
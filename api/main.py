@@ -11,7 +11,7 @@ from typing import Dict, Any
 
 from .models import HealthResponse
 from .services.trading_service import TradingService
-from .routes import strategies, user_configs, orders, positions, trades, marketplace, user
+from .routes import strategies, user_configs, orders, positions, trades, marketplace, user, instruments
 from . import dependencies
 
 # Configure logging
@@ -91,6 +91,7 @@ app.include_router(positions.router)
 app.include_router(trades.router)
 app.include_router(marketplace.router)
 app.include_router(user.router)
+app.include_router(instruments.router)
 
 @app.get("/", tags=["root"])
 async def root():
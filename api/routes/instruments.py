@@ -0,0 +1,47 @@
+"""
+Instruments API Routes
+"""
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import List, Dict, Optional
+from ..dependencies import get_instruments
+from shared.instrument_master import InstrumentMaster, Instrument
+
+router = APIRouter(prefix="/api/instruments", tags=["instruments"])
+
+def _to_dict(instrument: Instrument) -> Dict:
+    return {**instrument._asdict(), "exchange_type": instrument.exchange_type}
+
+@router.get("", response_model=List[Dict])
+async def search_instruments(
+    q: str = Query(..., min_length=1, description="Symbol or name prefix"),
+    exchange: Optional[str] = Query(None, description="Exchange segment, e.g. NSE"),
+    limit: int = Query(20, ge=1, le=200),
+    instruments: InstrumentMaster = Depends(get_instruments)
+):
+    """Search instruments by symbol or name prefix"""
+    try:
+        return [_to_dict(instrument) for instrument in instruments.search(q, exchange, limit)]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to search instruments: {str(e)}")
+
+@router.get("/stats", response_model=Dict)
+async def get_instrument_stats(instruments: InstrumentMaster = Depends(get_instruments)):
+    """Get instrument master statistics"""
+    return instruments.get_stats()
+
+@router.get("/token/{token}", response_model=Dict)
+async def get_instrument_by_token(token: str, exchange: str = "NSE", instruments: InstrumentMaster = Depends(get_instruments)):
+    """Get instrument for a token"""
+    instrument = instruments.get_by_token(token, exchange)
+    if not instrument:
+        raise HTTPException(status_code=404, detail="Instrument not found")
+    return _to_dict(instrument)
+
+@router.get("/{symbol}", response_model=Dict)
+async def get_instrument(symbol: str, exchange: str = "NSE", instruments: InstrumentMaster = Depends(get_instruments)):
+    """Get instrument for a symbol ("RELIANCE" or "RELIANCE-EQ")"""
+    instrument = instruments.get(symbol, exchange)
+    if not instrument:
+        raise HTTPException(status_code=404, detail="Instrument not found")
+    return _to_dict(instrument)
@@ -29,7 +29,7 @@ logger.addHandler(stdout_handler)
 class AngelOneWebSocketClient:
     """Angel One WebSocket client for real-time market data"""
     
-    def __init__(self, api_key=None, username=None, pin=None, token=None):
+    def __init__(self, api_key=None, username=None, pin=None, token=None, name="ws"):
         """
         Initialize the Angel One WebSocket client
         
@@ -38,6 +38,7 @@ class AngelOneWebSocketClient:
             username: Angel One username (uses config.USERNAME if None)
             pin: Angel One PIN (uses config.PIN if None)
             token: Angel One TOTP secret (uses config.TOKEN if None)
+            name: Connection name used for the WebSocket thread
         """
         # Use provided credentials or fall back to config
         self.api_key = api_key or config.API_KEY
@@ -45,10 +46,16 @@ class AngelOneWebSocketClient:
         self.pin = pin or config.PIN
         self.token = token or config.TOKEN
         
+        self.name = name
+        
         # WebSocket objects
         self.smart_api_obj = None
         self.smart_web = None
         
+        # Session tokens (shared when several connections use one login)
+        self.auth_token = None
+        self.feed_token = None
+        
         # Connection state
         self.connected = False
         self.subscribed_tokens = []
@@ -94,6 +101,23 @@ class AngelOneWebSocketClient:
         Returns:
             tuple: (smart_api_obj, smart_web) or (None, None) if failed
         """
+        obj = self.authenticate()
+        if not obj:
+            return None, None
+        
+        sws = self.create_websocket()
+        if not sws:
+            return None, None
+        
+        return obj, sws
+    
+    def authenticate(self):
+        """
+        Generate an Angel One session and feed token
+        
+        Returns:
+            SmartConnect object or None if failed
+        """
         try:
             logger.info("🔐 Authenticating with Angel One...")
 
@@ -115,7 +139,7 @@ class AngelOneWebSocketClient:
             
             if not data or not data.get('data'):
                 logger.error("❌ Failed to generate session")
-                return None, None
+                return None
             
             # Extract tokens
             AUTH_TOKEN = data['data']['jwtToken']
@@ -128,31 +152,79 @@ class AngelOneWebSocketClient:
             res = obj.getProfile(refreshToken)
             logger.info(f'Profile products: {res["data"]["products"]}')
             
-            # Create WebSocket instance
+            self.smart_api_obj = obj
+            self.auth_token = AUTH_TOKEN
+            self.feed_token = FEED_TOKEN
+            
+            logger.info("✅ Authentication successful")
+            return obj
+            
+        except Exception as e:
+            logger.error(f"❌ Authentication failed: {e}")
+            return None
+    
+    def use_session(self, other):
+        """
+        Reuse another client's session instead of logging in again
+        
+        Args:
+            other: Authenticated AngelOneWebSocketClient
+        """
+        self.smart_api_obj = other.smart_api_obj
+        self.auth_token = other.auth_token
+        self.feed_token = other.feed_token
+    
+    @staticmethod
+    def _copy_groups(tokens):
+        """Copy token groups; the SDK extends the lists it is given in place"""
+        return [{"exchangeType": group["exchangeType"], "tokens": list(group["tokens"])}
+                for group in tokens]
+    
+    def create_websocket(self):
+        """
+        Create a WebSocket instance from the current session
+        
+        Returns:
+            SmartWebSocketV2 object or None if not authenticated
+        """
+        if not self.auth_token or not self.feed_token:
+            logger.error("❌ Cannot create WebSocket - not authenticated")
+            return None
+        
+        try:
             sws = SmartWebSocketV2(
-                AUTH_TOKEN, 
+                self.auth_token, 
                 self.api_key, 
                 self.username, 
-                FEED_TOKEN, 
+                self.feed_token, 
                 max_retry_attempt=self.max_retry_attempts
             )
+            # The SDK keeps its resubscribe list on the class, so a reconnecting
+            # connection would subscribe every other connection's tokens too;
+            # route every open through _on_open, which subscribes this client's tokens
+            sws.input_request_dict = {}
+            sws._on_open = self._on_open
+            # SmartWebSocketV2._on_close only takes wsapp, so closes were never reported
+            sws._on_close = self._on_close
+            sdk_on_error = sws._on_error
             
-            self.smart_api_obj = obj
-            self.smart_web = sws
-            
-            logger.info("✅ Authentication successful")
-            return obj, sws
+            def on_socket_error(wsapp, error):
+                # Report the drop before the SDK sleeps and reconnects on this thread
+                self.connected = False
+                self._on_error(wsapp, error)
+                sdk_on_error(wsapp, error)
             
+            sws._on_error = on_socket_error
+            self.smart_web = sws
+            return sws
         except Exception as e:
-            logger.error(f"❌ Authentication failed: {e}")
-            return None, None
+            logger.error(f"❌ Failed to create WebSocket: {e}")
+            return None
     
     def _on_data(self, wsapp, msg):
         """Internal data handler"""
         try:
-            logger.info(f"Received tick: {msg}")
-            
-            # Call user-defined callback if set
+            # Call user-defined callback if set (tick logging is the callback's job)
             if self.on_data_callback:
                 self.on_data_callback(wsapp, msg)
                 
@@ -177,9 +249,10 @@ class AngelOneWebSocketClient:
             self.on_close_callback(wsapp, *args)
     
     def _on_open(self, wsapp):
-        """Internal open handler"""
+        """Internal open handler (first connect and every reconnect)"""
         logger.info("✅ WebSocket connection opened")
         self.connected = True
+        self.smart_web.current_retry_attempt = 0
         
         # Subscribe to tokens if any are set
         if self.subscribed_tokens:
@@ -187,7 +260,7 @@ class AngelOneWebSocketClient:
                 self.smart_web.subscribe(
                     self.correlation_id, 
                     self.feed_mode, 
-                    self.subscribed_tokens
+                    self._copy_groups(self.subscribed_tokens)
                 )
                 logger.info(f"✅ Subscribed to {len(self.subscribed_tokens)} token groups")
             except Exception as e:
@@ -197,17 +270,22 @@ class AngelOneWebSocketClient:
         if self.on_open_callback:
             self.on_open_callback(wsapp)
     
-    def connect(self, tokens=None):
+    def connect(self, tokens=None, authenticate=True, wait=3):
         """
         Connect to Angel One WebSocket
         
         Args:
             tokens: List of token groups to subscribe to
                    Format: [{"exchangeType": 1, "tokens": ["2881", "11536"]}]
+            authenticate: Log in first; False reuses the current session (see use_session)
+            wait: Seconds to wait for the connection to open
         """
         try:
             # Authenticate first
-            api_obj, web_obj = self.login()
+            if authenticate:
+                api_obj, web_obj = self.login()
+            else:
+                api_obj, web_obj = self.smart_api_obj, self.create_websocket()
             if not api_obj or not web_obj:
                 logger.error("❌ Cannot connect - authentication failed")
                 return False
@@ -239,11 +317,12 @@ class AngelOneWebSocketClient:
                 except Exception as e:
                     logger.error(f"WebSocket connection error: {e}")
             
-            ws_thread = threading.Thread(target=run_websocket, daemon=True)
+            ws_thread = threading.Thread(target=run_websocket, daemon=True, name=self.name)
             ws_thread.start()
             
             # Give it time to connect
-            time.sleep(3)
+            if wait:
+                time.sleep(wait)
             
             logger.info("✅ WebSocket connection initiated")
             return True
@@ -264,8 +343,8 @@ class AngelOneWebSocketClient:
             return False
         
         try:
-            self.smart_web.subscribe(self.correlation_id, self.feed_mode, tokens)
-            self.subscribed_tokens.extend(tokens)
+            self.smart_web.subscribe(self.correlation_id, self.feed_mode, self._copy_groups(tokens))
+            self.subscribed_tokens.extend(self._copy_groups(tokens))
             logger.info(f"✅ Subscribed to additional tokens: {tokens}")
             return True
         except Exception as e:
@@ -285,10 +364,16 @@ class AngelOneWebSocketClient:
         
         try:
             self.smart_web.unsubscribe(self.correlation_id, self.feed_mode, tokens)
-            # Remove from subscribed list
-            for token_group in tokens:
-                if token_group in self.subscribed_tokens:
-                    self.subscribed_tokens.remove(token_group)
+            # Remove from subscribed list token by token (groups need not match)
+            removed = {(int(group["exchangeType"]), str(token))
+                       for group in tokens for token in group["tokens"]}
+            remaining = []
+            for group in self.subscribed_tokens:
+                kept = [token for token in group["tokens"]
+                        if (int(group["exchangeType"]), str(token)) not in removed]
+                if kept:
+                    remaining.append({"exchangeType": group["exchangeType"], "tokens": kept})
+            self.subscribed_tokens = remaining
             logger.info(f"✅ Unsubscribed from tokens: {tokens}")
             return True
         except Exception as e:
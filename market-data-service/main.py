@@ -9,24 +9,29 @@ import os
 import sys
 import csv
 import threading
+import time
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple, Any
 from datetime import datetime
 from dotenv import load_dotenv
 import redis.asyncio as redis
 import sys
 import os
 sys.path.insert(0, '/app')
-from shared.timezone import get_ist_now, get_ist_timestamp
+from shared.timezone import IST, get_ist_timestamp
+from shared.tick_codec import ENCODING_BINARY, ENCODING_LEGACY, encode_fields
+from shared.instrument_master import EXCHANGE_TYPES, get_instrument_master
 
 # Add parent directory to path
 sys.path.insert(0, '/app')
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import our Angel One client
-from angel_one_client import AngelOneWebSocketClient
+from sharded_client import ShardedWebSocketClient
+from tick_publisher import BatchingTickPublisher
+from tick_logging import TickLogger, setup_queue_logging
 
 load_dotenv()
 
@@ -37,10 +42,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# File/stdout handlers run on a listener thread so websocket threads never block on log I/O
+setup_queue_logging()
+
 # Redis configuration
 REDIS_URL = os.getenv("REDIS_URL", "redis://trading-redis:6379")
 MARKET_DATA_STREAM = "market_data_stream"
 
+# Stream message format: "fields" (one string field per attribute) or "binary" (packed)
+MARKET_DATA_ENCODING = os.getenv("MARKET_DATA_ENCODING", ENCODING_LEGACY).lower()
+
+# Observed ticks/sec per "exchangeType:token", used to balance websocket shards on the next start
+TICK_RATES_KEY = "market_data:tick_rates"
+
 # Global instances
 market_data_streamer = None
 
@@ -70,8 +84,6 @@ class MarketDataRedisStreamer:
         self.symbols = []
         self.running = False
         self.ws_connected = False
-        self.tick_count = 0
-        self.last_tick_time = None
         
         # Angel One WebSocket client
         self.angel_client = None
@@ -79,7 +91,19 @@ class MarketDataRedisStreamer:
         # Event loop reference for scheduling async tasks from sync context
         self.event_loop = None
         
-        # Symbol-token mapping
+        # Batches ticks from the websocket thread into pipelined XADDs
+        self.publisher: Optional[BatchingTickPublisher] = None
+        
+        # Sampled/counter tick logging (TICK_LOG_MODE) instead of a log line per tick
+        self.tick_log = TickLogger()
+        
+        # Instrument master (shared token/symbol indexes for all exchanges)
+        self.instruments = get_instrument_master()
+        
+        # Reverse index of subscribed instruments: (exchangeType, token) -> published symbol
+        self.token_symbols: Dict[Tuple[int, str], str] = {}
+        
+        # Fallback symbol-token mapping (NSE) used when the instrument master is unavailable
         self.symbol_tokens = {
             "RELIANCE": "2881",
             "TCS": "11536", 
@@ -103,8 +127,8 @@ class MarketDataRedisStreamer:
         try:
             logger.info("🔐 Initializing Angel One WebSocket client...")
             
-            # Create Angel One client instance
-            self.angel_client = AngelOneWebSocketClient()
+            # Create Angel One client (tokens are sharded across WS_SHARDS connections)
+            self.angel_client = ShardedWebSocketClient()
             
             # Set up callbacks
             self.angel_client.set_callbacks(
@@ -142,11 +166,19 @@ class MarketDataRedisStreamer:
             await self.redis_client.ping()
             logger.info("✅ Redis connected")
             
+            # Start the batching publisher before ticks can arrive
+            self.publisher = BatchingTickPublisher(self.redis_client, self.event_loop)
+            self.publisher.start()
+            
+            # Load the instrument master off the event loop (cached after first run)
+            await asyncio.to_thread(self.instruments.load)
+            
             # Initialize Angel One client
             await self._initialize_angel_one()
             
-            # Start WebSocket stream
-            self.start_websocket_stream()
+            # Start WebSocket stream, balancing shards by last session's tick rates
+            weights = await self._load_tick_rates()
+            self.start_websocket_stream(weights)
             
             # Set running flag
             self.running = True
@@ -158,24 +190,35 @@ class MarketDataRedisStreamer:
             self.running = False
             raise
     
-    def start_websocket_stream(self):
-        """Start Angel One WebSocket stream"""
+    async def _load_tick_rates(self) -> Dict[Tuple[int, str], float]:
+        """Load expected ticks/sec per (exchangeType, token) saved by the previous session"""
         try:
-            # Get tokens for symbols
-            tokens = []
-            nse_tokens = []
-            
-            for symbol in self.symbols:
-                token = self.symbol_tokens.get(symbol)
-                if token:
-                    nse_tokens.append(token)
-            
-            # Create token list in the format expected by Angel One
-            if nse_tokens:
-                tokens.append({
-                    "exchangeType": 1,  # NSE CM (Cash Market)
-                    "tokens": nse_tokens
+            saved = await self.redis_client.hgetall(TICK_RATES_KEY)
+            weights = {}
+            for key, rate in saved.items():
+                exchange_type, token = key.decode().split(":", 1)
+                weights[(int(exchange_type), token)] = float(rate)
+            return weights
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load tick rates: {e}")
+            return {}
+    
+    async def _save_tick_rates(self):
+        """Save observed ticks/sec per token for balancing the next session"""
+        try:
+            rates = self.angel_client.get_tick_rates()
+            if rates:
+                await self.redis_client.hset(TICK_RATES_KEY, mapping={
+                    f"{exchange_type}:{token}": rate for (exchange_type, token), rate in rates.items()
                 })
+        except Exception as e:
+            logger.warning(f"⚠️ Could not save tick rates: {e}")
+    
+    def start_websocket_stream(self, weights: Optional[Dict[Tuple[int, str], float]] = None):
+        """Start Angel One WebSocket stream"""
+        try:
+            # Get token groups for symbols
+            tokens = self._build_token_groups(self.symbols)
             
             if not tokens:
                 logger.warning("No valid tokens found for symbols")
@@ -184,7 +227,7 @@ class MarketDataRedisStreamer:
             logger.info(f"Starting WebSocket stream for {len(tokens)} token groups...")
             
             # Connect using the Angel One client
-            success = self.angel_client.connect(tokens)
+            success = self.angel_client.connect(tokens, weights=weights)
             
             if success:
                 self.ws_connected = True
@@ -200,18 +243,15 @@ class MarketDataRedisStreamer:
     def _handle_tick_data(self, wsapp, msg):
         """Handle incoming tick data from Angel One WebSocket"""
         try:
-            logger.info(f"Received tick: {msg}")
-            
-            # Process tick data and publish to Redis
-            if self.event_loop and not self.event_loop.is_closed():
-                # Schedule the coroutine to run in the stored event loop
-                future = asyncio.run_coroutine_threadsafe(
-                    self.process_and_publish_tick(msg), 
-                    self.event_loop
-                )
-                logger.debug(f"Scheduled tick processing task: {future}")
+            self.tick_log.record(msg)
+            
+            # Parse on the websocket thread and queue for the batching publisher
+            if self.publisher:
+                message = self.build_tick_message(msg)
+                if message:
+                    self.publisher.submit(*message)
             else:
-                logger.error("No valid event loop available for scheduling tick processing")
+                logger.error("No publisher available for tick processing")
             
         except Exception as e:
             logger.error(f"Error in tick handler: {e}")
@@ -225,19 +265,16 @@ class MarketDataRedisStreamer:
     def _handle_websocket_close(self, wsapp, *args):
         """Handle WebSocket connection close"""
         logger.warning("WebSocket connection closed")
-        self.ws_connected = False
+        self.ws_connected = self.angel_client.is_connected() if self.angel_client else False
     
     def _handle_websocket_open(self, wsapp):
         """Handle WebSocket connection open"""
         logger.info("✅ WebSocket connection opened")
         self.ws_connected = True
     
-    async def process_and_publish_tick(self, tick_data: Dict):
-        """Process tick data and publish to Redis Stream"""
+    def build_tick_message(self, tick_data: Dict) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Convert an Angel One tick into a (stream key, fields) pair for XADD"""
         try:
-            if not self.redis_client:
-                return
-            
             # Extract data from Angel One tick format
             token = tick_data.get('token', '')
             ltp = tick_data.get('last_traded_price', 0) / 100  # Angel One sends price * 100
@@ -259,49 +296,71 @@ class MarketDataRedisStreamer:
             ask = best_sell_data[0]['price'] / 100 if best_sell_data else ltp
             
             # Find symbol from token
-            symbol = self._get_symbol_from_token(token)
+            symbol = self._get_symbol_from_token(token, tick_data.get('exchange_type', 1))
             
             # Create tick message
-            tick_message = {
-                "symbol": symbol,
-                "token": token,
-                "ltp": ltp,
-                "change": change,
-                "change_percent": change_percent,
-                "high": high,
-                "low": low,
-                "volume": volume,
-                "bid": bid,
-                "ask": ask,
-                "open": open_price,
-                "close": close_price,
-                "timestamp": get_ist_timestamp(),
-                "exchange_timestamp": datetime.fromtimestamp(tick_data.get('exchange_timestamp', 0) / 1000).isoformat() if tick_data.get('exchange_timestamp') else get_ist_timestamp()
-            }
-            
-            # Publish to Redis Stream
-            stream_key = f"{MARKET_DATA_STREAM}:{symbol}"
-            await self.redis_client.xadd(
-                stream_key,
-                tick_message,
-                maxlen=1000  # Keep last 1000 messages per symbol
-            )
-            
-            # Update stats
-            self.tick_count += 1
-            self.last_tick_time = get_ist_now()
-            
-            if self.tick_count % 100 == 0:
-                logger.info(f"📊 Published {self.tick_count} ticks to Redis")
+            if MARKET_DATA_ENCODING == ENCODING_BINARY:
+                received_ns = time.time_ns()
+                exchange_ms = tick_data.get('exchange_timestamp')
+                tick_message = encode_fields(
+                    symbol, token, ltp, change, change_percent, high, low, volume,
+                    bid, ask, open_price, close_price,
+                    received_ns, exchange_ms * 1_000_000 if exchange_ms else received_ns
+                )
+            else:
+                tick_message = {
+                    "symbol": symbol,
+                    "token": token,
+                    "ltp": ltp,
+                    "change": change,
+                    "change_percent": change_percent,
+                    "high": high,
+                    "low": low,
+                    "volume": volume,
+                    "bid": bid,
+                    "ask": ask,
+                    "open": open_price,
+                    "close": close_price,
+                    "timestamp": get_ist_timestamp(),
+                    "exchange_timestamp": datetime.fromtimestamp(tick_data.get('exchange_timestamp', 0) / 1000).isoformat() if tick_data.get('exchange_timestamp') else get_ist_timestamp()
+                }
+            
+            return f"{MARKET_DATA_STREAM}:{symbol}", tick_message
             
         except Exception as e:
-            logger.error(f"Error processing and publishing tick: {e}")
+            logger.error(f"Error processing tick: {e}")
+            return None
+    
+    def _resolve_symbol(self, symbol: str, exchange: str = "NSE") -> Optional[Tuple[int, str]]:
+        """Resolve a symbol to its (exchangeType, token)"""
+        instrument = self.instruments.get(symbol, exchange)
+        if instrument and instrument.exchange_type:
+            return instrument.exchange_type, instrument.token
+        
+        token = self.symbol_tokens.get(symbol) if exchange == "NSE" else None
+        if token:
+            return EXCHANGE_TYPES["NSE"], token
+        return None
     
-    def _get_symbol_from_token(self, token: str) -> str:
-        """Get symbol name from token"""
-        for symbol, token_val in self.symbol_tokens.items():
-            if token_val == token:
-                return symbol
+    def _build_token_groups(self, symbols: List[str]) -> List[Dict]:
+        """Group symbol tokens by exchangeType (Angel One format) and index them for tick lookups"""
+        groups: Dict[int, List[str]] = {}
+        for symbol in symbols:
+            resolved = self._resolve_symbol(symbol)
+            if not resolved:
+                logger.warning(f"⚠️ No token found for {symbol}")
+                continue
+            exchange_type, token = resolved
+            groups.setdefault(exchange_type, []).append(token)
+            self.token_symbols[(exchange_type, token)] = symbol
+        
+        return [{"exchangeType": exchange_type, "tokens": tokens} for exchange_type, tokens in groups.items()]
+    
+    def _get_symbol_from_token(self, token: str, exchange_type: int = 1) -> str:
+        """Get symbol name from token (O(1))"""
+        symbol = self.token_symbols.get((exchange_type, token))
+        if symbol:
+            return symbol
         return f"TOKEN_{token}"  # Fallback if symbol not found
     
     async def close(self):
@@ -312,8 +371,14 @@ class MarketDataRedisStreamer:
             
             # Close WebSocket connection using the Angel One client
             if self.angel_client:
+                if self.redis_client:
+                    await self._save_tick_rates()
                 self.angel_client.disconnect()
             
+            # Flush queued ticks before closing Redis
+            if self.publisher:
+                await self.publisher.stop()
+            
             if self.redis_client:
                 await self.redis_client.close()
             
@@ -323,15 +388,21 @@ class MarketDataRedisStreamer:
     
     def get_stats(self) -> Dict:
         """Get streaming statistics"""
+        publisher_stats = self.publisher.get_stats() if self.publisher else {}
+        last_publish = self.publisher.last_publish_time if self.publisher else None
         return {
             "symbols_tracked": len(self.symbols),
             "symbols": self.symbols,
             "ws_connected": self.ws_connected,
-            "tick_count": self.tick_count,
-            "last_tick_time": self.last_tick_time.isoformat() if self.last_tick_time else None,
+            "tick_count": publisher_stats.get("ticks_published", 0),
+            "last_tick_time": datetime.fromtimestamp(last_publish, IST).isoformat() if last_publish else None,
             "running": self.running,
             "has_credentials": True,
-            "redis_connected": self.redis_client is not None
+            "redis_connected": self.redis_client is not None,
+            "encoding": MARKET_DATA_ENCODING,
+            "publisher": publisher_stats,
+            "tick_logging": self.tick_log.get_stats(),
+            "websocket": self.angel_client.get_stats() if self.angel_client else {}
         }
     
     async def subscribe_to_symbols(self, symbols: List[str]) -> bool:
@@ -341,14 +412,10 @@ class MarketDataRedisStreamer:
                 logger.error("❌ Cannot subscribe - not connected")
                 return False
             
-            # Get tokens for new symbols
-            new_tokens = []
-            for symbol in symbols:
-                token = self.symbol_tokens.get(symbol)
-                if token:
-                    new_tokens.append(token)
+            # Get token groups for new symbols
+            token_group = self._build_token_groups(symbols)
             
-            if not new_tokens:
+            if not token_group:
                 logger.warning("No valid tokens found for new symbols")
                 return False
             
@@ -356,11 +423,6 @@ class MarketDataRedisStreamer:
             self.symbols.extend(symbols)
             
             # Subscribe to new tokens
-            token_group = [{
-                "exchangeType": 1,  # NSE CM
-                "tokens": new_tokens
-            }]
-            
             success = self.angel_client.subscribe(token_group)
             if success:
                 logger.info(f"✅ Subscribed to {len(symbols)} new symbols: {symbols}")
@@ -475,7 +537,8 @@ async def get_symbols():
         return {
             "symbols": market_data_streamer.symbols,
             "count": len(market_data_streamer.symbols),
-            "symbol_tokens": market_data_streamer.symbol_tokens
+            "symbol_tokens": {symbol: token for (_, token), symbol in market_data_streamer.token_symbols.items()},
+            "instruments": market_data_streamer.instruments.get_stats()
         }
     except Exception as e:
         logger.error(f"Error getting symbols: {e}")
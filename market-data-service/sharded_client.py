@@ -0,0 +1,334 @@
+"""
+Sharded Angel One WebSocket client
+
+Splits the subscribed token universe across several SmartWebSocketV2
+connections, each decoding on its own thread, so no single connection hits the
+broker's per-connection token cap or falls behind decoding SnapQuote packets.
+All shards share one login (one session and feed token).
+
+Tokens are assigned to shards by expected tick rate (largest first onto the
+least loaded shard). Every token lives on exactly one shard and each shard
+delivers on one thread, so per-symbol tick order is preserved; the shards'
+outputs meet in the single on_data callback (the batching publisher queue).
+"""
+
+import heapq
+import logging
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from angel_one_client import AngelOneWebSocketClient
+
+logger = logging.getLogger(__name__)
+
+WS_SHARDS = int(os.getenv("WS_SHARDS", "1"))
+WS_MAX_TOKENS_PER_SHARD = int(os.getenv("WS_MAX_TOKENS_PER_SHARD", "1000"))
+WS_CONNECT_WAIT = float(os.getenv("WS_CONNECT_WAIT", "3"))
+
+TokenKey = Tuple[int, str]  # (exchangeType, token)
+
+
+def flatten_token_groups(token_groups: List[Dict]) -> List[TokenKey]:
+    """[{"exchangeType": 1, "tokens": [...]}] -> [(1, token), ...] without duplicates"""
+    keys = []
+    seen = set()
+    for group in token_groups:
+        exchange_type = int(group["exchangeType"])
+        for token in group["tokens"]:
+            key = (exchange_type, str(token))
+            if key not in seen:
+                seen.add(key)
+                keys.append(key)
+    return keys
+
+
+def to_token_groups(keys) -> List[Dict]:
+    """[(1, token), ...] -> Angel One token groups, one per exchangeType"""
+    groups: Dict[int, List[str]] = {}
+    for exchange_type, token in keys:
+        groups.setdefault(exchange_type, []).append(token)
+    return [{"exchangeType": exchange_type, "tokens": tokens} for exchange_type, tokens in groups.items()]
+
+
+class _Shard:
+    """One WebSocket connection and the tokens assigned to it"""
+
+    def __init__(self, index: int, client: AngelOneWebSocketClient):
+        self.index = index
+        self.client = client
+        self.tokens: Dict[TokenKey, float] = {}  # token -> expected ticks/sec
+        self.token_ticks: Dict[TokenKey, int] = {}
+        self.ticks = 0
+        self.errors = 0
+        self.closes = 0
+        self.started_at: Optional[float] = None
+        self.last_tick_time: Optional[float] = None
+
+    @property
+    def load(self) -> float:
+        return sum(self.tokens.values())
+
+    def get_stats(self) -> Dict:
+        elapsed = time.time() - self.started_at if self.started_at else 0
+        return {
+            "shard": self.index,
+            "connected": self.client.is_connected(),
+            "tokens": len(self.tokens),
+            "expected_ticks_per_sec": round(self.load, 3),
+            "ticks": self.ticks,
+            "ticks_per_sec": round(self.ticks / elapsed, 3) if elapsed > 0 else 0.0,
+            "last_tick_time": self.last_tick_time,
+            "errors": self.errors,
+            "closes": self.closes
+        }
+
+
+class ShardedWebSocketClient:
+    """Drop-in replacement for AngelOneWebSocketClient that spreads tokens over N connections"""
+
+    def __init__(self, num_shards: int = WS_SHARDS,
+                 max_tokens_per_shard: int = WS_MAX_TOKENS_PER_SHARD,
+                 client_factory: Callable[..., AngelOneWebSocketClient] = AngelOneWebSocketClient,
+                 connect_wait: float = WS_CONNECT_WAIT):
+        """
+        Args:
+            num_shards: Minimum number of connections (more are added if the
+                token count exceeds max_tokens_per_shard per connection)
+            max_tokens_per_shard: Token cap per connection
+            client_factory: Creates the per-shard clients (takes ``name=``)
+            connect_wait: Seconds to wait for the shards to open after connecting
+        """
+        self.num_shards = max(1, num_shards)
+        self.max_tokens_per_shard = max(1, max_tokens_per_shard)
+        self.client_factory = client_factory
+        self.connect_wait = connect_wait
+
+        self.shards: List[_Shard] = []
+        self.token_shard: Dict[TokenKey, _Shard] = {}
+        self.weights: Dict[TokenKey, float] = {}
+        self._session: Optional[AngelOneWebSocketClient] = None
+        self._lock = threading.Lock()
+
+        # Callbacks (same signatures as AngelOneWebSocketClient)
+        self.on_data_callback = None
+        self.on_error_callback = None
+        self.on_close_callback = None
+        self.on_open_callback = None
+
+    def set_callbacks(self, on_data=None, on_error=None, on_close=None, on_open=None):
+        """Set callback functions for WebSocket events (shared by all shards)"""
+        if on_data:
+            self.on_data_callback = on_data
+        if on_error:
+            self.on_error_callback = on_error
+        if on_close:
+            self.on_close_callback = on_close
+        if on_open:
+            self.on_open_callback = on_open
+
+    def _default_weight(self) -> float:
+        if not self.weights:
+            return 1.0
+        return sum(self.weights.values()) / len(self.weights)
+
+    def plan(self, keys: List[TokenKey], num_shards: int) -> List[Dict[TokenKey, float]]:
+        """Assign tokens to shards, largest expected tick rate first onto the least loaded shard"""
+        default_weight = self._default_weight()
+        weighted = sorted(((self.weights.get(key, default_weight), key) for key in keys),
+                          key=lambda item: item[0], reverse=True)
+
+        assignments: List[Dict[TokenKey, float]] = [{} for _ in range(num_shards)]
+        heap = [(0.0, 0, index) for index in range(num_shards)]  # (load, tokens, shard)
+        for weight, key in weighted:
+            load, count, index = heapq.heappop(heap)
+            assignments[index][key] = weight
+            if count + 1 < self.max_tokens_per_shard:
+                heapq.heappush(heap, (load + weight, count + 1, index))
+        return assignments
+
+    def _make_shard(self) -> _Shard:
+        index = len(self.shards)
+        client = self.client_factory(name=f"ws-shard-{index}")
+        client.use_session(self._session)
+        shard = _Shard(index, client)
+
+        def on_data(wsapp, msg, shard=shard):
+            shard.ticks += 1
+            shard.last_tick_time = time.time()
+            if isinstance(msg, dict):
+                key = (msg.get('exchange_type', 1), str(msg.get('token')))
+                shard.token_ticks[key] = shard.token_ticks.get(key, 0) + 1
+            if self.on_data_callback:
+                self.on_data_callback(wsapp, msg)
+
+        def on_error(wsapp, error, shard=shard):
+            shard.errors += 1
+            if self.on_error_callback:
+                self.on_error_callback(wsapp, error)
+
+        def on_close(wsapp, *args, shard=shard):
+            shard.closes += 1
+            logger.warning(f"⚠️ WebSocket shard {shard.index} closed")
+            if self.on_close_callback:
+                self.on_close_callback(wsapp, *args)
+
+        def on_open(wsapp):
+            if self.on_open_callback:
+                self.on_open_callback(wsapp)
+
+        client.set_callbacks(on_data=on_data, on_error=on_error, on_close=on_close, on_open=on_open)
+        self.shards.append(shard)
+        return shard
+
+    def _start_shard(self, shard: _Shard, tokens: Dict[TokenKey, float]) -> bool:
+        shard.tokens.update(tokens)
+        for key in tokens:
+            self.token_shard[key] = shard
+        shard.started_at = time.time()
+        return shard.client.connect(to_token_groups(tokens), authenticate=False, wait=0)
+
+    def connect(self, tokens=None, weights: Optional[Dict[TokenKey, float]] = None):
+        """
+        Log in once and connect the shards
+
+        Args:
+            tokens: Token groups, e.g. [{"exchangeType": 1, "tokens": ["2881"]}]
+            weights: Expected ticks/sec per (exchangeType, token); unknown tokens
+                get the average weight
+        """
+        try:
+            if weights:
+                self.weights.update(weights)
+
+            keys = flatten_token_groups(tokens or [])
+            if not keys:
+                logger.error("❌ Cannot connect - no tokens to subscribe")
+                return False
+
+            self._session = self.client_factory(name="ws-session")
+            if not self._session.authenticate():
+                logger.error("❌ Cannot connect - authentication failed")
+                return False
+
+            num_shards = max(self.num_shards, math.ceil(len(keys) / self.max_tokens_per_shard))
+            started = 0
+            with self._lock:
+                for tokens_for_shard in self.plan(keys, num_shards):
+                    if not tokens_for_shard:
+                        continue
+                    shard = self._make_shard()
+                    if self._start_shard(shard, tokens_for_shard):
+                        started += 1
+
+            if self.connect_wait:
+                time.sleep(self.connect_wait)
+
+            logger.info(f"✅ Started {started}/{len(self.shards)} WebSocket shards for {len(keys)} tokens")
+            return started > 0
+
+        except Exception as e:
+            logger.error(f"❌ Sharded connection failed: {e}")
+            return False
+
+    def subscribe(self, tokens):
+        """Subscribe to additional tokens, each on the least loaded shard with room"""
+        if not self._session:
+            logger.error("❌ Cannot subscribe - not connected")
+            return False
+
+        default_weight = self._default_weight()
+        new_shard_tokens: Dict[TokenKey, float] = {}
+        per_shard: Dict[int, List[TokenKey]] = {}
+        success = True
+        with self._lock:
+            for key in flatten_token_groups(tokens):
+                if key in self.token_shard or key in new_shard_tokens:
+                    continue
+                weight = self.weights.get(key, default_weight)
+                candidates = [shard for shard in self.shards
+                              if len(shard.tokens) < self.max_tokens_per_shard]
+                if not candidates:
+                    if len(new_shard_tokens) < self.max_tokens_per_shard:
+                        new_shard_tokens[key] = weight
+                        continue
+                    logger.error(f"❌ No shard capacity for token {key}")
+                    success = False
+                    continue
+                shard = min(candidates, key=lambda s: s.load)
+                shard.tokens[key] = weight
+                self.token_shard[key] = shard
+                per_shard.setdefault(shard.index, []).append(key)
+
+            for index, keys in per_shard.items():
+                if not self.shards[index].client.subscribe(to_token_groups(keys)):
+                    success = False
+            if new_shard_tokens:
+                shard = self._make_shard()
+                if not self._start_shard(shard, new_shard_tokens):
+                    success = False
+                logger.info(f"✅ Added WebSocket shard {shard.index} for {len(new_shard_tokens)} tokens")
+        return success
+
+    def unsubscribe(self, tokens):
+        """Unsubscribe from tokens on whichever shards carry them"""
+        per_shard: Dict[int, List[TokenKey]] = {}
+        with self._lock:
+            for key in flatten_token_groups(tokens):
+                shard = self.token_shard.pop(key, None)
+                if shard:
+                    shard.tokens.pop(key, None)
+                    per_shard.setdefault(shard.index, []).append(key)
+
+        success = True
+        for index, keys in per_shard.items():
+            if not self.shards[index].client.unsubscribe(to_token_groups(keys)):
+                success = False
+        return success
+
+    def disconnect(self):
+        """Disconnect all shards"""
+        success = True
+        for shard in self.shards:
+            if not shard.client.disconnect():
+                success = False
+        return success
+
+    def is_connected(self):
+        """True while at least one shard is connected"""
+        return any(shard.client.is_connected() for shard in self.shards)
+
+    @property
+    def connected(self):
+        return self.is_connected()
+
+    def get_subscribed_tokens(self):
+        """Get currently subscribed token groups across all shards"""
+        return to_token_groups(self.token_shard)
+
+    def get_tick_rates(self) -> Dict[TokenKey, float]:
+        """Observed ticks/sec per token, usable as weights for the next connect"""
+        rates = {}
+        now = time.time()
+        for shard in self.shards:
+            if not shard.started_at or now <= shard.started_at:
+                continue
+            elapsed = now - shard.started_at
+            for key, count in list(shard.token_ticks.items()):
+                rates[key] = count / elapsed
+        return rates
+
+    def get_stats(self):
+        """Get connection statistics, including per-shard tick rates"""
+        shard_stats = [shard.get_stats() for shard in self.shards]
+        return {
+            "connected": self.is_connected(),
+            "shards": len(self.shards),
+            "connected_shards": sum(1 for stats in shard_stats if stats["connected"]),
+            "subscribed_tokens": len(self.token_shard),
+            "max_tokens_per_shard": self.max_tokens_per_shard,
+            "ticks": sum(stats["ticks"] for stats in shard_stats),
+            "shard_stats": shard_stats
+        }
@@ -13,6 +13,9 @@ from typing import Dict, List, Optional
 import redis.asyncio as redis
 import redis.exceptions
 
+sys.path.insert(0, '/app')
+from shared.tick_codec import decode_fields
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -145,6 +148,11 @@ class SimpleMarketDataConsumer:
     async def process_tick(self, stream: str, message_id: str, fields: Dict):
         """Process a tick message"""
         try:
+            # Compact binary ticks carry everything in one packed field
+            compact = decode_fields(fields)
+            if compact is not None:
+                fields = {key: str(value) for key, value in compact.items()}
+            
             # Convert bytes to strings if needed
             processed_fields = {}
             for key, value in fields.items():
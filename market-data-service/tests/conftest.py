@@ -0,0 +1,17 @@
+import os
+import sys
+import types
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# angel_one_client reads credentials from a deployment-provided config.py
+try:
+    import config
+    config.API_KEY
+except (ImportError, AttributeError):
+    sys.modules["config"] = types.SimpleNamespace(
+        API_KEY="test-key", USERNAME="test-user", PIN="0000", TOKEN="JBSWY3DPEHPK3PXP",
+        CORRELATION_ID="test00001", FEED_MODE=1
+    )
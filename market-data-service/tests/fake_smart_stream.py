@@ -0,0 +1,235 @@
+"""
+Fake Angel One SmartStream server for tests
+
+Speaks just enough of the WebSocket protocol (RFC 6455) and of the
+SmartWebSocketV2 feed for the real client to connect, subscribe and decode
+ticks: JSON subscribe/unsubscribe requests in, little-endian LTP packets out.
+Each accepted connection is tracked so tests can see which tokens it
+subscribed, push ticks to it and drop it.
+"""
+
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+LTP_MODE = 1
+SUBSCRIBE_ACTION = 1
+
+TokenKey = Tuple[int, str]  # (exchangeType, token)
+
+
+def ltp_packet(exchange_type: int, token: str, sequence: int, ltp_paise: int,
+               exchange_ms: Optional[int] = None) -> bytes:
+    """One LTP-mode packet as SmartWebSocketV2._parse_binary_data expects it"""
+    return struct.pack(
+        "<BB25sqqq", LTP_MODE, exchange_type, token.encode(), sequence,
+        exchange_ms if exchange_ms is not None else int(time.time() * 1000), ltp_paise
+    )
+
+
+class FakeConnection:
+    """One client connection to the fake server"""
+
+    def __init__(self, index: int, sock: socket.socket, headers: Dict[str, str]):
+        self.index = index
+        self.sock = sock
+        self.headers = headers
+        self.tokens: List[TokenKey] = []
+        self.subscribed = threading.Event()
+        self.closed = threading.Event()
+        self.closing = False
+        self._send_lock = threading.Lock()
+
+    @property
+    def token_set(self) -> Set[TokenKey]:
+        return set(self.tokens)
+
+    def send_frame(self, opcode: int, payload: bytes = b""):
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([length])
+        elif length < 1 << 16:
+            header += bytes([126]) + struct.pack("!H", length)
+        else:
+            header += bytes([127]) + struct.pack("!Q", length)
+        with self._send_lock:
+            self.sock.sendall(header + payload)
+
+    def send_ticks(self, ticks_per_token: int, start_sequence: int = 0):
+        """Send ticks_per_token ticks for every subscribed token, interleaved across tokens"""
+        for offset in range(ticks_per_token):
+            sequence = start_sequence + offset
+            for exchange_type, token in list(self.tokens):
+                self.send_frame(OP_BINARY, ltp_packet(exchange_type, token, sequence, 10_000 + sequence))
+
+    def drop(self, timeout: float = 2.0):
+        """Close the connection from the server side (close handshake, then shutdown)"""
+        self.closing = True
+        try:
+            self.send_frame(OP_CLOSE, struct.pack("!H", 1001) + b"going away")
+        except OSError:
+            pass
+        if not self.closed.wait(timeout):
+            self._shutdown()
+
+    def _shutdown(self):
+        self.closed.set()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+    def _recv_exact(self, size: int) -> bytes:
+        data = b""
+        while len(data) < size:
+            chunk = self.sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("client went away")
+            data += chunk
+        return data
+
+    def read_frame(self) -> Tuple[int, bytes]:
+        first, second = self._recv_exact(2)
+        opcode = first & 0x0F
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", self._recv_exact(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self._recv_exact(8))[0]
+        mask = self._recv_exact(4) if second & 0x80 else b""
+        payload = self._recv_exact(length)
+        if mask:
+            payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+        return opcode, payload
+
+    def handle_request(self, request: Dict):
+        keys = [(int(group["exchangeType"]), str(token))
+                for group in request["params"]["tokenList"] for token in group["tokens"]]
+        if request["action"] == SUBSCRIBE_ACTION:
+            self.tokens.extend(key for key in keys if key not in self.token_set)
+            self.subscribed.set()
+        else:
+            self.tokens = [key for key in self.tokens if key not in keys]
+
+
+class FakeSmartStreamServer:
+    """Threaded SmartStream stand-in on 127.0.0.1; point SmartWebSocketV2.ROOT_URI at ``url``"""
+
+    def __init__(self):
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind(("127.0.0.1", 0))
+        self._listener.listen()
+        self.port = self._listener.getsockname()[1]
+        self.connections: List[FakeConnection] = []
+        self._lock = threading.Lock()
+        self._running = False
+
+    @property
+    def url(self) -> str:
+        return f"ws://127.0.0.1:{self.port}/smart-stream"
+
+    def start(self):
+        self._running = True
+        threading.Thread(target=self._accept_loop, daemon=True, name="fake-smart-stream").start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self._listener.close()
+        for connection in list(self.connections):
+            if not connection.closed.is_set():
+                connection._shutdown()
+
+    def open_connections(self) -> List[FakeConnection]:
+        return [connection for connection in self.connections if not connection.closed.is_set()]
+
+    def connection_for(self, key: TokenKey) -> Optional[FakeConnection]:
+        for connection in self.open_connections():
+            if key in connection.token_set:
+                return connection
+        return None
+
+    def wait_for_subscriptions(self, count: int, timeout: float = 5.0) -> List[FakeConnection]:
+        """Wait until ``count`` open connections have subscribed"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            subscribed = [c for c in self.open_connections() if c.subscribed.is_set()]
+            if len(subscribed) >= count:
+                return subscribed
+            time.sleep(0.01)
+        raise TimeoutError(f"only {len(subscribed)}/{count} connections subscribed")
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                sock, _ = self._listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(sock,), daemon=True).start()
+
+    def _handshake(self, sock: socket.socket) -> Dict[str, str]:
+        request = b""
+        while b"\r\n\r\n" not in request:
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise ConnectionError("client went away during handshake")
+            request += chunk
+        lines = request.split(b"\r\n\r\n", 1)[0].decode().split("\r\n")[1:]
+        headers = {}
+        for line in lines:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        accept = base64.b64encode(
+            hashlib.sha1((headers["sec-websocket-key"] + WS_GUID).encode()).digest()
+        ).decode()
+        sock.sendall((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode())
+        return headers
+
+    def _serve(self, sock: socket.socket):
+        try:
+            headers = self._handshake(sock)
+        except (ConnectionError, KeyError, OSError):
+            sock.close()
+            return
+
+        with self._lock:
+            connection = FakeConnection(len(self.connections), sock, headers)
+            self.connections.append(connection)
+
+        try:
+            while not connection.closed.is_set():
+                opcode, payload = connection.read_frame()
+                if opcode == OP_TEXT:
+                    connection.handle_request(json.loads(payload))
+                elif opcode == OP_PING:
+                    connection.send_frame(OP_PONG, payload)
+                elif opcode == OP_CLOSE:
+                    if not connection.closing:  # Echo a client-initiated close
+                        connection.send_frame(OP_CLOSE, payload[:2])
+                    break
+        except (ConnectionError, OSError):
+            pass
+        if not connection.closed.is_set():
+            connection._shutdown()
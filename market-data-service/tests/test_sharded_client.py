@@ -0,0 +1,195 @@
+"""
+ShardedWebSocketClient against a fake SmartStream server
+
+The real AngelOneWebSocketClient / SmartWebSocketV2 stack is used end to end;
+only the broker login is skipped and the feed URL points at the fake server.
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+
+import pytest
+
+from fake_smart_stream import FakeSmartStreamServer
+
+WEIGHTS = {(1, "A"): 50, (1, "B"): 30, (1, "C"): 20, (1, "D"): 10, (1, "E"): 5, (1, "F"): 5}
+TOKENS = [{"exchangeType": 1, "tokens": ["A", "B", "C", "D", "E", "F"]}]
+
+
+class _RecordingRedis:
+    """Just enough of redis.asyncio for BatchingTickPublisher: pipelined XADDs"""
+
+    def __init__(self):
+        self.streams = defaultdict(list)
+
+    def pipeline(self, transaction=True):
+        return _RecordingPipeline(self)
+
+
+class _RecordingPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def xadd(self, key, fields, maxlen=None, approximate=True):
+        self.commands.append((key, fields))
+
+    async def execute(self):
+        for key, fields in self.commands:
+            self.redis.streams[key].append(fields)
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return
+        time.sleep(0.01)
+    raise AssertionError("condition not reached in time")
+
+
+@pytest.fixture
+def server():
+    server = FakeSmartStreamServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def make_client(server, tmp_path, monkeypatch):
+    # The SDK and angel_one_client write log files into the working directory
+    monkeypatch.chdir(tmp_path)
+    from angel_one_client import AngelOneWebSocketClient
+    from sharded_client import ShardedWebSocketClient
+
+    class FakeSessionClient(AngelOneWebSocketClient):
+        def authenticate(self):
+            self.smart_api_obj = object()
+            self.auth_token = "jwt-token"
+            self.feed_token = "feed-token"
+            return self.smart_api_obj
+
+        def create_websocket(self):
+            sws = super().create_websocket()
+            sws.ROOT_URI = server.url
+            sws.retry_delay = 0.05
+            return sws
+
+    clients = []
+
+    def make_client(**kwargs):
+        client = ShardedWebSocketClient(client_factory=FakeSessionClient, connect_wait=0, **kwargs)
+        clients.append(client)
+        return client
+
+    yield make_client
+    for client in clients:
+        client.disconnect()
+
+
+def test_plan_balances_by_tick_rate_and_caps_tokens(make_client):
+    client = make_client(num_shards=2)
+    client.weights.update(WEIGHTS)
+    keys = list(WEIGHTS)
+
+    plan = client.plan(keys, 2)
+    assert [sorted(token for _, token in shard) for shard in plan] == [["A", "D"], ["B", "C", "E", "F"]]
+    assert [sum(shard.values()) for shard in plan] == [60, 60]
+
+    capped = make_client(max_tokens_per_shard=2)
+    capped.weights.update(WEIGHTS)
+    plan = capped.plan(keys, 3)
+    assert sorted(len(shard) for shard in plan) == [2, 2, 2]
+    assert {key for shard in plan for key in shard} == set(keys)
+
+
+def test_connect_subscribes_each_token_on_one_connection(server, make_client):
+    client = make_client(num_shards=2)
+    assert client.connect(TOKENS, weights=WEIGHTS)
+
+    connections = server.wait_for_subscriptions(2)
+    assert all(c.headers["x-feed-token"] == "feed-token" for c in connections)
+    assert sorted(sorted(token for _, token in c.tokens) for c in connections) == \
+        [["A", "D"], ["B", "C", "E", "F"]]
+    for shard in client.shards:
+        assert server.connection_for(next(iter(shard.tokens))).token_set == set(shard.tokens)
+
+
+def test_merge_preserves_per_symbol_order_into_publisher(server, make_client):
+    from tick_publisher import BatchingTickPublisher
+
+    ticks_per_token = 200
+    redis = _RecordingRedis()
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        publisher = BatchingTickPublisher(redis, loop, batch_size=50, flush_interval_ms=1)
+        publisher.start()
+
+        client = make_client(num_shards=3)
+        client.set_callbacks(on_data=lambda wsapp, msg: publisher.submit(
+            f"ticks:{msg['token']}", {"seq": msg["sequence_number"]}
+        ))
+        assert client.connect(TOKENS, weights=WEIGHTS)
+        connections = await asyncio.to_thread(server.wait_for_subscriptions, 3)
+
+        # Every shard streams at once, so the shards interleave in the single publisher queue
+        await asyncio.gather(*(asyncio.to_thread(c.send_ticks, ticks_per_token) for c in connections))
+        expected = ticks_per_token * len(WEIGHTS)
+        deadline = loop.time() + 5
+        while publisher.ticks_published < expected and loop.time() < deadline:
+            await asyncio.sleep(0.01)
+        await publisher.stop()
+        return publisher.get_stats()
+
+    stats = asyncio.run(run())
+    assert stats["ticks_published"] == ticks_per_token * len(WEIGHTS)
+    assert stats["ticks_dropped"] == 0
+    assert stats["batches_flushed"] > 1
+    for _, token in WEIGHTS:
+        assert [fields["seq"] for fields in redis.streams[f"ticks:{token}"]] == list(range(ticks_per_token))
+
+
+def test_stats_per_shard_and_reconnect_after_server_close(server, make_client):
+    client = make_client(num_shards=2)
+    assert client.connect(TOKENS, weights=WEIGHTS)
+    connections = server.wait_for_subscriptions(2)
+    for connection in connections:
+        connection.send_ticks(10)
+    wait_until(lambda: client.get_stats()["ticks"] == 60)
+
+    stats = client.get_stats()
+    assert stats["connected"] and stats["shards"] == 2 and stats["connected_shards"] == 2
+    assert stats["subscribed_tokens"] == 6
+    by_shard = {s["shard"]: s for s in stats["shard_stats"]}
+    for shard in client.shards:
+        shard_stats = by_shard[shard.index]
+        assert shard_stats["tokens"] == len(shard.tokens)
+        assert shard_stats["expected_ticks_per_sec"] == 60
+        assert shard_stats["ticks"] == 10 * len(shard.tokens)
+        assert shard_stats["errors"] == 0
+    assert set(client.get_tick_rates()) == set(WEIGHTS)
+
+    # The server drops one connection; that shard reconnects with only its own tokens
+    dropped_shard = client.token_shard[(1, "A")]
+    other_shard = client.token_shard[(1, "B")]
+    server.connection_for((1, "A")).drop()
+    wait_until(lambda: server.connection_for((1, "A")) is not None)
+    reconnected = server.connection_for((1, "A"))
+    assert reconnected not in connections
+    assert reconnected.token_set == set(dropped_shard.tokens)
+    assert sum(len(c.tokens) for c in server.open_connections()) == 6
+
+    stats = client.get_stats()
+    by_shard = {s["shard"]: s for s in stats["shard_stats"]}
+    assert by_shard[dropped_shard.index]["errors"] == 1
+    assert by_shard[other_shard.index]["errors"] == 0
+    assert stats["connected_shards"] == 2
+
+    reconnected.send_ticks(5, start_sequence=10)
+    wait_until(lambda: dropped_shard.ticks == 15 * len(dropped_shard.tokens))
+
+    client.disconnect()
+    wait_until(lambda: not client.is_connected())
+    assert client.get_stats()["connected_shards"] == 0
@@ -0,0 +1,151 @@
+"""
+Non-blocking logging for the websocket hot path
+
+``setup_queue_logging()`` moves the root logger's handlers (file, stdout) behind
+a ``QueueHandler``/``QueueListener`` pair, so websocket threads only enqueue
+records; formatting and I/O happen on the listener thread.
+
+``TickLogger`` replaces per-tick ``logger.info`` calls. ``TICK_LOG_MODE``
+selects what happens per tick:
+
+- ``off``: nothing
+- ``counter``: per-token counters only (reported in ``/stats``), no text
+- ``sampled``: counters plus one log line per token every ``TICK_LOG_INTERVAL`` seconds
+- ``full``: a log line for every tick (debugging only)
+
+Tick lines are formatted lazily on the listener thread from a short summary
+(token, ltp, volume, best bid/ask), never from the full SnapQuote dict.
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger("ticks")
+
+TICK_LOG_MODES = ("off", "counter", "sampled", "full")
+TICK_LOG_MODE = os.getenv("TICK_LOG_MODE", "sampled").lower()
+TICK_LOG_INTERVAL = float(os.getenv("TICK_LOG_INTERVAL", "60"))
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread and never blocks"""
+
+    dropped = 0
+
+    def prepare(self, record):
+        # The default prepare() formats the message on the calling thread.
+        # Records stay in-process, so they can be queued untouched.
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_queue_logging(max_queue: int = 10000) -> Optional[logging.handlers.QueueListener]:
+    """Route the root logger's handlers through a background listener thread (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    if not handlers:
+        return None
+
+    # Bounded so a stalled handler can't grow memory; records are dropped when full
+    log_queue = queue.Queue(max_queue)
+    queue_handler = _DeferredQueueHandler(log_queue)
+
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_queue_logging)
+    return _listener
+
+
+def stop_queue_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class _TickSummary:
+    """Formats a compact tick description only when the record is emitted"""
+
+    __slots__ = ("msg",)
+
+    def __init__(self, msg: Dict):
+        self.msg = msg
+
+    def __str__(self) -> str:
+        msg = self.msg
+        buy = msg.get("best_5_buy_data") or [{}]
+        sell = msg.get("best_5_sell_data") or [{}]
+        return (f"token={msg.get('token')} exch={msg.get('exchange_type')} "
+                f"ltp={msg.get('last_traded_price', 0) / 100} "
+                f"vol={msg.get('volume_trade_for_the_day')} "
+                f"bid={buy[0].get('price', 0) / 100} ask={sell[0].get('price', 0) / 100}")
+
+
+class TickLogger:
+    """Per-tick logging according to TICK_LOG_MODE"""
+
+    def __init__(self, mode: str = TICK_LOG_MODE, interval: float = TICK_LOG_INTERVAL):
+        if mode not in TICK_LOG_MODES:
+            logging.getLogger(__name__).warning(
+                f"⚠️ Unknown TICK_LOG_MODE {mode!r}, using 'sampled' (expected one of {TICK_LOG_MODES})")
+            mode = "sampled"
+        self.mode = mode
+        self.interval = interval
+        # Updated from several websocket threads without a lock; counts are approximate
+        self.counts: Dict[str, int] = {}
+        self._last_logged: Dict[str, float] = {}
+        self.lines_logged = 0
+
+    def record(self, msg: Dict):
+        """Account for one raw websocket tick"""
+        mode = self.mode
+        if mode == "off":
+            return
+
+        token = msg.get("token", "")
+        counts = self.counts
+        count = counts.get(token, 0) + 1
+        counts[token] = count
+        if mode == "counter":
+            return
+
+        if mode == "sampled":
+            now = time.monotonic()
+            last = self._last_logged.get(token)
+            if last is not None and now - last < self.interval:
+                return
+            self._last_logged[token] = now
+
+        self.lines_logged += 1
+        logger.info("Tick #%d %s", count, _TickSummary(msg))
+
+    def get_stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "interval_seconds": self.interval,
+            "ticks": sum(self.counts.values()),
+            "tokens": len(self.counts),
+            "lines_logged": self.lines_logged,
+            "ticks_by_token": dict(self.counts)
+        }
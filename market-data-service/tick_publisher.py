@@ -0,0 +1,165 @@
+"""
+Batching Redis Stream publisher for market data ticks
+
+The Angel One websocket threads (one per shard) hand parsed ticks to
+``submit()``, which only appends to a deque under a short lock and wakes the
+event loop once a batch is full. A single asyncio drainer flushes queued ticks with one
+non-transactional pipeline per batch, every ``batch_size`` ticks or
+``flush_interval_ms`` milliseconds, whichever comes first. Streams are trimmed
+with ``MAXLEN ~`` so Redis can drop whole listpack nodes instead of single
+entries.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PUBLISH_BATCH_SIZE = int(os.getenv("PUBLISH_BATCH_SIZE", "500"))
+PUBLISH_FLUSH_INTERVAL_MS = float(os.getenv("PUBLISH_FLUSH_INTERVAL_MS", "5"))
+PUBLISH_QUEUE_MAX = int(os.getenv("PUBLISH_QUEUE_MAX", "100000"))
+STREAM_MAXLEN = int(os.getenv("STREAM_MAXLEN", "1000"))
+
+
+class BatchingTickPublisher:
+    """Queues ticks from any thread and XADDs them to Redis in pipelined batches"""
+
+    def __init__(self, redis_client, loop: asyncio.AbstractEventLoop,
+                 batch_size: int = PUBLISH_BATCH_SIZE,
+                 flush_interval_ms: float = PUBLISH_FLUSH_INTERVAL_MS,
+                 max_queue: int = PUBLISH_QUEUE_MAX,
+                 maxlen: int = STREAM_MAXLEN):
+        self.redis_client = redis_client
+        self.loop = loop
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_queue = max_queue
+        self.maxlen = maxlen
+
+        # Oldest ticks are dropped if Redis falls this far behind
+        self._queue: Deque[Tuple[str, Dict[str, Any]]] = deque(maxlen=max_queue)
+        self._wakeup = asyncio.Event()
+        self._wakeup_pending = False
+        self._submit_lock = threading.Lock()  # Several websocket shards submit concurrently
+        self._drain_task: Optional[asyncio.Task] = None
+        self.running = False
+
+        # Statistics
+        self.ticks_submitted = 0
+        self.ticks_published = 0
+        self.ticks_dropped = 0
+        self.batches_flushed = 0
+        self.publish_errors = 0
+        self.last_batch_size = 0
+        self.last_flush_ms = 0.0
+        self.last_publish_time: Optional[float] = None
+
+    def start(self):
+        """Start the drainer task (call from the event loop)"""
+        self.running = True
+        self._drain_task = self.loop.create_task(self._drain_loop())
+        logger.info(f"✅ Tick publisher started (batch={self.batch_size}, "
+                    f"interval={self.flush_interval * 1000:.1f}ms, maxlen~{self.maxlen})")
+
+    async def stop(self):
+        """Flush what is queued and stop the drainer"""
+        self.running = False
+        self._wakeup.set()
+        if self._drain_task:
+            try:
+                await self._drain_task
+            except Exception as e:
+                logger.error(f"❌ Error stopping tick publisher: {e}")
+            self._drain_task = None
+
+    def submit(self, stream_key: str, fields: Dict[str, Any]):
+        """Queue one tick for publishing; safe to call from any thread"""
+        queue = self._queue
+        with self._submit_lock:
+            if len(queue) >= self.max_queue:
+                self.ticks_dropped += 1
+            queue.append((stream_key, fields))
+            self.ticks_submitted += 1
+
+            # Wake the drainer early once a full batch is waiting (one hop per batch)
+            wakeup = len(queue) >= self.batch_size and not self._wakeup_pending
+            if wakeup:
+                self._wakeup_pending = True
+
+        if wakeup:
+            try:
+                self.loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:  # Event loop closed during shutdown
+                pass
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    async def _drain_loop(self):
+        """Flush batches until stopped, then flush the remainder"""
+        while self.running:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            self._wakeup_pending = False
+
+            while self._queue and self.running:
+                await self._flush_batch()
+                if len(self._queue) < self.batch_size:
+                    break
+
+        while self._queue:
+            await self._flush_batch()
+
+    async def _flush_batch(self):
+        """XADD up to one batch of queued ticks in a single pipeline round-trip"""
+        queue = self._queue
+        pipe = self.redis_client.pipeline(transaction=False)
+        count = 0
+        while queue and count < self.batch_size:
+            stream_key, fields = queue.popleft()
+            pipe.xadd(stream_key, fields, maxlen=self.maxlen, approximate=True)
+            count += 1
+        if not count:
+            return
+
+        started = time.perf_counter()
+        try:
+            await pipe.execute()
+            self.ticks_published += count
+            self.batches_flushed += 1
+            self.last_batch_size = count
+            self.last_publish_time = time.time()
+            if self.ticks_published // 10000 != (self.ticks_published - count) // 10000:
+                logger.info(f"📊 Published {self.ticks_published} ticks to Redis")
+        except Exception as e:
+            # Ticks are superseded quickly, so a failed batch is dropped, not retried
+            self.publish_errors += 1
+            self.ticks_dropped += count
+            logger.error(f"❌ Failed to publish batch of {count} ticks: {e}")
+        finally:
+            self.last_flush_ms = (time.perf_counter() - started) * 1000
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get publisher statistics"""
+        return {
+            "ticks_submitted": self.ticks_submitted,
+            "ticks_published": self.ticks_published,
+            "ticks_dropped": self.ticks_dropped,
+            "queue_depth": len(self._queue),
+            "batches_flushed": self.batches_flushed,
+            "publish_errors": self.publish_errors,
+            "last_batch_size": self.last_batch_size,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "batch_size": self.batch_size,
+            "flush_interval_ms": self.flush_interval * 1000,
+            "stream_maxlen": self.maxlen
+        }
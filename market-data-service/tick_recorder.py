@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Tick Recorder - persists market_data_stream:{symbol} to columnar day files
+
+The streamer trims each stream to ~STREAM_MAXLEN entries, so Redis only holds
+the last few minutes of ticks. The recorder reads every market data stream in
+its own consumer group and appends the ticks to a ``shared.tick_archive``
+directory (``{TICK_RECORDER_DIR}/{YYYY-MM-DD}/{SYMBOL}.tcol``), which replay,
+strategy warm-up and analytics read without going through Redis.
+
+Ticks are buffered and written as one block per symbol every
+TICK_RECORDER_FLUSH_INTERVAL seconds (or TICK_RECORDER_FLUSH_TICKS ticks);
+files are fsynced every TICK_RECORDER_FSYNC_INTERVAL seconds, and stream
+entries are only acknowledged after the fsync that made them durable. On
+restart the recorder first re-reads its unacknowledged entries, so a crash
+can at worst duplicate the ticks of the last fsync interval.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import redis.asyncio as redis
+
+sys.path.insert(0, '/app')
+from shared.tick_archive import TickArchiveWriter
+from shared.tick_codec import TickDecodeError, decode_fields
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://trading-redis:6379")
+MARKET_DATA_STREAM_PREFIX = "market_data_stream"
+
+TICK_RECORDER_DIR = os.getenv("TICK_RECORDER_DIR", "/app/data/ticks")
+TICK_RECORDER_COMPRESSION = os.getenv("TICK_RECORDER_COMPRESSION", "none")
+TICK_RECORDER_GROUP = os.getenv("TICK_RECORDER_GROUP", "tick_recorder")
+TICK_RECORDER_CONSUMER = os.getenv("TICK_RECORDER_CONSUMER", "recorder-1")
+TICK_RECORDER_READ_COUNT = int(os.getenv("TICK_RECORDER_READ_COUNT", "1000"))
+TICK_RECORDER_FLUSH_INTERVAL = float(os.getenv("TICK_RECORDER_FLUSH_INTERVAL", "1.0"))
+TICK_RECORDER_FLUSH_TICKS = int(os.getenv("TICK_RECORDER_FLUSH_TICKS", "50000"))
+TICK_RECORDER_FSYNC_INTERVAL = float(os.getenv("TICK_RECORDER_FSYNC_INTERVAL", "5.0"))
+STREAM_DISCOVERY_INTERVAL = float(os.getenv("STREAM_DISCOVERY_INTERVAL", "30"))
+STATS_INTERVAL = float(os.getenv("TICK_RECORDER_STATS_INTERVAL", "60"))
+
+# Naive timestamps in legacy messages are IST wall-clock times
+_IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def _to_ns(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=_IST)
+    return int(value.timestamp() * 1_000_000) * 1000
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def decode_message(fields: Dict) -> Optional[Tuple]:
+    """(symbol, token, exchange_ns, timestamp_ns, ltp, high, low, open, close, bid, ask,
+    change, change_percent, volume) from a compact or legacy stream message"""
+    compact = decode_fields(fields)
+    if compact is not None:
+        return (
+            compact['symbol'], compact['token'],
+            _to_ns(compact['exchange_timestamp']), _to_ns(compact['timestamp']),
+            compact['ltp'], compact['high'], compact['low'], compact['open'], compact['close'],
+            compact['bid'], compact['ask'], compact['change'], compact['change_percent'], compact['volume']
+        )
+
+    legacy = {_text(key): _text(value) for key, value in fields.items()}
+    if 'symbol' not in legacy or 'ltp' not in legacy:
+        return None
+    timestamp_ns = _to_ns(datetime.fromisoformat(legacy['timestamp'].replace('Z', '+00:00'))) \
+        if legacy.get('timestamp') else time.time_ns()
+    exchange_ns = _to_ns(datetime.fromisoformat(legacy['exchange_timestamp'].replace('Z', '+00:00'))) \
+        if legacy.get('exchange_timestamp') else timestamp_ns
+    return (
+        legacy['symbol'], legacy.get('token', ''), exchange_ns, timestamp_ns,
+        float(legacy['ltp']), float(legacy.get('high', 0)), float(legacy.get('low', 0)),
+        float(legacy.get('open', 0)), float(legacy.get('close', 0)),
+        float(legacy.get('bid', 0)), float(legacy.get('ask', 0)),
+        float(legacy.get('change', 0)), float(legacy.get('change_percent', 0)),
+        int(float(legacy.get('volume', 0)))
+    )
+
+
+class TickRecorder:
+    """Consumes every market data stream and appends the ticks to the tick archive"""
+
+    def __init__(self, redis_url: str = REDIS_URL, root: str = TICK_RECORDER_DIR,
+                 compression: str = TICK_RECORDER_COMPRESSION):
+        self.redis_url = redis_url
+        self.redis_client = None
+        self.writer = TickArchiveWriter(root, compression=compression)
+        self.streams: List[str] = []
+        self.running = False
+
+        # Entry ids written but not yet fsynced (acknowledged after the next sync)
+        self._unacked: Dict[str, List] = {}
+        self._last_flush = time.monotonic()
+        self._last_sync = time.monotonic()
+        self._last_discovery = 0.0
+        self._last_stats = time.monotonic()
+
+        # Statistics
+        self.messages_read = 0
+        self.messages_acked = 0
+        self.decode_errors = 0
+
+    async def start(self):
+        """Connect, recover unacknowledged entries, then record until stopped"""
+        logger.info(f"🚀 Starting tick recorder (dir={self.writer.root}, "
+                    f"compression={TICK_RECORDER_COMPRESSION}, group={TICK_RECORDER_GROUP})")
+        self.redis_client = redis.from_url(self.redis_url)
+        await self.redis_client.ping()
+        logger.info("✅ Redis connected")
+
+        self.running = True
+        await self._discover_streams()
+        await self._read_loop(pending=True)
+        await self._read_loop(pending=False)
+
+    async def stop(self):
+        """Write and acknowledge everything read so far"""
+        self.running = False
+
+    async def close(self):
+        try:
+            self.writer.close()
+            await self._ack()
+        finally:
+            if self.redis_client:
+                await self.redis_client.aclose()
+        logger.info(f"✅ Tick recorder stopped: {self.get_stats()}")
+
+    async def _discover_streams(self):
+        """Join the consumer group of streams created since the last scan"""
+        known = set(self.streams)
+        async for key in self.redis_client.scan_iter(match=f"{MARKET_DATA_STREAM_PREFIX}:*", count=1000):
+            stream = _text(key)
+            if stream in known:
+                continue
+            try:
+                # From the start of what Redis still holds
+                await self.redis_client.xgroup_create(stream, TICK_RECORDER_GROUP, id="0")
+            except Exception as e:
+                if "BUSYGROUP" not in str(e):
+                    logger.error(f"❌ Error creating consumer group for {stream}: {e}")
+                    continue
+            self.streams.append(stream)
+            known.add(stream)
+        self._last_discovery = time.monotonic()
+        logger.info(f"📡 Recording {len(self.streams)} streams")
+
+    async def _read_loop(self, pending: bool):
+        """Read new entries (or, with pending, this consumer's unacknowledged ones)"""
+        # Pending entries stay pending until acknowledged, so recovery reads
+        # each stream's history onwards from the last id it returned
+        cursors = {stream: "0" for stream in self.streams} if pending else None
+        while self.running:
+            now = time.monotonic()
+            if not pending and now - self._last_discovery >= STREAM_DISCOVERY_INTERVAL:
+                await self._discover_streams()
+            if pending and not cursors:
+                if self.messages_read:
+                    logger.info(f"♻️ Recovered {self.messages_read} unacknowledged entries")
+                return
+            if not self.streams:
+                await asyncio.sleep(1)
+                continue
+
+            try:
+                response = await self.redis_client.xreadgroup(
+                    TICK_RECORDER_GROUP,
+                    TICK_RECORDER_CONSUMER,
+                    cursors if pending else {stream: ">" for stream in self.streams},
+                    count=TICK_RECORDER_READ_COUNT,
+                    block=None if pending else 1000
+                )
+            except Exception as e:
+                logger.error(f"❌ Error reading streams: {e}")
+                await asyncio.sleep(5)
+                continue
+
+            exhausted = set(cursors) if pending else set()
+            for stream, messages in response or []:
+                stream = _text(stream)
+                if not messages:
+                    continue
+                exhausted.discard(stream)
+                if pending:
+                    cursors[stream] = messages[-1][0]
+                ids = self._unacked.setdefault(stream, [])
+                for message_id, fields in messages:
+                    ids.append(message_id)
+                    try:
+                        values = decode_message(fields)
+                    except (TickDecodeError, ValueError) as e:
+                        self.decode_errors += 1
+                        logger.debug(f"Skipping undecodable entry {message_id} on {stream}: {e}")
+                        continue
+                    if values is not None:
+                        self.writer.append(*values)
+                self.messages_read += len(messages)
+            for stream in exhausted:
+                del cursors[stream]
+
+            await self._maybe_flush()
+
+    async def _maybe_flush(self):
+        now = time.monotonic()
+        if self.writer.pending >= TICK_RECORDER_FLUSH_TICKS or now - self._last_flush >= TICK_RECORDER_FLUSH_INTERVAL:
+            self.writer.flush()
+            self._last_flush = now
+        if now - self._last_sync >= TICK_RECORDER_FSYNC_INTERVAL:
+            self.writer.sync()
+            self._last_sync = now
+            await self._ack()
+        if now - self._last_stats >= STATS_INTERVAL:
+            self._last_stats = now
+            logger.info(f"📊 Tick recorder: {self.get_stats()}")
+
+    async def _ack(self):
+        """Acknowledge entries made durable by the last sync"""
+        unacked, self._unacked = self._unacked, {}
+        if not any(unacked.values()):
+            return
+        pipe = self.redis_client.pipeline(transaction=False)
+        for stream, ids in unacked.items():
+            if ids:
+                pipe.xack(stream, TICK_RECORDER_GROUP, *ids)
+        try:
+            await pipe.execute()
+            self.messages_acked += sum(len(ids) for ids in unacked.values())
+        except Exception as e:
+            # Left pending: re-read (and recorded again) on the next restart
+            logger.error(f"❌ Error acknowledging recorded entries: {e}")
+
+    def get_stats(self) -> Dict:
+        return {
+            "streams": len(self.streams),
+            "messages_read": self.messages_read,
+            "messages_acked": self.messages_acked,
+            "decode_errors": self.decode_errors,
+            **self.writer.get_stats()
+        }
+
+
+async def main():
+    recorder = TickRecorder()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, lambda: asyncio.ensure_future(recorder.stop()))
+    try:
+        await recorder.start()
+    finally:
+        await recorder.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
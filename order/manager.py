@@ -17,6 +17,7 @@ import re
 import json
 from models_clean import Order as DBOrder, UserStrategyConfig
 from shared.database import get_db_session
+from shared.instrument_master import get_instrument_master
 from .mock_broker import MockBroker
 
 load_dotenv()
@@ -99,9 +100,15 @@ class AngelOneBroker:
         self.rate_limiter = RateLimiter(max_calls_per_minute=20)  # Conservative for initialization
         self._last_login_time = 0
         self._session_valid_until = 0
+        # Concurrent orders share one re-login when the session expires
+        self._login_lock = asyncio.Lock()
+        self.instruments = get_instrument_master()
     
     async def initialize(self):
         """Initialize the broker with retry logic"""
+        # Build instrument indexes off the event loop before the first order
+        await asyncio.to_thread(self.instruments.load)
+        
         max_retries = 3
         retry_delay = 30  # Start with 30 seconds
         
@@ -134,7 +141,7 @@ class AngelOneBroker:
         
         # Initialize SmartAPI
         logger.info("🔐 [Broker] Initializing SmartAPI...")
-        self.smart_api = SmartConnect(api_key=self.api_key)
+        smart_api = SmartConnect(api_key=self.api_key)
         
         # Generate TOTP
         logger.info("🔐 [Broker] Generating TOTP...")
@@ -145,8 +152,10 @@ class AngelOneBroker:
         loop = asyncio.get_running_loop()
         self.session = await loop.run_in_executor(
             None, 
-            lambda: self.smart_api.generateSession(self.client_code, self.password, totp)
+            lambda: smart_api.generateSession(self.client_code, self.password, totp)
         )
+        # Swapped in only once logged in, under any orders still in flight
+        self.smart_api = smart_api
         
         # Set session validity (Angel One sessions typically last 24 hours)
         self._last_login_time = time.time()
@@ -154,9 +163,13 @@ class AngelOneBroker:
     
     async def _ensure_session_valid(self):
         """Ensure session is still valid, re-login if needed"""
-        if time.time() > self._session_valid_until:
-            logger.info("🔄 Session expired, re-logging in")
-            await self._initialize_with_rate_limit()
+        if time.time() <= self._session_valid_until:
+            return
+        async with self._login_lock:
+            # Another order may have logged in while this one waited
+            if time.time() > self._session_valid_until:
+                logger.info("🔄 Session expired, re-logging in")
+                await self._initialize_with_rate_limit()
     
     async def place_order(self, order: Order) -> Dict:
         """Place order with Angel One with rate limiting"""
@@ -293,21 +306,13 @@ class AngelOneBroker:
             }
     
     def _get_symbol_token(self, symbol: str) -> str:
-        """Get symbol token for a symbol from CSV configuration"""
-        # Load symbol configurations from CSV
-        if not hasattr(self, '_symbol_configs'):
-            try:
-                from shared.config import ConfigLoader
-                config_loader = ConfigLoader()
-                self._symbol_configs = config_loader.load_symbols()
-                logger.info(f"✅ Loaded {len(self._symbol_configs)} symbol configurations for broker")
-            except Exception as e:
-                logger.error(f"❌ Error loading symbol configurations: {e}")
-                self._symbol_configs = {}
+        """Get symbol token for a symbol ("RELIANCE" or "RELIANCE-EQ") from the instrument master"""
+        if not self.instruments.loaded:
+            self.instruments.load()
         
-        symbol_config = self._symbol_configs.get(symbol)
-        if symbol_config:
-            return symbol_config.token
+        token = self.instruments.get_token(symbol, "NSE")
+        if token:
+            return token
         else:
             logger.error(f"❌ Symbol token not found for {symbol}")
             return ""
@@ -17,6 +17,8 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from shared.models import MarketDataTick
 from shared.timezone import get_ist_now
+from shared.tick_store import TickStore
+from shared.tick_codec import TickDecodeError, decode_fields
 
 logger = logging.getLogger(__name__)
 
@@ -62,9 +64,9 @@ class MockBroker:
         self.filled_orders: Dict[str, Order] = {}
         
         # Market data
-        self.market_data_buffer: Dict[str, List[MarketDataTick]] = {}
-        self.latest_ticks: Dict[str, MarketDataTick] = {}
         self.max_buffer_size = 100
+        self.tick_store = TickStore(capacity=self.max_buffer_size)
+        self.latest_ticks: Dict[str, MarketDataTick] = {}
         
         # Configuration
         self.timeout_seconds = int(os.getenv("MOCK_BROKER_TIMEOUT", "60"))
@@ -133,8 +135,8 @@ class MockBroker:
     
     async def _ensure_symbol_subscription(self, symbol: str):
         """Ensure we're subscribed to market data for this symbol"""
-        if symbol not in self.market_data_buffer:
-            self.market_data_buffer[symbol] = []
+        if symbol not in self.tick_store:
+            self.tick_store.track(symbol)
             logger.info(f"📊 Started tracking market data for {symbol}")
     
     async def _market_data_loop(self):
@@ -144,7 +146,7 @@ class MockBroker:
         while self.running:
             try:
                 # Get symbols we're tracking
-                symbols = list(self.market_data_buffer.keys())
+                symbols = self.tick_store.symbols()
                 if not symbols:
                     await asyncio.sleep(1)
                     continue
@@ -185,31 +187,15 @@ class MockBroker:
     async def _process_market_data_message(self, stream_name: str, message_id: str, fields: Dict):
         """Process a market data message"""
         try:
-            # Convert bytes to strings
-            processed_fields = {}
-            for key, value in fields.items():
-                if isinstance(key, bytes):
-                    key = key.decode()
-                if isinstance(value, bytes):
-                    value = value.decode()
-                processed_fields[key] = value
-            
-            # Parse tick data
-            tick = self._parse_tick_data(processed_fields)
+            # Decode the tick (compact binary or legacy field format)
+            tick = self._decode_message(fields)
             if not tick:
                 return
             
             symbol = tick.symbol
             
-            # Update buffer
-            if symbol not in self.market_data_buffer:
-                self.market_data_buffer[symbol] = []
-            
-            self.market_data_buffer[symbol].append(tick)
-            
-            # Keep buffer size manageable
-            if len(self.market_data_buffer[symbol]) > self.max_buffer_size:
-                self.market_data_buffer[symbol] = self.market_data_buffer[symbol][-self.max_buffer_size:]
+            # Update ring buffer
+            self.tick_store.append(tick)
             
             # Update latest tick
             self.latest_ticks[symbol] = tick
@@ -220,6 +206,26 @@ class MockBroker:
         except Exception as e:
             logger.error(f"❌ Error processing market data message: {e}")
     
+    def _decode_message(self, fields: Dict) -> Optional[MarketDataTick]:
+        """Decode a stream message in the compact binary or the legacy field format"""
+        try:
+            compact = decode_fields(fields)
+        except TickDecodeError as e:
+            logger.error(f"❌ Error decoding compact tick: {e}")
+            return None
+        if compact is not None:
+            return MarketDataTick(**compact)
+        
+        # Legacy format: convert bytes to strings
+        processed_fields = {}
+        for key, value in fields.items():
+            if isinstance(key, bytes):
+                key = key.decode()
+            if isinstance(value, bytes):
+                value = value.decode()
+            processed_fields[key] = value
+        return self._parse_tick_data(processed_fields)
+    
     def _parse_tick_data(self, fields: Dict[str, str]) -> Optional[MarketDataTick]:
         """Parse tick data from Redis fields"""
         try:
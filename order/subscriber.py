@@ -5,6 +5,11 @@ Signal Subscriber - Listens to strategy signals and processes orders
 import asyncio
 import json
 import logging
+import os
+import socket
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
 import redis.asyncio as redis
 from typing import Dict, List, Optional
 from datetime import datetime
@@ -12,17 +17,108 @@ from shared.user_service import UserService
 
 logger = logging.getLogger(__name__)
 
+# "stream" (consumer group on the strategy_signals stream) or "pubsub" (legacy channel)
+SIGNAL_TRANSPORT = os.getenv("SIGNAL_TRANSPORT", "stream")
+SIGNAL_CHANNEL = os.getenv("SIGNAL_CHANNEL", "strategy_signals")
+SIGNAL_CONSUMER_GROUP = os.getenv("SIGNAL_CONSUMER_GROUP", "order_service")
+# Stable across restarts so unacknowledged signals are picked up again
+SIGNAL_CONSUMER_NAME = os.getenv("SIGNAL_CONSUMER_NAME", "") or socket.gethostname()
+SIGNAL_READ_COUNT = int(os.getenv("SIGNAL_READ_COUNT", "100"))
+SIGNAL_BLOCK_MS = int(os.getenv("SIGNAL_BLOCK_MS", "1000"))
+# Signals older than this are acknowledged without placing orders (0 = no limit)
+SIGNAL_MAX_AGE_SECONDS = float(os.getenv("SIGNAL_MAX_AGE_SECONDS", "0"))
+# Orders in flight at once across all users (all go through the order
+# manager's single broker login)
+SIGNAL_FANOUT_CONCURRENCY = int(os.getenv("SIGNAL_FANOUT_CONCURRENCY", "10"))
+# Latencies kept for the percentiles in get_stats
+LATENCY_SAMPLES = 1000
+# Upper bounds (ms) of the latency histogram buckets
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))], 2)
+
+
+class _LatencyHistogram:
+    """Bucketed latency counts plus percentiles over the most recent samples"""
+    
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+        self.total_ms = 0.0
+    
+    def observe(self, value_ms: float):
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, value_ms)] += 1
+        self.samples.append(value_ms)
+        self.total_ms += value_ms
+    
+    def to_dict(self) -> Dict:
+        samples = list(self.samples)
+        count = sum(self.counts)
+        buckets = {f"le_{bound}": n for bound, n in zip(LATENCY_BUCKETS_MS, self.counts)}
+        buckets["le_inf"] = self.counts[-1]
+        return {
+            "count": count,
+            "mean": round(self.total_ms / count, 2) if count else 0.0,
+            "p50": _percentile(samples, 50),
+            "p99": _percentile(samples, 99),
+            "max": round(max(samples), 2) if samples else 0.0,
+            "buckets": buckets
+        }
+
+
 class SignalSubscriber:
-    """Subscribes to strategy signals and processes orders"""
+    """
+    Subscribes to strategy signals and processes orders
+    
+    With the stream transport signals are read from the ``strategy_signals``
+    stream through the SIGNAL_CONSUMER_GROUP consumer group with a blocking
+    XREADGROUP, and acknowledged once their orders were executed. Signals
+    published while the service is down wait in the stream; signals read but
+    not acknowledged before a crash are processed again on restart.
     
-    def __init__(self, redis_url: str = "redis://localhost:6379/2"):
+    A signal's orders are placed concurrently across users, bounded by
+    SIGNAL_FANOUT_CONCURRENCY orders in flight. Every order goes through the
+    order manager's single broker login, so that is the broker concurrency
+    limit. The signals of one read fan out together against one active-user
+    lookup; a per-user lock keeps each user's orders in signal order.
+    """
+    
+    def __init__(self, redis_url: str = "redis://localhost:6379/2", transport: str = SIGNAL_TRANSPORT,
+                 channel: str = SIGNAL_CHANNEL, consumer_group: str = SIGNAL_CONSUMER_GROUP,
+                 consumer_name: str = SIGNAL_CONSUMER_NAME):
+        if transport not in ("stream", "pubsub"):
+            raise ValueError(f"Unknown signal transport {transport} (expected 'stream' or 'pubsub')")
         self.redis_url = redis_url
+        self.transport = transport
+        self.channel = channel
+        self.consumer_group = consumer_group
+        self.consumer_name = consumer_name
         self.redis_client = None
         self.pubsub = None
         self.running = False
         self.order_manager = None
         self.user_service = UserService()
         
+        # Statistics
+        self.signals_received = 0
+        self.signals_stale = 0
+        self.signal_latency = _LatencyHistogram()
+        self.fanout_latency = _LatencyHistogram()
+        self.user_order_latency = _LatencyHistogram()
+        
+        # Fan-out limits and per-user ordering
+        self._fanout_semaphore: Optional[asyncio.Semaphore] = None
+        self._user_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        
     async def initialize(self, order_manager):
         """Initialize the signal subscriber"""
         try:
@@ -31,10 +127,21 @@ class SignalSubscriber:
             await self.redis_client.ping()
             logger.info("✅ Signal subscriber connected to Redis")
             
-            # Initialize pubsub
-            self.pubsub = self.redis_client.pubsub()
-            await self.pubsub.subscribe("strategy_signals")
-            logger.info("✅ Subscribed to strategy_signals channel")
+            if self.transport == "stream":
+                try:
+                    # A new group starts at the end: signals from before the
+                    # service ever ran are not executed
+                    await self.redis_client.xgroup_create(self.channel, self.consumer_group, id="$", mkstream=True)
+                    logger.info(f"✅ Created consumer group {self.consumer_group} on {self.channel} stream")
+                except Exception as e:
+                    if "BUSYGROUP" not in str(e):
+                        raise
+                    logger.info(f"✅ Consumer group {self.consumer_group} already exists on {self.channel} stream")
+            else:
+                # Initialize pubsub
+                self.pubsub = self.redis_client.pubsub()
+                await self.pubsub.subscribe(self.channel)
+                logger.info(f"✅ Subscribed to {self.channel} channel")
             
             # User service is already initialized (no async init needed)
             logger.info("✅ User service ready")
@@ -51,10 +158,15 @@ class SignalSubscriber:
     async def start_listening(self):
         """Start listening for signals"""
         self.running = True
-        logger.info("🚀 Signal subscriber started listening")
+        logger.info(f"🚀 Signal subscriber started listening ({self.transport})")
+        
+        if self.transport == "stream":
+            await self._listen_stream()
+            return
         
         while self.running:
             try:
+                # get_message blocks until a message arrives or the timeout
                 message = await self.pubsub.get_message(
                     ignore_subscribe_messages=True, 
                     timeout=1.0
@@ -63,7 +175,49 @@ class SignalSubscriber:
                 if message and message["type"] == "message":
                     await self._process_signal(message["data"])
                 
-                await asyncio.sleep(0.1)
+            except Exception as e:
+                logger.error(f"❌ Error in signal subscriber loop: {e}")
+                await asyncio.sleep(1)
+    
+    async def _listen_stream(self):
+        """Read signals through the consumer group, own unacknowledged ones first"""
+        # Pending entries stay pending until acknowledged, so recovery reads
+        # onwards from the last id returned until nothing is left
+        cursor = "0"
+        while self.running:
+            try:
+                response = await self.redis_client.xreadgroup(
+                    self.consumer_group,
+                    self.consumer_name,
+                    {self.channel: cursor or ">"},
+                    count=SIGNAL_READ_COUNT,
+                    block=None if cursor else SIGNAL_BLOCK_MS
+                )
+                entries = response[0][1] if response else []
+                if cursor:
+                    if not entries:
+                        cursor = None
+                        continue
+                    cursor = entries[-1][0]
+                    logger.info(f"♻️ Processing {len(entries)} unacknowledged signals")
+                
+                # Signals of one read fan out together against one user
+                # lookup; acknowledged once all are done
+                processed = []
+                signals = []
+                for entry_id, fields in entries:
+                    # Entries trimmed from the stream come back without fields
+                    if fields:
+                        parsed = self._parse_signal(fields.get(b"data") or fields.get("data"), entry_id)
+                        if parsed:
+                            signals.append(parsed)
+                    processed.append(entry_id)
+                if signals:
+                    active_users = await self._get_active_users()
+                    await asyncio.gather(*(self._fan_out_signal(signal, published_ms, active_users)
+                                           for signal, published_ms in signals))
+                if processed:
+                    await self.redis_client.xack(self.channel, self.consumer_group, *processed)
                 
             except Exception as e:
                 logger.error(f"❌ Error in signal subscriber loop: {e}")
@@ -74,21 +228,54 @@ class SignalSubscriber:
         self.running = False
         logger.info("🛑 Signal subscriber stopped listening")
     
-    async def _process_signal(self, signal_data: bytes):
-        """Process a received signal"""
+    async def _process_signal(self, signal_data: bytes, entry_id=None):
+        """Process a received signal (entry_id: its stream entry, whose id carries the publish time)"""
+        parsed = self._parse_signal(signal_data, entry_id)
+        if parsed:
+            signal, published_ms = parsed
+            await self._fan_out_signal(signal, published_ms, await self._get_active_users())
+    
+    def _parse_signal(self, signal_data: bytes, entry_id=None) -> Optional[tuple]:
+        """(signal, publish time in ms or None), or None for bad or stale signals"""
         try:
-            signal = json.loads(signal_data.decode())
+            signal = json.loads(_text(signal_data))
             logger.info(f"📥 Received signal: {signal['symbol']} {signal['signal_type']}")
+            self.signals_received += 1
             
-            # Get active users (mock for now)
-            active_users = await self._get_active_users()
-            
-            # Process signal for each user
-            for user in active_users:
-                await self._process_signal_for_user(signal, user)
-                
+            published_ms = int(_text(entry_id).split('-')[0]) if entry_id is not None else None
+            if published_ms and SIGNAL_MAX_AGE_SECONDS:
+                age = time.time() - published_ms / 1000
+                if age > SIGNAL_MAX_AGE_SECONDS:
+                    self.signals_stale += 1
+                    logger.warning(f"⚠️ Skipping {signal['symbol']} signal published {age:.0f}s ago")
+                    return None
+            return signal, published_ms
         except Exception as e:
             logger.error(f"❌ Error processing signal: {e}")
+            return None
+    
+    async def _fan_out_signal(self, signal: Dict, published_ms: Optional[int], active_users: List[Dict]):
+        """Process signal for all users concurrently"""
+        # No await before the gather: the per-user tasks of signals gathered
+        # together are created, and queue on the user locks, in signal order
+        started = time.perf_counter()
+        await asyncio.gather(*(self._fan_out(signal, user, started) for user in active_users))
+        self.fanout_latency.observe((time.perf_counter() - started) * 1000)
+        
+        if published_ms:
+            self.signal_latency.observe(time.time() * 1000 - published_ms)
+    
+    async def _fan_out(self, signal: Dict, user: Dict, started: float):
+        """Place one user's order within the user and overall limits"""
+        if self._fanout_semaphore is None:
+            self._fanout_semaphore = asyncio.Semaphore(SIGNAL_FANOUT_CONCURRENCY)
+        
+        # The user lock is taken first: locks are FIFO, so a user's orders
+        # keep the order their signals arrived in
+        async with self._user_locks[str(user.get("user_id") or user.get("id"))]:
+            async with self._fanout_semaphore:
+                await self._process_signal_for_user(signal, user)
+        self.user_order_latency.observe((time.perf_counter() - started) * 1000)
     
     async def _process_signal_for_user(self, signal: Dict, user: Dict):
         """Process signal for a specific user"""
@@ -129,10 +316,28 @@ class SignalSubscriber:
             # Fallback to empty list if user service fails
             return []
     
+    def get_stats(self) -> Dict:
+        """
+        Signals processed and latency histograms (ms): signal-to-order (publish
+        to the signal's last order), fan-out (first to last order of a signal)
+        and per-user order (fan-out start to that user's order)
+        """
+        return {
+            "transport": self.transport,
+            "consumer_group": self.consumer_group if self.transport == "stream" else None,
+            "consumer_name": self.consumer_name if self.transport == "stream" else None,
+            "signals_received": self.signals_received,
+            "signals_stale": self.signals_stale,
+            "fanout_concurrency": SIGNAL_FANOUT_CONCURRENCY,
+            "latency_ms": self.signal_latency.to_dict(),
+            "fanout_latency_ms": self.fanout_latency.to_dict(),
+            "user_order_latency_ms": self.user_order_latency.to_dict()
+        }
+    
     async def close(self):
         """Close the signal subscriber"""
         if self.pubsub:
-            await self.pubsub.unsubscribe("strategy_signals")
+            await self.pubsub.unsubscribe(self.channel)
         if self.redis_client:
             await self.redis_client.close()
         # User service doesn't need async close
@@ -3,13 +3,13 @@ Configuration loader for dynamic symbol and strategy management
 """
 
 import csv
-import json
 import os
 import logging
 from typing import Dict, List, Optional
 from dataclasses import dataclass
 from models_clean import Strategy, StrategyConfig as DBStrategyConfig
 from shared.database import get_db_session
+from shared.instrument_master import get_instrument_master
 
 logger = logging.getLogger(__name__)
 
@@ -41,23 +41,9 @@ class ConfigLoader:
     def load_symbols(self) -> Dict[str, SymbolConfig]:
         """Load symbol configurations from instruments_latest.json and filter by symbols_to_trade.csv"""
         try:
-            # Load instruments data from JSON
-            instruments_data = {}
-            try:
-                with open("data/instruments_latest.json", "r") as f:
-                    instruments = json.load(f)
-                    for inst in instruments:
-                        symbol = inst.get("symbol")
-                        token = inst.get("token")
-                        if symbol and token:
-                            instruments_data[symbol] = {
-                                "token": token,
-                                "exchange": inst.get("exch_seg", "NSE"),
-                                "lot_size": int(float(inst.get("lotsize", 1)))
-                            }
-                logger.info(f"✅ Loaded {len(instruments_data)} instruments from instruments_latest.json")
-            except Exception as e:
-                logger.error(f"❌ Error loading instruments: {e}")
+            # Load instruments data (shared, indexed instrument master)
+            instruments = get_instrument_master()
+            if not instruments.load():
                 return {}
             
             # Load symbols to trade from CSV
@@ -79,18 +65,18 @@ class ConfigLoader:
             
             # Create symbol configs for symbols that exist in both JSON and CSV
             for symbol in symbols_to_trade:
-                if symbol in instruments_data:
-                    inst_data = instruments_data[symbol]
+                instrument = instruments.get(symbol, "NSE")
+                if instrument:
                     symbol_config = SymbolConfig(
                         symbol=symbol,
-                        token=inst_data["token"],
-                        exchange=inst_data["exchange"],
-                        lot_size=inst_data["lot_size"],
+                        token=instrument.token,
+                        exchange=instrument.exchange,
+                        lot_size=instrument.lot_size,
                         min_quantity=1,
                         enabled=True
                     )
                     self.symbols[symbol] = symbol_config
-                    logger.info(f"✅ Added symbol: {symbol} (token: {inst_data['token']})")
+                    logger.info(f"✅ Added symbol: {symbol} (token: {instrument.token})")
                 else:
                     logger.warning(f"⚠️ Symbol {symbol} not found in instruments data")
             
@@ -0,0 +1,230 @@
+"""
+Instrument master: token <-> symbol lookups for Angel One instruments
+
+Loads the Angel One scrip master (``instruments_latest.json``) once per
+process into hash indexes keyed by exchange segment (``exch_seg``), so the
+market data streamer, the broker and the API can resolve tokens and symbols
+in O(1). Parsing the full JSON takes seconds, so the built indexes are cached
+next to it as a pickle and reused while the JSON is unchanged.
+"""
+
+import json
+import logging
+import os
+import pickle
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INSTRUMENT_FILES = ("data/instruments_latest.json", "/app/data/instruments_latest.json")
+CACHE_SUFFIX = ".index.pickle"
+CACHE_VERSION = 1
+
+# SmartWebSocketV2 exchangeType per exchange segment
+EXCHANGE_TYPES = {
+    "NSE": 1,   # NSE cash
+    "NFO": 2,   # NSE F&O
+    "BSE": 3,   # BSE cash
+    "BFO": 4,   # BSE F&O
+    "MCX": 5,   # MCX
+    "NCDEX": 7,
+    "CDS": 13,  # Currency derivatives
+}
+
+
+class Instrument(NamedTuple):
+    token: str
+    symbol: str  # Trading symbol, e.g. "RELIANCE-EQ"
+    name: str  # Underlying name, e.g. "RELIANCE"
+    exchange: str  # Exchange segment, e.g. "NSE"
+    lot_size: int
+    tick_size: float  # In rupees
+    instrument_type: str
+    expiry: str
+
+    @property
+    def exchange_type(self) -> Optional[int]:
+        return EXCHANGE_TYPES.get(self.exchange)
+
+
+def _to_float(value, default: float = 0.0) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class InstrumentMaster:
+    """Per-exchange token/symbol indexes over the instrument master file"""
+
+    def __init__(self, instruments_file: Optional[str] = None, cache_file: Optional[str] = None):
+        self.instruments_file = instruments_file or os.getenv("INSTRUMENTS_FILE") or self._find_default_file()
+        self.cache_file = cache_file or os.getenv("INSTRUMENTS_CACHE_FILE") or (self.instruments_file + CACHE_SUFFIX)
+        self.loaded = False
+        self.loaded_from_cache = False
+        self._by_token: Dict[str, Dict[str, Instrument]] = {}
+        self._by_symbol: Dict[str, Dict[str, Instrument]] = {}
+        self._by_name: Dict[str, Dict[str, Instrument]] = {}  # Cash equity names, e.g. RELIANCE -> RELIANCE-EQ
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _find_default_file() -> str:
+        for path in DEFAULT_INSTRUMENT_FILES:
+            if os.path.exists(path):
+                return path
+        return DEFAULT_INSTRUMENT_FILES[0]
+
+    def load(self, force: bool = False) -> bool:
+        """Build the indexes (from the cache when it is up to date); safe to call repeatedly"""
+        with self._lock:
+            if self.loaded and not force:
+                return True
+            try:
+                stat = os.stat(self.instruments_file)
+            except OSError as e:
+                logger.error(f"❌ Instrument master file not available: {e}")
+                return False
+
+            fingerprint = (CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+            if not force and self._load_cache(fingerprint):
+                self.loaded = True
+                self.loaded_from_cache = True
+                logger.info(f"✅ Loaded {self.count()} instruments from cache {self.cache_file}")
+                return True
+
+            try:
+                with open(self.instruments_file, "r") as f:
+                    instruments = json.load(f)
+            except Exception as e:
+                logger.error(f"❌ Error loading instruments: {e}")
+                return False
+
+            self._build(instruments)
+            self.loaded = True
+            self.loaded_from_cache = False
+            logger.info(f"✅ Loaded {self.count()} instruments from {self.instruments_file}")
+            self._save_cache(fingerprint)
+            return True
+
+    def _build(self, instruments: Iterable[Dict]):
+        by_token: Dict[str, Dict[str, Instrument]] = {}
+        by_symbol: Dict[str, Dict[str, Instrument]] = {}
+        by_name: Dict[str, Dict[str, Instrument]] = {}
+
+        for inst in instruments:
+            token = inst.get("token")
+            symbol = inst.get("symbol")
+            if not token or not symbol:
+                continue
+            exchange = inst.get("exch_seg", "NSE")
+            instrument = Instrument(
+                token=str(token),
+                symbol=symbol,
+                name=inst.get("name", ""),
+                exchange=exchange,
+                lot_size=int(_to_float(inst.get("lotsize"), 1)),
+                tick_size=_to_float(inst.get("tick_size")) / 100,  # Scrip master quotes paise
+                instrument_type=inst.get("instrumenttype", ""),
+                expiry=inst.get("expiry", "")
+            )
+            by_token.setdefault(exchange, {})[instrument.token] = instrument
+            by_symbol.setdefault(exchange, {})[symbol] = instrument
+            if symbol.endswith("-EQ") and instrument.name:
+                by_name.setdefault(exchange, {})[instrument.name] = instrument
+
+        self._by_token = by_token
+        self._by_symbol = by_symbol
+        self._by_name = by_name
+
+    def _load_cache(self, fingerprint) -> bool:
+        try:
+            with open(self.cache_file, "rb") as f:
+                cached = pickle.load(f)
+            if cached.get("fingerprint") != fingerprint:
+                return False
+            self._by_token = cached["by_token"]
+            self._by_symbol = cached["by_symbol"]
+            self._by_name = cached["by_name"]
+            return True
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"⚠️ Ignoring unreadable instrument cache {self.cache_file}: {e}")
+            return False
+
+    def _save_cache(self, fingerprint):
+        try:
+            tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, "wb") as f:
+                pickle.dump({
+                    "fingerprint": fingerprint,
+                    "by_token": self._by_token,
+                    "by_symbol": self._by_symbol,
+                    "by_name": self._by_name
+                }, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not write instrument cache {self.cache_file}: {e}")
+
+    def get(self, symbol: str, exchange: str = "NSE") -> Optional[Instrument]:
+        """Look up by trading symbol ("RELIANCE-EQ") or cash equity name ("RELIANCE")"""
+        instrument = self._by_symbol.get(exchange, {}).get(symbol)
+        if instrument is None:
+            instrument = self._by_name.get(exchange, {}).get(symbol)
+        return instrument
+
+    def get_by_token(self, token: str, exchange: str = "NSE") -> Optional[Instrument]:
+        return self._by_token.get(exchange, {}).get(str(token))
+
+    def get_token(self, symbol: str, exchange: str = "NSE") -> Optional[str]:
+        instrument = self.get(symbol, exchange)
+        return instrument.token if instrument else None
+
+    def get_symbol(self, token: str, exchange: str = "NSE") -> Optional[str]:
+        instrument = self.get_by_token(token, exchange)
+        return instrument.symbol if instrument else None
+
+    def search(self, query: str, exchange: Optional[str] = None, limit: int = 20) -> List[Instrument]:
+        """Instruments whose symbol or name starts with the query (case-insensitive)"""
+        query = query.upper()
+        exchanges = [exchange] if exchange else list(self._by_symbol)
+        results = []
+        for exch in exchanges:
+            for symbol, instrument in self._by_symbol.get(exch, {}).items():
+                if symbol.upper().startswith(query) or instrument.name.upper().startswith(query):
+                    results.append(instrument)
+                    if len(results) >= limit:
+                        return results
+        return results
+
+    def exchanges(self) -> List[str]:
+        return list(self._by_symbol)
+
+    def count(self, exchange: Optional[str] = None) -> int:
+        if exchange:
+            return len(self._by_token.get(exchange, {}))
+        return sum(len(index) for index in self._by_token.values())
+
+    def get_stats(self) -> Dict:
+        return {
+            "loaded": self.loaded,
+            "loaded_from_cache": self.loaded_from_cache,
+            "instruments_file": self.instruments_file,
+            "instruments": self.count(),
+            "exchanges": {exchange: self.count(exchange) for exchange in self.exchanges()}
+        }
+
+
+_instrument_master: Optional[InstrumentMaster] = None
+_instrument_master_lock = threading.Lock()
+
+
+def get_instrument_master() -> InstrumentMaster:
+    """Process-wide instrument master (indexes are built on first ``load()``)"""
+    global _instrument_master
+    if _instrument_master is None:
+        with _instrument_master_lock:
+            if _instrument_master is None:
+                _instrument_master = InstrumentMaster()
+    return _instrument_master
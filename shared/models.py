@@ -5,7 +5,7 @@ Shared models for the trading system
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 class SignalType(Enum):
     BUY = "BUY"
@@ -72,6 +72,25 @@ class MarketData:
     ask: float
     timestamp: datetime
 
+@dataclass
+class MarketDataTick:
+    """Market data tick from Redis Stream"""
+    symbol: str
+    token: str
+    ltp: float  # Last traded price
+    change: float
+    change_percent: float
+    high: float
+    low: float
+    volume: int
+    bid: float
+    ask: float
+    open: float
+    close: float
+    timestamp: datetime
+    exchange_timestamp: datetime
+    raw_data: Dict[str, Any] = field(default_factory=dict)
+
 @dataclass
 class User:
     """User structure"""
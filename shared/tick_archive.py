@@ -0,0 +1,520 @@
+"""
+Columnar tick archive - per-day, per-symbol tick files
+
+Layout: ``{root}/{YYYY-MM-DD}/{SYMBOL}.tcol``, where the day is the IST date of
+the exchange timestamp. A file is a short header (symbol, token) followed by
+appended blocks. Each block holds the ticks of one writer flush as contiguous
+columns (``ARCHIVE_COLUMNS``, 8 bytes per value), optionally compressed with
+zstd or lz4. Block headers carry the row count, the min/max exchange
+timestamp and a CRC32 of the payload, so readers skip blocks outside a time
+range and a torn block at the end of a file (the writer died mid-append) is
+ignored by readers and truncated by the next writer.
+
+Readers memory-map files: uncompressed columns are zero-copy NumPy views of
+the mapping, compressed blocks are only decompressed when they overlap the
+requested range. The writer needs neither NumPy nor a compression library
+unless compression is enabled.
+"""
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # Only the reader needs NumPy
+    np = None
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+try:
+    import lz4.frame
+    LZ4_AVAILABLE = True
+except ImportError:
+    LZ4_AVAILABLE = False
+
+ARCHIVE_EXTENSION = ".tcol"
+
+# Column order within a block; timestamps are epoch nanoseconds
+ARCHIVE_COLUMNS = (
+    'exchange_timestamp', 'timestamp', 'ltp', 'high', 'low', 'open', 'close',
+    'bid', 'ask', 'change', 'change_percent', 'volume'
+)
+_INT_COLUMNS = ('exchange_timestamp', 'timestamp', 'volume')
+_TYPECODES = tuple('q' if name in _INT_COLUMNS else 'd' for name in ARCHIVE_COLUMNS)
+_NUMPY_DTYPES = {'d': '<f8', 'q': '<i8'}
+_ROW_SIZE = 8 * len(ARCHIVE_COLUMNS)
+
+_FILE_MAGIC = b'TCOL'
+_BLOCK_MAGIC = b'TBLK'
+ARCHIVE_VERSION = 1
+
+# magic, version, symbol length, token length
+_FILE_HEADER = struct.Struct('<4sBHH')
+# magic, codec, rows, raw size, stored size, min/max exchange ns, crc32 of stored payload
+_BLOCK_HEADER = struct.Struct('<4sBxxxIIIqqI')
+
+CODEC_NONE = 0
+CODEC_ZSTD = 1
+CODEC_LZ4 = 2
+_CODECS = {'none': CODEC_NONE, '': CODEC_NONE, 'zstd': CODEC_ZSTD, 'lz4': CODEC_LZ4}
+
+# IST has no DST, so a fixed offset is equivalent and much cheaper than pytz
+_IST = timezone(timedelta(hours=5, minutes=30))
+_DAY_NS = 86400 * 1_000_000_000
+
+ARCHIVE_MAX_OPEN_FILES = int(os.getenv('ARCHIVE_MAX_OPEN_FILES', '512'))
+
+TimeArg = Union[None, int, datetime]
+
+
+class ArchiveFormatError(ValueError):
+    """Raised for files that are not tick archives"""
+
+
+def to_ns(value: TimeArg) -> Optional[int]:
+    """Epoch nanoseconds from a datetime (naive is taken as IST) or an int"""
+    if value is None or isinstance(value, int):
+        return value
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=_IST)
+    return int(value.timestamp() * 1_000_000) * 1000
+
+
+def day_of(ns: int) -> str:
+    """IST trading day (YYYY-MM-DD) of an epoch-ns timestamp"""
+    return datetime.fromtimestamp(ns / 1e9, _IST).date().isoformat()
+
+
+def _day_bounds(day: str) -> Tuple[int, int]:
+    start = datetime.combine(date.fromisoformat(day), datetime.min.time(), _IST)
+    start_ns = int(start.timestamp()) * 1_000_000_000
+    return start_ns, start_ns + _DAY_NS
+
+
+def _codec_id(compression: str) -> int:
+    codec = _CODECS.get((compression or '').lower())
+    if codec is None:
+        raise ValueError(f"Unknown archive compression {compression!r} (expected none, zstd or lz4)")
+    if codec == CODEC_ZSTD and not ZSTD_AVAILABLE:
+        raise ValueError("zstd compression needs the zstandard package")
+    if codec == CODEC_LZ4 and not LZ4_AVAILABLE:
+        raise ValueError("lz4 compression needs the lz4 package")
+    return codec
+
+
+def _compress(codec: int, raw: bytes) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    if codec == CODEC_LZ4:
+        return lz4.frame.compress(raw)
+    return raw
+
+
+def _decompress(codec: int, stored, raw_size: int) -> bytes:
+    if codec == CODEC_ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise ArchiveFormatError("Archive block is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(stored, max_output_size=raw_size)
+    if codec == CODEC_LZ4:
+        if not LZ4_AVAILABLE:
+            raise ArchiveFormatError("Archive block is lz4-compressed but lz4 is not installed")
+        return lz4.frame.decompress(stored)
+    raise ArchiveFormatError(f"Unknown archive codec {codec}")
+
+
+def _read_file_header(data, path: str) -> Tuple[str, str, int]:
+    """(symbol, token, header size) from the start of a file"""
+    if len(data) < _FILE_HEADER.size:
+        raise ArchiveFormatError(f"{path}: truncated header")
+    magic, version, symbol_len, token_len = _FILE_HEADER.unpack_from(data, 0)
+    if magic != _FILE_MAGIC or version != ARCHIVE_VERSION:
+        raise ArchiveFormatError(f"{path}: not a tick archive (version {version})")
+    offset = _FILE_HEADER.size
+    end = offset + symbol_len + token_len
+    if len(data) < end:
+        raise ArchiveFormatError(f"{path}: truncated header")
+    symbol = bytes(data[offset:offset + symbol_len]).decode()
+    token = bytes(data[offset + symbol_len:end]).decode()
+    return symbol, token, end
+
+
+class _Block:
+    __slots__ = ('offset', 'codec', 'rows', 'raw_size', 'stored_size', 'min_ns', 'max_ns', 'crc')
+
+    def __init__(self, offset, codec, rows, raw_size, stored_size, min_ns, max_ns, crc):
+        self.offset = offset  # Of the payload
+        self.codec = codec
+        self.rows = rows
+        self.raw_size = raw_size
+        self.stored_size = stored_size
+        self.min_ns = min_ns
+        self.max_ns = max_ns
+        self.crc = crc
+
+
+def _scan_blocks(data, offset: int, verify: bool = False) -> Tuple[List[_Block], int]:
+    """Complete blocks from offset on, and where the valid data ends"""
+    blocks = []
+    size = len(data)
+    while offset + _BLOCK_HEADER.size <= size:
+        magic, codec, rows, raw_size, stored_size, min_ns, max_ns, crc = _BLOCK_HEADER.unpack_from(data, offset)
+        payload = offset + _BLOCK_HEADER.size
+        if magic != _BLOCK_MAGIC or raw_size != rows * _ROW_SIZE or payload + stored_size > size:
+            break
+        if verify and zlib.crc32(data[payload:payload + stored_size]) != crc:
+            break
+        blocks.append(_Block(payload, codec, rows, raw_size, stored_size, min_ns, max_ns, crc))
+        offset = payload + stored_size
+    return blocks, offset
+
+
+class _ColumnBuffer:
+    """Ticks of one symbol and day waiting for the next flush"""
+    __slots__ = ('token', 'columns')
+
+    def __init__(self, token: str):
+        self.token = token
+        self.columns = [array(code) for code in _TYPECODES]
+
+    def __len__(self):
+        return len(self.columns[0])
+
+
+class TickArchiveWriter:
+    """Buffers ticks per (day, symbol) and appends them to archive files as blocks"""
+
+    def __init__(self, root: str, compression: str = 'none',
+                 max_open_files: int = ARCHIVE_MAX_OPEN_FILES):
+        """
+        Args:
+            root: Archive directory (day directories are created under it)
+            compression: none, zstd or lz4 (per block)
+            max_open_files: Least recently written files beyond this are closed
+        """
+        self.root = root
+        self.codec = _codec_id(compression)
+        self.max_open_files = max(1, max_open_files)
+        self._buffers: Dict[Tuple[str, str], _ColumnBuffer] = {}
+        self._files: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._unsynced = set()
+        self._day_range: Dict[str, Tuple[int, int, str]] = {}  # symbol -> (start_ns, end_ns, day)
+
+        # Statistics
+        self.pending = 0
+        self.ticks_written = 0
+        self.blocks_written = 0
+        self.bytes_written = 0
+        self.syncs = 0
+
+    def append(self, symbol: str, token: str, exchange_ns: int, timestamp_ns: int,
+               ltp: float, high: float, low: float, open_price: float, close: float,
+               bid: float, ask: float, change: float, change_percent: float, volume: int):
+        """Buffer one tick (written on the next flush)"""
+        day_range = self._day_range.get(symbol)
+        if day_range is None or not day_range[0] <= exchange_ns < day_range[1]:
+            day = day_of(exchange_ns)
+            day_range = _day_bounds(day) + (day,)
+            self._day_range[symbol] = day_range
+        key = (day_range[2], symbol)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = _ColumnBuffer(token)
+        (c_exchange, c_timestamp, c_ltp, c_high, c_low, c_open, c_close,
+         c_bid, c_ask, c_change, c_change_percent, c_volume) = buffer.columns
+        c_exchange.append(exchange_ns)
+        c_timestamp.append(timestamp_ns)
+        c_ltp.append(ltp)
+        c_high.append(high)
+        c_low.append(low)
+        c_open.append(open_price)
+        c_close.append(close)
+        c_bid.append(bid)
+        c_ask.append(ask)
+        c_change.append(change)
+        c_change_percent.append(change_percent)
+        c_volume.append(volume)
+        self.pending += 1
+
+    def flush(self) -> int:
+        """Append one block per buffered (day, symbol); returns the ticks written"""
+        buffers, self._buffers = self._buffers, {}
+        written = 0
+        for key, buffer in buffers.items():
+            if not len(buffer):
+                continue
+            raw = b''.join(column.tobytes() for column in buffer.columns)
+            timestamps = buffer.columns[0]
+            stored = _compress(self.codec, raw) if self.codec != CODEC_NONE else raw
+            header = _BLOCK_HEADER.pack(
+                _BLOCK_MAGIC, self.codec, len(buffer), len(raw), len(stored),
+                min(timestamps), max(timestamps), zlib.crc32(stored)
+            )
+            f = self._file(key, buffer.token)
+            f.write(header)
+            f.write(stored)
+            self._unsynced.add(key)
+            written += len(buffer)
+            self.blocks_written += 1
+            self.bytes_written += len(header) + len(stored)
+        self.pending = 0
+        self.ticks_written += written
+        return written
+
+    def sync(self):
+        """Flush buffered ticks and fsync every file written since the last sync"""
+        self.flush()
+        for key in self._unsynced:
+            f = self._files.get(key)
+            if f is not None:
+                f.flush()
+                os.fsync(f.fileno())
+        self._unsynced.clear()
+        self.syncs += 1
+
+    def close(self):
+        """Sync and close every file"""
+        self.sync()
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+    def path(self, day: str, symbol: str) -> str:
+        return os.path.join(self.root, day, f"{symbol}{ARCHIVE_EXTENSION}")
+
+    def _file(self, key: Tuple[str, str], token: str):
+        f = self._files.get(key)
+        if f is not None:
+            self._files.move_to_end(key)
+            return f
+
+        day, symbol = key
+        path = self.path(day, symbol)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            f = open(path, 'r+b')
+            self._truncate_torn_tail(f, path)
+        else:
+            f = open(path, 'wb')
+            symbol_bytes, token_bytes = symbol.encode(), str(token).encode()
+            f.write(_FILE_HEADER.pack(_FILE_MAGIC, ARCHIVE_VERSION, len(symbol_bytes), len(token_bytes)))
+            f.write(symbol_bytes + token_bytes)
+
+        self._files[key] = f
+        while len(self._files) > self.max_open_files:
+            old_key, old_file = self._files.popitem(last=False)
+            old_file.flush()
+            if old_key in self._unsynced:
+                os.fsync(old_file.fileno())
+                self._unsynced.discard(old_key)
+            old_file.close()
+        return f
+
+    @staticmethod
+    def _truncate_torn_tail(f, path: str):
+        """Drop a partially written block left by a crash, then seek to the end"""
+        data = f.read()
+        _, _, header_size = _read_file_header(data, path)
+        _, valid_end = _scan_blocks(data, header_size, verify=True)
+        if valid_end < len(data):
+            f.truncate(valid_end)
+        f.seek(valid_end)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "pending": self.pending,
+            "ticks_written": self.ticks_written,
+            "blocks_written": self.blocks_written,
+            "bytes_written": self.bytes_written,
+            "open_files": len(self._files),
+            "syncs": self.syncs
+        }
+
+
+class TickFile:
+    """Memory-mapped reader for one archive file"""
+
+    def __init__(self, path: str):
+        if np is None:
+            raise RuntimeError("Reading tick archives needs NumPy")
+        self.path = path
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        if self.size == 0:
+            self._file.close()
+            raise ArchiveFormatError(f"{path}: empty file")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.symbol, self.token, header_size = _read_file_header(self._map, path)
+        self.blocks, _ = _scan_blocks(self._map, header_size)
+
+    def __len__(self):
+        return sum(block.rows for block in self.blocks)
+
+    @property
+    def time_range(self) -> Optional[Tuple[int, int]]:
+        """(min, max) exchange timestamp in epoch ns, None if empty"""
+        if not self.blocks:
+            return None
+        return min(b.min_ns for b in self.blocks), max(b.max_ns for b in self.blocks)
+
+    def _block_columns(self, block: _Block) -> Dict[str, Any]:
+        stored = memoryview(self._map)[block.offset:block.offset + block.stored_size]
+        if zlib.crc32(stored) != block.crc:
+            raise ArchiveFormatError(f"{self.path}: checksum mismatch in block at byte {block.offset}")
+        raw = stored if block.codec == CODEC_NONE else _decompress(block.codec, stored, block.raw_size)
+        columns = {}
+        for index, (name, code) in enumerate(zip(ARCHIVE_COLUMNS, _TYPECODES)):
+            columns[name] = np.frombuffer(raw, dtype=_NUMPY_DTYPES[code], count=block.rows,
+                                          offset=index * block.rows * 8)
+        return columns
+
+    def read(self, start: TimeArg = None, end: TimeArg = None) -> Dict[str, Any]:
+        """
+        Columns of the ticks with start <= exchange_timestamp < end
+
+        Returns {column: NumPy array} in file order. Arrays of a single
+        uncompressed block are read-only views of the mapping, valid until
+        ``close()``.
+        """
+        start_ns, end_ns = to_ns(start), to_ns(end)
+        parts = []
+        for block in self.blocks:
+            if (start_ns is not None and block.max_ns < start_ns) or (end_ns is not None and block.min_ns >= end_ns):
+                continue
+            columns = self._block_columns(block)
+            if (start_ns is not None and block.min_ns < start_ns) or (end_ns is not None and block.max_ns >= end_ns):
+                timestamps = columns['exchange_timestamp']
+                mask = np.ones(block.rows, dtype=bool)
+                if start_ns is not None:
+                    mask &= timestamps >= start_ns
+                if end_ns is not None:
+                    mask &= timestamps < end_ns
+                columns = {name: values[mask] for name, values in columns.items()}
+            parts.append(columns)
+        return _concat(parts)
+
+    def close(self):
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # Arrays returned by read() still reference the mapping; it closes with them
+        self._file.close()
+
+
+def _concat(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    if len(parts) == 1:
+        return parts[0]
+    if not parts:
+        return {name: np.empty(0, dtype=_NUMPY_DTYPES[code]) for name, code in zip(ARCHIVE_COLUMNS, _TYPECODES)}
+    return {name: np.concatenate([part[name] for part in parts]) for name in ARCHIVE_COLUMNS}
+
+
+class TickArchive:
+    """Reads ticks by symbol and time range from an archive directory"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._files: Dict[str, TickFile] = {}
+
+    def days(self) -> List[str]:
+        """Recorded days, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        days = []
+        for name in os.listdir(self.root):
+            try:
+                date.fromisoformat(name)
+            except ValueError:
+                continue
+            days.append(name)
+        return sorted(days)
+
+    def symbols(self, day: str) -> List[str]:
+        """Symbols recorded on a day"""
+        directory = os.path.join(self.root, day)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-len(ARCHIVE_EXTENSION)] for name in os.listdir(directory)
+                      if name.endswith(ARCHIVE_EXTENSION))
+
+    def open(self, day: str, symbol: str) -> Optional[TickFile]:
+        """Reader for one day file (reopened if the file grew), None if missing"""
+        path = os.path.join(self.root, day, f"{symbol}{ARCHIVE_EXTENSION}")
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return None
+        tick_file = self._files.get(path)
+        if tick_file is not None and tick_file.size == size:
+            return tick_file
+        if tick_file is not None:
+            tick_file.close()
+        try:
+            tick_file = TickFile(path)
+        except ArchiveFormatError:
+            self._files.pop(path, None)
+            return None
+        self._files[path] = tick_file
+        return tick_file
+
+    def read(self, symbol: str, start: TimeArg = None, end: TimeArg = None) -> Dict[str, Any]:
+        """Columns of a symbol's ticks with start <= exchange_timestamp < end, across days"""
+        start_ns, end_ns = to_ns(start), to_ns(end)
+        first_day = day_of(start_ns) if start_ns is not None else None
+        last_day = day_of(end_ns - 1) if end_ns is not None else None
+        parts = []
+        for day in self.days():
+            if (first_day and day < first_day) or (last_day and day > last_day):
+                continue
+            tick_file = self.open(day, symbol)
+            if tick_file is not None:
+                parts.append(tick_file.read(start_ns, end_ns))
+        return _concat(parts)
+
+    def ticks(self, symbol: str, start: TimeArg = None, end: TimeArg = None) -> Iterator[Dict[str, Any]]:
+        """MarketDataTick keyword arguments for a symbol's ticks in a time range"""
+        columns = self.read(symbol, start, end)
+        token = ''
+        for day in reversed(self.days()):
+            tick_file = self.open(day, symbol)
+            if tick_file is not None:
+                token = tick_file.token
+                break
+        yield from iter_ticks(symbol, token, columns)
+
+    def close(self):
+        for tick_file in self._files.values():
+            tick_file.close()
+        self._files.clear()
+
+
+def iter_ticks(symbol: str, token: str, columns: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """MarketDataTick keyword arguments from archive columns"""
+    values = [columns[name].tolist() for name in ARCHIVE_COLUMNS]
+    fromtimestamp = datetime.fromtimestamp
+    for (exchange_ns, timestamp_ns, ltp, high, low, open_price, close,
+         bid, ask, change, change_percent, volume) in zip(*values):
+        yield {
+            'symbol': symbol,
+            'token': token,
+            'ltp': ltp,
+            'change': change,
+            'change_percent': change_percent,
+            'high': high,
+            'low': low,
+            'volume': volume,
+            'bid': bid,
+            'ask': ask,
+            'open': open_price,
+            'close': close,
+            'timestamp': fromtimestamp(timestamp_ns / 1e9, _IST),
+            'exchange_timestamp': fromtimestamp(exchange_ns / 1e9, _IST),
+        }
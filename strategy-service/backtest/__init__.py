@@ -0,0 +1,25 @@
+"""
+Backtesting Package
+
+Replays recorded market data through unmodified strategies, without Redis:
+- BacktestEngine: Feeds ticks or bars to strategies and collects results
+- SimulatedBroker: Order matching (MockBroker rules) and PnL accounting
+- replay: Time-ordered records from CSV, parquet and binary tick files
+- run_sweep: Parallel grid/random parameter sweeps over a strategy
+"""
+
+from .engine import BacktestEngine
+from .broker import SimulatedBroker
+from .data import replay, read_file, write_binary
+from .sweep import grid_space, random_space, run_sweep
+
+__all__ = [
+    'BacktestEngine',
+    'SimulatedBroker',
+    'replay',
+    'read_file',
+    'write_binary',
+    'grid_space',
+    'random_space',
+    'run_sweep'
+]
@@ -0,0 +1,132 @@
+"""
+Backtest command line
+
+Replays recorded data through strategies loaded like the strategy host does
+(strategy_configs rows from ``--configs``, ``STRATEGY_CONFIGS_FILE`` or the
+database) or through a single ``--strategy module:Class``.
+
+Usage (from strategy-service/):
+    python -m backtest --data recordings/2025-01-15 --configs strategy_configs.json
+    python -m backtest --data bars.csv --data-interval 1m \\
+        --strategy strategies.rsi_dmi_strategy.strategy:RSIDMIStrategy \\
+        --symbols RELIANCE,TCS --bar-interval 1m --parameters '{"capital": 100000}' \\
+        --output results.json --signals signals.csv
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.models import StrategyConfig
+from strategy_host import StrategyConfigSource, load_strategy_class
+from backtest.broker import MOCK_BROKER_TIMEOUT, SimulatedBroker
+from backtest.data import replay
+from backtest.engine import BacktestEngine
+
+logger = logging.getLogger("backtest")
+
+
+def _strategy_rows(args) -> List[Dict[str, Any]]:
+    if args.strategy:
+        module_path, _, class_name = args.strategy.partition(':')
+        if not class_name or not args.symbols:
+            raise SystemExit("--strategy needs module:Class and --symbols")
+        return [{
+            "id": args.strategy_id or class_name,
+            "module_path": module_path,
+            "class_name": class_name,
+            "config_json": {
+                "symbols": args.symbols.split(','),
+                "parameters": json.loads(args.parameters),
+                "bar_interval": args.bar_interval
+            }
+        }]
+    return asyncio.run(StrategyConfigSource(config_file=args.configs).fetch())
+
+
+def _build(engine: BacktestEngine, row: Dict[str, Any], symbols_filter) -> bool:
+    config_json = row.get('config_json') or {}
+    if isinstance(config_json, str):
+        config_json = json.loads(config_json)
+    symbols = [symbol for symbol in config_json.get('symbols') or []
+               if symbols_filter is None or symbol in symbols_filter]
+    if not symbols:
+        return False
+    config = StrategyConfig(
+        strategy_id=config_json.get('strategy_id') or row.get('strategy_id') or row.get('name') or str(row['id']),
+        symbols=symbols,
+        parameters=config_json.get('parameters', {}),
+        bar_interval=config_json.get('bar_interval')
+    )
+    engine.add_strategy(load_strategy_class(row['module_path'], row['class_name']), config)
+    return True
+
+
+def _write_signals(path: str, log: List[Dict[str, Any]]):
+    if path.endswith('.json'):
+        with open(path, 'w') as f:
+            json.dump(log, f, indent=2)
+        return
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(log[0].keys()) if log else ["timestamp"])
+        writer.writeheader()
+        writer.writerows(log)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded market data through strategies")
+    parser.add_argument('--data', nargs='+', required=True, help='Data files or directories (.csv, .parquet, .ticks, .tcol)')
+    parser.add_argument('--data-interval', help='Interval of bar files without an interval column (e.g. 1m)')
+    parser.add_argument('--configs', help='JSON file of strategy_configs rows (default: STRATEGY_CONFIGS_FILE or the database)')
+    parser.add_argument('--strategy', help='Single strategy as module.path:ClassName')
+    parser.add_argument('--strategy-id', help='strategy_id for --strategy')
+    parser.add_argument('--symbols', help='Comma-separated symbols (required with --strategy, else a filter)')
+    parser.add_argument('--parameters', default='{}', help='JSON parameters for --strategy')
+    parser.add_argument('--bar-interval', help='Bar interval --strategy runs on (default: every tick)')
+    parser.add_argument('--timeout', type=float, default=MOCK_BROKER_TIMEOUT, help='Order timeout in replay seconds')
+    parser.add_argument('--no-quote-fallback', action='store_true',
+                        help='Never fill on ticks without bid/ask (MockBroker behaviour)')
+    parser.add_argument('--output', help='Write results JSON here (default: stdout)')
+    parser.add_argument('--signals', help='Write the signal log here (.csv or .json)')
+    parser.add_argument('--log-level', default='WARNING', help='Logging level (strategies log every signal at INFO)')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper(), logging.WARNING),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    engine = BacktestEngine(SimulatedBroker(args.timeout, quote_fallback=not args.no_quote_fallback))
+    symbols_filter = set(args.symbols.split(',')) if args.symbols and not args.strategy else None
+    for row in _strategy_rows(args):
+        try:
+            _build(engine, row, symbols_filter)
+        except Exception as e:
+            logger.error(f"❌ Failed to load strategy {row.get('id')} ({row.get('class_name')}): {e}")
+    if not engine.strategies:
+        raise SystemExit("No strategies to backtest")
+
+    symbols = set()
+    for strategy in engine.strategies.values():
+        symbols.update(strategy.symbols)
+    results = asyncio.run(engine.run(replay(args.data, args.data_interval, symbols)))
+
+    if args.signals:
+        _write_signals(args.signals, engine.signal_log())
+    report = json.dumps(results, indent=2, default=str)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report)
+        print(f"✅ Backtest results written to {args.output}", file=sys.stderr)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
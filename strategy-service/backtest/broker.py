@@ -0,0 +1,218 @@
+"""
+Simulated order matching and position accounting for backtests
+
+Orders follow the MockBroker rules (``order/mock_broker.py``): an order is
+placed at the signal price and fills in full, at the quote, on the first tick
+where a BUY's ask is at or below the price (a SELL's bid at or above it).
+Unfilled orders are rejected once ``MOCK_BROKER_TIMEOUT`` seconds of replay
+time have passed. Matching happens on the tick that produced the signal and
+on every later tick for the symbol, so there is no polling delay.
+
+Fills are booked per (strategy, symbol) with an average-price position:
+realized PnL on the closed quantity, unrealized PnL marked to the symbol's
+last traded price.
+"""
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared.models import MarketDataTick, SignalType, TradingSignal
+
+MOCK_BROKER_TIMEOUT = int(os.getenv("MOCK_BROKER_TIMEOUT", "60"))
+
+PLACED = "PLACED"
+FILLED = "FILLED"
+REJECTED = "REJECTED"
+
+
+@dataclass
+class SimulatedOrder:
+    """An order placed for a signal"""
+    order_id: int
+    strategy_id: str
+    symbol: str
+    side: str  # BUY or SELL
+    quantity: int
+    price: float
+    placed_at: datetime
+    timeout_at: datetime
+    status: str = PLACED
+    filled_price: float = 0.0
+    filled_at: Optional[datetime] = None
+    error_message: Optional[str] = None
+
+
+@dataclass
+class Position:
+    """Net position of one strategy in one symbol"""
+    quantity: int = 0  # Signed: negative is short
+    avg_price: float = 0.0
+    realized_pnl: float = 0.0
+    round_trips: int = 0  # Fills that reduced or closed the position
+    winning_trades: int = 0
+    turnover: float = 0.0
+
+    def apply_fill(self, side: str, quantity: int, price: float):
+        signed = quantity if side == SignalType.BUY.value else -quantity
+        self.turnover += quantity * price
+        if self.quantity == 0 or (self.quantity > 0) == (signed > 0):
+            total = abs(self.quantity) + quantity
+            self.avg_price = (self.avg_price * abs(self.quantity) + price * quantity) / total
+            self.quantity += signed
+            return
+
+        closed = min(abs(self.quantity), quantity)
+        pnl = closed * (price - self.avg_price) * (1 if self.quantity > 0 else -1)
+        self.realized_pnl += pnl
+        self.round_trips += 1
+        if pnl > 0:
+            self.winning_trades += 1
+        self.quantity += signed
+        if self.quantity == 0:
+            self.avg_price = 0.0
+        elif abs(signed) > closed:
+            # Flipped through flat: the remainder opens at the fill price
+            self.avg_price = price
+
+    def unrealized_pnl(self, last_price: float) -> float:
+        if not self.quantity or last_price <= 0:
+            return 0.0
+        return self.quantity * (last_price - self.avg_price)
+
+
+class SimulatedBroker:
+    """Matches backtest orders against replayed ticks with the MockBroker rules"""
+
+    def __init__(self, timeout_seconds: float = MOCK_BROKER_TIMEOUT, quote_fallback: bool = True):
+        """
+        Args:
+            timeout_seconds: Replay seconds before an unfilled order is rejected
+            quote_fallback: Use the last traded price as bid/ask when a tick
+                carries no quote (bars and trade-only recordings); without it
+                such ticks never fill, as in MockBroker
+        """
+        self.timeout = timedelta(seconds=timeout_seconds)
+        self.quote_fallback = quote_fallback
+        self.orders: List[SimulatedOrder] = []
+        self._orders_by_strategy: Dict[str, List[SimulatedOrder]] = {}
+        self._pending: Dict[str, List[SimulatedOrder]] = {}
+        self._quotes: Dict[str, MarketDataTick] = {}
+        self.last_prices: Dict[str, float] = {}
+        self.positions: Dict[Tuple[str, str], Position] = {}
+
+    def place(self, signal: TradingSignal, now: datetime) -> Optional[SimulatedOrder]:
+        """Place an order for a BUY/SELL signal and try to fill it on the current quote"""
+        if signal.signal_type not in (SignalType.BUY, SignalType.SELL):
+            return None
+        order = SimulatedOrder(
+            order_id=len(self.orders) + 1,
+            strategy_id=signal.strategy_id,
+            symbol=signal.symbol,
+            side=signal.signal_type.value,
+            quantity=int(signal.quantity),
+            price=float(signal.price),
+            placed_at=now,
+            timeout_at=now + self.timeout
+        )
+        self.orders.append(order)
+        self._orders_by_strategy.setdefault(order.strategy_id, []).append(order)
+        if order.quantity <= 0:
+            order.status = REJECTED
+            order.error_message = "Invalid quantity"
+            return order
+
+        quote = self._quotes.get(order.symbol)
+        if not (quote and self._try_fill(order, quote)):
+            self._pending.setdefault(order.symbol, []).append(order)
+        return order
+
+    def on_tick(self, tick: MarketDataTick):
+        """Record the symbol's quote and match its pending orders against it"""
+        self._quotes[tick.symbol] = tick
+        self.last_prices[tick.symbol] = tick.ltp
+        pending = self._pending.get(tick.symbol)
+        if not pending:
+            return
+        now = tick.exchange_timestamp
+        remaining = []
+        for order in pending:
+            if now > order.timeout_at:
+                order.status = REJECTED
+                order.error_message = "Order timeout"
+            elif not self._try_fill(order, tick):
+                remaining.append(order)
+        self._pending[tick.symbol] = remaining
+
+    def expire(self, now: datetime):
+        """Reject pending orders whose timeout has passed (end of replay)"""
+        for symbol, pending in self._pending.items():
+            remaining = []
+            for order in pending:
+                if now > order.timeout_at:
+                    order.status = REJECTED
+                    order.error_message = "Order timeout"
+                else:
+                    remaining.append(order)
+            self._pending[symbol] = remaining
+
+    def _try_fill(self, order: SimulatedOrder, tick: MarketDataTick) -> bool:
+        bid, ask = tick.bid, tick.ask
+        if self.quote_fallback:
+            bid = bid if bid > 0 else tick.ltp
+            ask = ask if ask > 0 else tick.ltp
+
+        if order.side == SignalType.BUY.value:
+            fill_price = ask if 0 < ask <= order.price else None
+        else:
+            fill_price = bid if bid > 0 and bid >= order.price else None
+        if fill_price is None:
+            return False
+
+        order.status = FILLED
+        order.filled_price = fill_price
+        order.filled_at = tick.exchange_timestamp
+        key = (order.strategy_id, order.symbol)
+        position = self.positions.get(key)
+        if position is None:
+            position = self.positions[key] = Position()
+        position.apply_fill(order.side, order.quantity, fill_price)
+        return True
+
+    def strategy_results(self, strategy_id: str) -> Dict[str, Any]:
+        """Orders, PnL and open positions of one strategy"""
+        orders = self._orders_by_strategy.get(strategy_id, [])
+        positions = {}
+        realized = unrealized = turnover = 0.0
+        round_trips = winning = 0
+        for (owner, symbol), position in self.positions.items():
+            if owner != strategy_id:
+                continue
+            last_price = self.last_prices.get(symbol, 0.0)
+            open_pnl = position.unrealized_pnl(last_price)
+            realized += position.realized_pnl
+            unrealized += open_pnl
+            turnover += position.turnover
+            round_trips += position.round_trips
+            winning += position.winning_trades
+            positions[symbol] = {
+                "quantity": position.quantity,
+                "avg_price": round(position.avg_price, 4),
+                "last_price": last_price,
+                "realized_pnl": round(position.realized_pnl, 2),
+                "unrealized_pnl": round(open_pnl, 2)
+            }
+        return {
+            "orders": len(orders),
+            "orders_filled": sum(1 for order in orders if order.status == FILLED),
+            "orders_rejected": sum(1 for order in orders if order.status == REJECTED),
+            "orders_open": sum(1 for order in orders if order.status == PLACED),
+            "realized_pnl": round(realized, 2),
+            "unrealized_pnl": round(unrealized, 2),
+            "total_pnl": round(realized + unrealized, 2),
+            "round_trips": round_trips,
+            "winning_trades": winning,
+            "win_rate": round(winning / round_trips, 4) if round_trips else 0.0,
+            "turnover": round(turnover, 2),
+            "positions": positions
+        }
@@ -0,0 +1,253 @@
+"""
+Recorded market data sources for backtests
+
+Each loader yields ``MarketDataTick`` or ``Bar`` records from one file, in
+file order; ``replay`` merges several files into one time-ordered stream
+(ticks by exchange timestamp, bars by their close time). Files must each be
+in time order.
+
+Supported files:
+
+- ``.csv``: one row per tick (``symbol``, ``ltp``, ``exchange_timestamp`` or
+  ``timestamp``, optional ``bid``, ``ask``, ``high``, ``low``, ``volume``, ...)
+  or per bar (``symbol``, ``open``, ``high``, ``low``, ``close``, ``start`` or
+  ``timestamp``, optional ``volume``, ``interval``)
+- ``.parquet``: the same columns (needs pyarrow)
+- ``.ticks``: compact binary ticks (the stream encoding from
+  ``shared.tick_codec``), each prefixed with its length as a uint32
+- ``.tcol``: tick recorder day files (``shared.tick_archive``)
+
+Timestamps are ISO strings (naive ones are taken as IST) or epoch numbers in
+seconds, milliseconds, microseconds or nanoseconds.
+"""
+import csv
+import heapq
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from shared.models import Bar, MarketDataTick
+from shared.tick_archive import ARCHIVE_EXTENSION, TickFile, iter_ticks
+from shared.tick_codec import TickDecodeError, decode_tick, encode_tick
+from base.bar_builder import parse_interval
+
+try:
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+Record = Union[MarketDataTick, Bar]
+
+_LENGTH = struct.Struct('<I')
+
+# IST has no DST, so a fixed offset is equivalent and much cheaper than pytz
+# (and, unlike a pytz zone, safe to pass to replace(tzinfo=...))
+IST = timezone(timedelta(hours=5, minutes=30))
+
+DATA_EXTENSIONS = ('.csv', '.parquet', '.pq', '.ticks', '.bin', ARCHIVE_EXTENSION)
+
+# Rows read from parquet at a time
+PARQUET_BATCH_SIZE = 65536
+
+
+class DataFormatError(ValueError):
+    """Raised for files that can't be read as ticks or bars"""
+
+
+def parse_timestamp(value: Any) -> datetime:
+    """ISO string or epoch number (s/ms/us/ns) to an IST-aware datetime"""
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=IST)
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        text = str(value).strip()
+        try:
+            number = float(text)
+        except ValueError:
+            parsed = datetime.fromisoformat(text)
+            return parsed if parsed.tzinfo else parsed.replace(tzinfo=IST)
+    magnitude = abs(number)
+    if magnitude >= 1e17:
+        number /= 1e9
+    elif magnitude >= 1e14:
+        number /= 1e6
+    elif magnitude >= 1e11:
+        number /= 1e3
+    return datetime.fromtimestamp(number, IST)
+
+
+def event_time(record: Record) -> datetime:
+    """When a record becomes visible: a tick's exchange time, a bar's close"""
+    return record.end if isinstance(record, Bar) else record.exchange_timestamp
+
+
+def _number(row: Dict[str, Any], name: str, default: float = 0.0) -> float:
+    value = row.get(name)
+    if value is None or value == '':
+        return default
+    return float(value)
+
+
+def row_to_tick(row: Dict[str, Any]) -> MarketDataTick:
+    """Build a tick from a CSV/parquet row"""
+    ltp = _number(row, 'ltp') if row.get('ltp') not in (None, '') else _number(row, 'price')
+    exchange_time = row.get('exchange_timestamp') or row.get('timestamp')
+    if exchange_time in (None, ''):
+        raise DataFormatError("tick row has no exchange_timestamp/timestamp")
+    exchange_timestamp = parse_timestamp(exchange_time)
+    timestamp = parse_timestamp(row['timestamp']) if row.get('timestamp') not in (None, '') else exchange_timestamp
+    return MarketDataTick(
+        symbol=str(row['symbol']),
+        token=str(row.get('token') or ''),
+        ltp=ltp,
+        change=_number(row, 'change'),
+        change_percent=_number(row, 'change_percent'),
+        high=_number(row, 'high', ltp),
+        low=_number(row, 'low', ltp),
+        volume=int(_number(row, 'volume')),
+        bid=_number(row, 'bid'),
+        ask=_number(row, 'ask'),
+        open=_number(row, 'open', ltp),
+        close=_number(row, 'close', ltp),
+        timestamp=timestamp,
+        exchange_timestamp=exchange_timestamp
+    )
+
+
+def row_to_bar(row: Dict[str, Any], interval: Optional[str] = None) -> Bar:
+    """Build a bar from a CSV/parquet row (interval from the row, else the argument)"""
+    interval = row.get('interval') or interval
+    if not interval:
+        raise DataFormatError("bar row has no interval (add an interval column or pass bar_interval)")
+    start_value = row.get('start') or row.get('timestamp')
+    if start_value in (None, ''):
+        raise DataFormatError("bar row has no start/timestamp")
+    start = parse_timestamp(start_value)
+    end = parse_timestamp(row['end']) if row.get('end') not in (None, '') else start + timedelta(seconds=parse_interval(interval))
+    return Bar(
+        symbol=str(row['symbol']),
+        interval=str(interval),
+        start=start,
+        end=end,
+        open=_number(row, 'open'),
+        high=_number(row, 'high'),
+        low=_number(row, 'low'),
+        close=_number(row, 'close'),
+        volume=int(_number(row, 'volume')),
+        tick_count=int(_number(row, 'tick_count'))
+    )
+
+
+def _is_bar_columns(columns: Iterable[str]) -> bool:
+    columns = set(columns)
+    if 'symbol' not in columns:
+        raise DataFormatError(f"no symbol column (columns: {sorted(columns)})")
+    return 'ltp' not in columns and 'price' not in columns and {'open', 'high', 'low', 'close'} <= columns
+
+
+def read_csv(path: str, bar_interval: Optional[str] = None) -> Iterator[Record]:
+    """Ticks or bars from a CSV file with a header row"""
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        is_bars = _is_bar_columns(reader.fieldnames or [])
+        for row in reader:
+            yield row_to_bar(row, bar_interval) if is_bars else row_to_tick(row)
+
+
+def read_parquet(path: str, bar_interval: Optional[str] = None) -> Iterator[Record]:
+    """Ticks or bars from a parquet file (same columns as CSV)"""
+    if not PARQUET_AVAILABLE:
+        raise DataFormatError(f"pyarrow is required to read {path}")
+    parquet_file = pq.ParquetFile(path)
+    is_bars = _is_bar_columns(parquet_file.schema_arrow.names)
+    for batch in parquet_file.iter_batches(batch_size=PARQUET_BATCH_SIZE):
+        for row in batch.to_pylist():
+            yield row_to_bar(row, bar_interval) if is_bars else row_to_tick(row)
+
+
+def read_binary(path: str) -> Iterator[MarketDataTick]:
+    """Ticks from a file of length-prefixed compact tick payloads"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    offset = 0
+    size = len(data)
+    while offset < size:
+        if offset + _LENGTH.size > size:
+            raise DataFormatError(f"{path}: truncated length prefix at byte {offset}")
+        length, = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        payload = data[offset:offset + length]
+        if len(payload) < length:
+            raise DataFormatError(f"{path}: truncated tick at byte {offset}")
+        offset += length
+        try:
+            yield MarketDataTick(**decode_tick(payload))
+        except TickDecodeError as e:
+            raise DataFormatError(f"{path}: {e}")
+
+
+def read_archive(path: str) -> Iterator[MarketDataTick]:
+    """Ticks from a tick recorder day file, in recorded order"""
+    tick_file = TickFile(path)
+    try:
+        for fields in iter_ticks(tick_file.symbol, tick_file.token, tick_file.read()):
+            yield MarketDataTick(**fields)
+    finally:
+        tick_file.close()
+
+
+def write_binary(path: str, ticks: Iterable[MarketDataTick]) -> int:
+    """Write ticks in the ``.ticks`` format; returns the number written"""
+    count = 0
+    with open(path, 'wb') as f:
+        for tick in ticks:
+            payload = encode_tick(
+                tick.symbol, tick.token, tick.ltp, tick.change, tick.change_percent,
+                tick.high, tick.low, tick.volume, tick.bid, tick.ask, tick.open, tick.close,
+                int(tick.timestamp.timestamp() * 1e9), int(tick.exchange_timestamp.timestamp() * 1e9)
+            )
+            f.write(_LENGTH.pack(len(payload)))
+            f.write(payload)
+            count += 1
+    return count
+
+
+def read_file(path: str, bar_interval: Optional[str] = None) -> Iterator[Record]:
+    """Ticks or bars from one file, by extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return read_csv(path, bar_interval)
+    if extension in ('.parquet', '.pq'):
+        return read_parquet(path, bar_interval)
+    if extension in ('.ticks', '.bin'):
+        return read_binary(path)
+    if extension == ARCHIVE_EXTENSION:
+        return read_archive(path)
+    raise DataFormatError(f"Unsupported data file {path} (expected .csv, .parquet, .ticks or .tcol)")
+
+
+def expand_paths(paths: Iterable[str]) -> List[str]:
+    """Files named directly, plus the data files inside named directories"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in sorted(names)
+                             if os.path.splitext(name)[1].lower() in DATA_EXTENSIONS)
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def replay(paths: Iterable[str], bar_interval: Optional[str] = None,
+           symbols: Optional[Iterable[str]] = None) -> Iterator[Record]:
+    """Merge files into one time-ordered record stream (optionally only some symbols)"""
+    sources = [read_file(path, bar_interval) for path in expand_paths(paths)]
+    merged = heapq.merge(*sources, key=event_time) if len(sources) > 1 else iter(sources[0] if sources else [])
+    if symbols is None:
+        return merged
+    wanted = set(symbols)
+    return (record for record in merged if record.symbol in wanted)
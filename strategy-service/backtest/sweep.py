@@ -0,0 +1,267 @@
+"""
+Parameter sweep - backtests one strategy over a grid or random sample of parameters
+
+A sweep expands a parameter space into runs (every combination for ``grid``,
+``samples`` draws for ``random``), splits them into batches and replays the
+data once per batch in a ``ProcessPoolExecutor`` worker. All runs of a batch
+are strategy instances in one ``BacktestEngine``, so data decoding, tick
+buffers, bar building and every indicator that doesn't depend on a swept
+parameter are computed once per batch (through the shared ``IndicatorCache``
+and ``IndicatorRegistry``); only the strategy's decision logic runs per
+parameter set. Batches are independent, so throughput scales with workers up
+to the core count.
+
+Parameter spaces are JSON objects mapping a parameter name (dotted for nested
+ones, e.g. ``indicator_params.rsi_period``) to either a list of values or a
+range ``{"low": 20, "high": 40, "step": 5}``. Grid sweeps need a step for
+ranges; random sweeps draw uniformly from a range (integers if low and high
+are integers) and pick from a list.
+
+Usage (from strategy-service/):
+    python -m backtest.sweep --data recordings/2025-01-15 \\
+        --strategy strategies.rsi_dmi_strategy.strategy:RSIDMIStrategy \\
+        --symbols RELIANCE,TCS --bar-interval 1m \\
+        --space '{"entry_rsi_UL": {"low": 55, "high": 80, "step": 5}, "di_UL": [20, 25, 30]}' \\
+        --output sweep.csv
+"""
+import argparse
+import asyncio
+import copy
+import csv
+import itertools
+import json
+import logging
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.models import StrategyConfig
+from strategy_host import load_strategy_class
+from backtest.broker import MOCK_BROKER_TIMEOUT, SimulatedBroker
+from backtest.data import replay
+from backtest.engine import BacktestEngine
+
+logger = logging.getLogger("backtest.sweep")
+
+# Per-run metrics copied into the results table
+METRICS = [
+    "total_pnl", "realized_pnl", "unrealized_pnl", "signals", "orders", "orders_filled",
+    "orders_rejected", "round_trips", "winning_trades", "win_rate", "turnover", "errors"
+]
+
+
+def _range_values(name: str, spec: Dict[str, Any]) -> List[Any]:
+    low, high, step = spec["low"], spec["high"], spec.get("step")
+    if not step or step <= 0:
+        raise ValueError(f"Grid range for {name} needs a positive step")
+    count = int(math.floor((high - low) / step + 1e-9)) + 1
+    values = [low + i * step for i in range(count)]
+    if all(isinstance(v, int) for v in (low, high, step)):
+        return values
+    return [round(v, 10) for v in values]
+
+
+def grid_space(space: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Every combination of the space's values"""
+    names = list(space)
+    axes = []
+    for name in names:
+        spec = space[name]
+        axes.append(_range_values(name, spec) if isinstance(spec, dict) else list(spec))
+    return [dict(zip(names, values)) for values in itertools.product(*axes)]
+
+
+def random_space(space: Dict[str, Any], samples: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """samples parameter sets drawn from the space (repeatable with a seed)"""
+    rng = random.Random(seed)
+    runs = []
+    for _ in range(samples):
+        params = {}
+        for name, spec in space.items():
+            if isinstance(spec, dict):
+                low, high = spec["low"], spec["high"]
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = rng.randint(low, high)
+                else:
+                    params[name] = round(rng.uniform(low, high), 6)
+            else:
+                params[name] = rng.choice(list(spec))
+        runs.append(params)
+    return runs
+
+
+def apply_parameters(base: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """base parameters with overrides applied (dotted names set nested keys)"""
+    parameters = copy.deepcopy(base)
+    for name, value in overrides.items():
+        target = parameters
+        *parents, key = name.split('.')
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[key] = value
+    return parameters
+
+
+def run_batch(data: List[str], data_interval: Optional[str], strategy: str, strategy_id: str,
+              symbols: List[str], bar_interval: Optional[str], base_parameters: Dict[str, Any],
+              runs: List[Tuple[int, Dict[str, Any]]], timeout: float, quote_fallback: bool,
+              log_level: int = logging.ERROR) -> List[Dict[str, Any]]:
+    """Worker entry point: replay the data once through one strategy instance per run"""
+    logging.getLogger().setLevel(log_level)
+    module_path, _, class_name = strategy.partition(':')
+    strategy_class = load_strategy_class(module_path, class_name)
+
+    engine = BacktestEngine(SimulatedBroker(timeout, quote_fallback=quote_fallback))
+    for run_id, overrides in runs:
+        engine.add_strategy(strategy_class, StrategyConfig(
+            strategy_id=f"{strategy_id}#{run_id}",
+            symbols=symbols,
+            parameters=apply_parameters(base_parameters, overrides),
+            bar_interval=bar_interval
+        ))
+    results = asyncio.run(engine.run(replay(data, data_interval, symbols)))
+
+    rows = []
+    for run_id, overrides in runs:
+        result = results["strategies"][f"{strategy_id}#{run_id}"]
+        rows.append({
+            "run": run_id,
+            "parameters": overrides,
+            **{metric: result[metric] for metric in METRICS},
+            "batch_seconds": results["elapsed_seconds"],
+            "batch_runs": len(runs)
+        })
+    return rows
+
+
+def run_sweep(data: List[str], strategy: str, symbols: List[str], runs: List[Dict[str, Any]],
+              base_parameters: Optional[Dict[str, Any]] = None, bar_interval: Optional[str] = None,
+              data_interval: Optional[str] = None, strategy_id: Optional[str] = None,
+              workers: Optional[int] = None, batch_size: Optional[int] = None,
+              timeout: float = MOCK_BROKER_TIMEOUT, quote_fallback: bool = True,
+              rank_by: str = "total_pnl", log_level: int = logging.ERROR) -> List[Dict[str, Any]]:
+    """
+    Backtest every parameter set in runs and return result rows, best first
+
+    Args:
+        workers: Worker processes (default: CPU count, capped at the number of batches)
+        batch_size: Runs replayed together in one worker (default: the runs
+            split evenly across workers, which shares the most indicator work)
+        rank_by: Metric to sort by, descending
+    """
+    if not runs:
+        return []
+    if rank_by not in METRICS:
+        raise ValueError(f"Unknown metric {rank_by} (expected one of {', '.join(METRICS)})")
+    workers = max(1, workers or os.cpu_count() or 1)
+    batch_size = max(1, batch_size or math.ceil(len(runs) / workers))
+    indexed = list(enumerate(runs, start=1))
+    batches = [indexed[i:i + batch_size] for i in range(0, len(indexed), batch_size)]
+    strategy_id = strategy_id or strategy.partition(':')[2]
+    base_parameters = base_parameters or {}
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=min(workers, len(batches))) as executor:
+        futures = [
+            executor.submit(run_batch, data, data_interval, strategy, strategy_id, symbols,
+                            bar_interval, base_parameters, batch, timeout, quote_fallback, log_level)
+            for batch in batches
+        ]
+        for future in as_completed(futures):
+            batch_rows = future.result()
+            rows.extend(batch_rows)
+            logger.info(f"✅ Finished {len(rows)}/{len(runs)} runs")
+
+    rows.sort(key=lambda row: (-row[rank_by], row["run"]))
+    for rank, row in enumerate(rows, start=1):
+        row["rank"] = rank
+    return rows
+
+
+def write_table(path: str, rows: List[Dict[str, Any]]):
+    """Ranked results as CSV (one column per swept parameter) or JSON"""
+    if path.endswith('.json'):
+        with open(path, 'w') as f:
+            json.dump(rows, f, indent=2)
+        return
+    names = list(rows[0]["parameters"]) if rows else []
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["rank", "run"] + names + METRICS)
+        for row in rows:
+            writer.writerow([row["rank"], row["run"]]
+                            + [row["parameters"][name] for name in names]
+                            + [row[metric] for metric in METRICS])
+
+
+def _print_top(rows: List[Dict[str, Any]], top: int, rank_by: str):
+    for row in rows[:top]:
+        params = ", ".join(f"{name}={value}" for name, value in row["parameters"].items())
+        print(f"#{row['rank']:<4} {rank_by}={row[rank_by]:<14} signals={row['signals']:<6} "
+              f"win_rate={row['win_rate']:<7} {params}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest a strategy over a grid or random sample of parameters")
+    parser.add_argument('--data', nargs='+', required=True, help='Data files or directories (.csv, .parquet, .ticks, .tcol)')
+    parser.add_argument('--data-interval', help='Interval of bar files without an interval column (e.g. 1m)')
+    parser.add_argument('--strategy', required=True, help='Strategy as module.path:ClassName')
+    parser.add_argument('--strategy-id', help='strategy_id prefix (default: the class name)')
+    parser.add_argument('--symbols', required=True, help='Comma-separated symbols')
+    parser.add_argument('--bar-interval', help='Bar interval the strategy runs on (default: every tick)')
+    parser.add_argument('--parameters', default='{}', help='JSON parameters shared by every run')
+    parser.add_argument('--space', required=True, help='JSON parameter space, or a path to a JSON file')
+    parser.add_argument('--mode', choices=['grid', 'random'], default='grid', help='Search mode')
+    parser.add_argument('--samples', type=int, default=50, help='Parameter sets to draw in random mode')
+    parser.add_argument('--seed', type=int, help='Random seed for random mode')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--batch-size', type=int, help='Runs replayed together per worker task')
+    parser.add_argument('--rank-by', default='total_pnl', choices=METRICS, help='Metric to rank runs by')
+    parser.add_argument('--timeout', type=float, default=MOCK_BROKER_TIMEOUT, help='Order timeout in replay seconds')
+    parser.add_argument('--no-quote-fallback', action='store_true',
+                        help='Never fill on ticks without bid/ask (MockBroker behaviour)')
+    parser.add_argument('--output', help='Write the ranked table here (.csv or .json)')
+    parser.add_argument('--top', type=int, default=10, help='Runs to print')
+    parser.add_argument('--log-level', default='ERROR', help='Logging level inside workers')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    space_text = args.space
+    if os.path.isfile(space_text):
+        with open(space_text) as f:
+            space_text = f.read()
+    space = json.loads(space_text)
+    runs = grid_space(space) if args.mode == 'grid' else random_space(space, args.samples, args.seed)
+    logger.info(f"🔎 Sweeping {len(runs)} parameter sets ({args.mode})")
+
+    started = time.perf_counter()
+    rows = run_sweep(
+        args.data, args.strategy, args.symbols.split(','), runs,
+        base_parameters=json.loads(args.parameters),
+        bar_interval=args.bar_interval,
+        data_interval=args.data_interval,
+        strategy_id=args.strategy_id,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        timeout=args.timeout,
+        quote_fallback=not args.no_quote_fallback,
+        rank_by=args.rank_by,
+        log_level=getattr(logging, args.log_level.upper(), logging.ERROR)
+    )
+    logger.info(f"✅ {len(rows)} runs in {time.perf_counter() - started:.1f}s")
+
+    if args.output:
+        write_table(args.output, rows)
+        logger.info(f"📄 Ranked results written to {args.output}")
+    _print_top(rows, args.top, args.rank_by)
+
+
+if __name__ == "__main__":
+    main()
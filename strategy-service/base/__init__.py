@@ -6,16 +6,19 @@ This package contains the base classes and utilities for all trading strategies:
 - MarketDataConsumer: Redis Stream consumer for market data
 - SignalPublisher: Redis publisher for trading signals
 - TechnicalIndicators: Collection of technical analysis indicators
+- IndicatorSet: Per-symbol incremental indicators updated in O(1) per tick
 """
 
 from .base_strategy import BaseStrategy
 from .market_data_consumer import MarketDataConsumer
 from .signal_publisher import SignalPublisher
 from .indicators import TechnicalIndicators
+from .incremental_indicators import IndicatorSet
 
 __all__ = [
     'BaseStrategy',
     'MarketDataConsumer', 
     'SignalPublisher',
-    'TechnicalIndicators'
+    'TechnicalIndicators',
+    'IndicatorSet'
 ]
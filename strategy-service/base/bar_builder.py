@@ -0,0 +1,169 @@
+"""
+Bar (candle) Builder for Strategy Service
+
+Rolls raw ticks into fixed-interval OHLCV bars bucketed by the tick's
+``exchange_timestamp``. Prices come from the tick's ltp (the tick's own
+high/low are cumulative day values), and bar volume is the change in the
+exchange's cumulative day volume over the bar.
+"""
+import logging
+import re
+import time
+from collections import deque
+from datetime import datetime
+from itertools import islice
+from typing import Deque, Dict, List, Optional
+
+from shared.models import Bar, MarketDataTick
+from shared.timezone import IST
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_INTERVALS = ('1s', '1m', '5m', '15m')
+
+_INTERVAL_PATTERN = re.compile(r'^(\d+)([smh])$')
+_UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600}
+
+
+def parse_interval(interval: str) -> int:
+    """Convert an interval such as '1s', '5m' or '1h' into seconds"""
+    match = _INTERVAL_PATTERN.match(interval.strip().lower())
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(f"Invalid bar interval: {interval!r} (expected e.g. {', '.join(SUPPORTED_INTERVALS)})")
+    return int(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+
+
+class _OpenBar:
+    """Mutable state of the bar currently being built for one symbol"""
+
+    __slots__ = ('bucket', 'open', 'high', 'low', 'close', 'base_volume', 'last_volume', 'tick_count')
+
+    def __init__(self, bucket: int, price: float, base_volume: int, volume: int):
+        self.bucket = bucket
+        self.open = self.high = self.low = self.close = price
+        self.base_volume = base_volume
+        self.last_volume = volume
+        self.tick_count = 1
+
+    def add(self, price: float, volume: int):
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        self.last_volume = volume
+        self.tick_count += 1
+
+
+class BarBuilder:
+    """Builds bars of one interval for any number of symbols"""
+
+    def __init__(self, interval: str, history_size: int = 1000, close_grace: float = 1.0):
+        """
+        Args:
+            interval: Bar interval, e.g. '1m'
+            history_size: Closed bars kept per symbol
+            close_grace: Seconds after a bar's end before ``flush`` closes it
+                without a newer tick (allows for feed latency)
+        """
+        self.interval = interval
+        self.seconds = parse_interval(interval)
+        self.history_size = history_size
+        self.close_grace = close_grace
+        self._open: Dict[str, _OpenBar] = {}
+        self._history: Dict[str, Deque[Bar]] = {}
+        self._day_volume: Dict[str, int] = {}  # Cumulative volume at the last closed bar
+        self._closed_bucket: Dict[str, int] = {}  # Start of the last closed bar
+        self._closed_count: Dict[str, int] = {}  # Bars ever closed per symbol
+        self.bars_closed = 0
+        self.late_ticks = 0
+
+    def update(self, tick: MarketDataTick) -> Optional[Bar]:
+        """Add a tick; returns the previous bar if this tick closed it"""
+        symbol = tick.symbol
+        bucket = int(tick.exchange_timestamp.timestamp() // self.seconds) * self.seconds
+        volume = int(tick.volume)
+
+        closed = None
+        current = self._open.get(symbol)
+        if current is not None and bucket > current.bucket:
+            closed = self._close(symbol)
+            current = None
+
+        if current is None:
+            if bucket <= self._closed_bucket.get(symbol, -1):
+                # Bar already closed (e.g. by flush); don't reopen it
+                self.late_ticks += 1
+                return closed
+            base_volume = self._day_volume.get(symbol, volume)
+            if volume < base_volume:  # Cumulative volume reset (new session)
+                base_volume = 0
+            self._open[symbol] = _OpenBar(bucket, tick.ltp, base_volume, volume)
+        else:
+            # Late ticks (older bucket) are folded into the open bar
+            current.add(tick.ltp, volume)
+        return closed
+
+    def flush(self, now: Optional[float] = None) -> List[Bar]:
+        """Close open bars whose interval (plus grace) has passed; returns them"""
+        now = time.time() if now is None else now
+        deadline = now - self.close_grace - self.seconds
+        expired = [symbol for symbol, bar in self._open.items() if bar.bucket <= deadline]
+        return [self._close(symbol) for symbol in expired]
+
+    def get_bars(self, symbol: str, periods: int = 100) -> List[Bar]:
+        """Most recent closed bars for a symbol, oldest first"""
+        history = self._history.get(symbol)
+        if not history:
+            return []
+        if periods <= 0 or periods >= len(history):
+            return list(history)
+        return list(islice(history, len(history) - periods, None))
+
+    def closed_count(self, symbol: str) -> int:
+        """Bars closed so far for a symbol (changes whenever a new bar closes)"""
+        return self._closed_count.get(symbol, 0)
+
+    def latest_bar(self, symbol: str) -> Optional[Bar]:
+        history = self._history.get(symbol)
+        return history[-1] if history else None
+
+    def _close(self, symbol: str) -> Bar:
+        state = self._open.pop(symbol)
+        bar = Bar(
+            symbol=symbol,
+            interval=self.interval,
+            start=datetime.fromtimestamp(state.bucket, IST),
+            end=datetime.fromtimestamp(state.bucket + self.seconds, IST),
+            open=state.open,
+            high=state.high,
+            low=state.low,
+            close=state.close,
+            volume=max(state.last_volume - state.base_volume, 0),
+            tick_count=state.tick_count
+        )
+        self._day_volume[symbol] = state.last_volume
+        self._closed_bucket[symbol] = state.bucket
+        self._append(bar)
+        return bar
+
+    def discard(self, symbol: str):
+        """Drop a symbol's open bar and history (its closed count is kept)"""
+        self._open.pop(symbol, None)
+        self._history.pop(symbol, None)
+        self._day_volume.pop(symbol, None)
+        self._closed_bucket.pop(symbol, None)
+    
+    def add_bar(self, bar: Bar):
+        """Add an already closed bar (e.g. replayed from a file) to the symbol's history"""
+        self._closed_bucket[bar.symbol] = int(bar.start.timestamp())
+        self._append(bar)
+
+    def _append(self, bar: Bar):
+        history = self._history.get(bar.symbol)
+        if history is None:
+            history = deque(maxlen=self.history_size)
+            self._history[bar.symbol] = history
+        history.append(bar)
+        self._closed_count[bar.symbol] = self._closed_count.get(bar.symbol, 0) + 1
+        self.bars_closed += 1
@@ -1,36 +1,75 @@
 """
 Base Strategy Class for Strategy Service
 """
-import asyncio
 import logging
 import os
-from abc import ABC, abstractmethod
+import time
+from abc import ABC
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-from shared.models import MarketDataTick, TradingSignal, SignalType, StrategyConfig, StrategyStats
+from typing import Dict, List, Optional, Any, Tuple, Union
+from shared.models import Bar, MarketDataTick, TradingSignal, SignalType, StrategyConfig, StrategyStats
 from shared.timezone import get_ist_now, get_ist_timestamp
+from shared.tick_store import TickWindow
 from base.market_data_consumer import MarketDataConsumer
 from base.signal_publisher import SignalPublisher
 from base.indicators import TechnicalIndicators
+from base.incremental_indicators import IndicatorCache, IndicatorSet
+from base.indicator_registry import IndicatorRegistry
+from base.bar_builder import parse_interval
+from base.scheduler import EvaluationScheduler
+from base.symbol_view import SymbolView
 
 logger = logging.getLogger(__name__)
 
 class BaseStrategy(ABC):
     """Abstract base class for all trading strategies"""
     
-    def __init__(self, config: StrategyConfig):
+    # Incremental indicators updated on every tick (or bar) from the start;
+    # others are enabled, and replayed from history, when first accessed
+    INDICATORS: Tuple[str, ...] = ()
+    
+    def __init__(self, config: StrategyConfig,
+                 market_data_consumer: Optional[MarketDataConsumer] = None,
+                 signal_publisher: Optional[SignalPublisher] = None,
+                 indicator_cache: Optional[IndicatorCache] = None,
+                 indicator_registry: Optional[IndicatorRegistry] = None):
+        """
+        Args:
+            config: Strategy configuration
+            market_data_consumer: Consumer shared with other strategies in this
+                process (a private one is created if None)
+            signal_publisher: Publisher shared with other strategies in this
+                process (a private one is created if None)
+            indicator_cache: Incremental indicators shared with other strategies
+                in this process (a private one is created if None)
+            indicator_registry: Memoized batch indicators shared with other
+                strategies in this process (a private one is created if None)
+        """
+        # Subclasses implement on_tick (per symbol) or run (all updated symbols)
+        self._per_symbol = type(self).on_tick is not BaseStrategy.on_tick
+        if not self._per_symbol and type(self).run is BaseStrategy.run:
+            raise TypeError(f"{type(self).__name__} must implement on_tick() or run()")
+        
         self.config = config
         self.strategy_id = config.strategy_id
         self.symbols = config.symbols
         self.parameters = config.parameters
         self.enabled = config.enabled
         
-        # Initialize components
-        self.market_data_consumer = MarketDataConsumer(
+        # Bar interval to run on (None runs on every tick)
+        self.bar_interval = config.bar_interval
+        if self.bar_interval:
+            parse_interval(self.bar_interval)  # Fail fast on a bad interval
+        
+        # Initialize components; shared ones are connected and stopped by their owner
+        self._owns_consumer = market_data_consumer is None
+        self._consuming = False
+        self._owns_publisher = signal_publisher is None
+        self.market_data_consumer = market_data_consumer or MarketDataConsumer(
             redis_url=config.redis_url,
             consumer_group=config.consumer_group
         )
-        self.signal_publisher = SignalPublisher(
+        self.signal_publisher = signal_publisher or SignalPublisher(
             redis_url=config.redis_url,
             signal_channel=config.signal_channel
         )
@@ -39,9 +78,24 @@ class BaseStrategy(ABC):
         # Statistics
         self.stats = StrategyStats(strategy_id=self.strategy_id)
         self.running = False
+        self.time_to_ready: Optional[float] = None  # Seconds from start() to consuming live data
         
-        # Market data buffer for strategies
-        self.market_data_buffer: Dict[str, List[MarketDataTick]] = {}
+        # Incremental indicators per symbol, updated on every tick (sets with the
+        # same symbol, feed and parameters are shared through the cache)
+        self.indicator_params = self.parameters.get('indicator_params', {})
+        self.indicator_cache = indicator_cache if indicator_cache is not None else IndicatorCache()
+        self.indicator_sets: Dict[str, IndicatorSet] = {}
+        
+        # Batch indicator results, computed once per symbol and tick (or bar)
+        # however many strategies ask for them
+        self.indicator_registry = indicator_registry if indicator_registry is not None else IndicatorRegistry()
+        
+        # Ticks mark symbols dirty; evaluation passes run over the dirty symbols only
+        self.scheduler = EvaluationScheduler(
+            self._evaluate,
+            debounce=config.eval_debounce_ms / 1000,
+            name=self.strategy_id
+        )
         
         logger.info(f"✅ Initialized strategy: {self.strategy_id}")
     
@@ -49,8 +103,9 @@ class BaseStrategy(ABC):
         """Start the strategy"""
         try:
             logger.info(f"🚀 Starting strategy: {self.strategy_id}")
+            started = time.perf_counter()
             
-            # Connect to Redis
+            # Connect to Redis (idempotent for shared components)
             consumer_connected = await self.market_data_consumer.connect()
             publisher_connected = await self.signal_publisher.connect()
             
@@ -58,14 +113,16 @@ class BaseStrategy(ABC):
                 logger.error(f"❌ Failed to connect to Redis for strategy: {self.strategy_id}")
                 return False
             
-            # Set tick handler
-            self.market_data_consumer.set_tick_handler(self._handle_tick)
+            self.attach()
             
-            # Start consuming market data
-            self.running = True
+            # Load history for new symbols, then consume in the background
             await self.market_data_consumer.start_consuming(self.symbols)
+            self._consuming = True
+            primed = self.prime_indicators()
             
-            logger.info(f"✅ Strategy {self.strategy_id} started successfully")
+            self.time_to_ready = time.perf_counter() - started
+            logger.info(f"✅ Strategy {self.strategy_id} started successfully "
+                        f"(ready in {self.time_to_ready:.3f}s, {primed} symbols primed from history)")
             return True
             
         except Exception as e:
@@ -75,6 +132,37 @@ class BaseStrategy(ABC):
             self.stats.is_healthy = False
             return False
     
+    def attach(self):
+        """Register for this strategy's symbols on the consumer and start scheduling evaluations"""
+        self.market_data_consumer.add_tick_handler(self._handle_tick, self.symbols)
+        if self.bar_interval:
+            self.market_data_consumer.add_bar_handler(self._handle_bar, self.symbols, self.bar_interval)
+            logger.info(f"🕯️ Strategy {self.strategy_id} runs on {self.bar_interval} bars")
+        self.running = True
+        self.scheduler.start()
+    
+    def prime_indicators(self) -> int:
+        """
+        Feed buffered history (ticks, or closed bars in bar mode) into indicator
+        sets that haven't seen any data yet; returns the symbols primed
+        
+        Sets shared with a strategy that is already running are left alone.
+        """
+        primed = 0
+        for symbol in self.symbols:
+            indicator_set = self._get_indicator_set(symbol)
+            if indicator_set.ticks_seen:
+                continue
+            if self.bar_interval:
+                history = self.market_data_consumer.get_bars(symbol, self.bar_interval, 0)
+            else:
+                history = self.market_data_consumer.get_historical_buffer(symbol, 0)
+            for item in history:
+                indicator_set.update(item)
+            if indicator_set.ticks_seen:
+                primed += 1
+        return primed
+    
     async def stop(self):
         """Stop the strategy"""
         try:
@@ -82,12 +170,21 @@ class BaseStrategy(ABC):
             
             self.running = False
             
-            # Stop consuming
-            await self.market_data_consumer.stop()
+            self.market_data_consumer.remove_tick_handler(self._handle_tick)
+            self.market_data_consumer.remove_bar_handler(self._handle_bar)
+            await self.scheduler.stop()
+            self._release_indicator_sets()
             
-            # Disconnect from Redis
-            await self.market_data_consumer.disconnect()
-            await self.signal_publisher.disconnect()
+            # Stop consuming and disconnect, unless the components are shared;
+            # a shared consumer drops streams no other strategy still reads
+            if self._owns_consumer:
+                await self.market_data_consumer.stop()
+                await self.market_data_consumer.disconnect()
+            elif self._consuming:
+                self.market_data_consumer.remove_symbols(self.symbols)
+            self._consuming = False
+            if self._owns_publisher:
+                await self.signal_publisher.disconnect()
             
             logger.info(f"✅ Strategy {self.strategy_id} stopped")
             
@@ -100,31 +197,48 @@ class BaseStrategy(ABC):
             # Update statistics
             self.stats.ticks_processed += 1
             
-            # Add to buffer
-            symbol = tick.symbol
-            if symbol not in self.market_data_buffer:
-                self.market_data_buffer[symbol] = []
+            # In bar mode indicators and strategy logic run on bar close instead
+            if self.bar_interval:
+                return
             
-            self.market_data_buffer[symbol].append(tick)
+            # The consumer has already buffered the tick; update incremental
+            # indicators before strategy logic reads them
+            self.indicator_cache.update(self._get_indicator_set(tick.symbol), tick)
             
-            # Keep buffer size manageable (last 1000 ticks per symbol)
-            if len(self.market_data_buffer[symbol]) > 1000:
-                self.market_data_buffer[symbol] = self.market_data_buffer[symbol][-1000:]
-            
-            # Run strategy logic
-            asyncio.create_task(self._run_strategy_logic(tick))
+            # Schedule strategy logic (coalesced with other ticks for the symbol)
+            self.scheduler.mark(tick.symbol, tick)
             
         except Exception as e:
             logger.error(f"❌ Error handling tick for {self.strategy_id}: {e}")
             self.stats.errors_count += 1
             self.stats.last_error = str(e)
     
-    async def _run_strategy_logic(self, tick: MarketDataTick):
-        """Run strategy logic for a tick"""
+    def _handle_bar(self, bar: Bar):
+        """Handle a closed bar (bar mode only)"""
         try:
-            # Get market data for all symbols
+            self.stats.bars_processed += 1
+            
+            # Indicators are computed over bars rather than raw ticks
+            self.indicator_cache.update(self._get_indicator_set(bar.symbol), bar)
+            
+            # Schedule strategy logic
+            self.scheduler.mark(bar.symbol, bar)
+            
+        except Exception as e:
+            logger.error(f"❌ Error handling bar for {self.strategy_id}: {e}")
+            self.stats.errors_count += 1
+            self.stats.last_error = str(e)
+    
+    async def _evaluate(self, updates: Dict[str, Union[MarketDataTick, Bar]]):
+        """Run strategy logic for the symbols updated since the last pass"""
+        if self._per_symbol:
+            await self._dispatch_symbols(updates)
+            return
+        
+        try:
+            # Get market data for the updated symbols
             market_data = {}
-            for symbol in self.symbols:
+            for symbol in updates:
                 latest_tick = self.market_data_consumer.get_latest_tick(symbol)
                 if latest_tick:
                     market_data[symbol] = latest_tick
@@ -141,18 +255,58 @@ class BaseStrategy(ABC):
             self.stats.errors_count += 1
             self.stats.last_error = str(e)
     
-    @abstractmethod
+    async def _dispatch_symbols(self, updates: Dict[str, Union[MarketDataTick, Bar]]):
+        """Call on_tick for each updated symbol (work is independent of universe size)"""
+        for symbol, item in updates.items():
+            try:
+                latest_tick = self.market_data_consumer.get_latest_tick(symbol)
+                if not latest_tick:
+                    continue
+                
+                view = SymbolView(
+                    self, symbol, latest_tick,
+                    self.indicator_sets.get(symbol),
+                    bar=item if isinstance(item, Bar) else None
+                )
+                signal = await self.on_tick(symbol, view)
+                if signal:
+                    await self.publish_signal(signal)
+                    
+            except Exception as e:
+                logger.error(f"❌ Error in strategy logic for {self.strategy_id} ({symbol}): {e}")
+                self.stats.errors_count += 1
+                self.stats.last_error = str(e)
+    
+    async def on_tick(self, symbol: str, view: SymbolView) -> Optional[TradingSignal]:
+        """
+        Evaluate one symbol that ticked (or closed a bar in bar mode)
+        
+        Preferred over ``run``: it is only called for symbols with new data,
+        with the symbol's incremental indicators and history at hand.
+        
+        Args:
+            symbol: The updated symbol
+            view: Latest tick, indicators and history for the symbol
+            
+        Returns:
+            A TradingSignal, or None
+        """
+        raise NotImplementedError
+    
     async def run(self, market_data: Dict[str, MarketDataTick]) -> List[TradingSignal]:
         """
         Run the strategy logic and return trading signals
         
+        Compatibility path for strategies that don't implement ``on_tick``.
+        
         Args:
-            market_data: Dictionary mapping symbol to latest MarketDataTick
+            market_data: Dictionary mapping symbol to latest MarketDataTick, for
+                the symbols that ticked (or closed a bar) since the last run
             
         Returns:
             List of TradingSignal objects
         """
-        pass
+        raise NotImplementedError
     
     async def publish_signal(self, signal: TradingSignal):
         """Publish a trading signal"""
@@ -170,18 +324,64 @@ class BaseStrategy(ABC):
             self.stats.errors_count += 1
             self.stats.last_error = str(e)
     
-    def get_historical_buffer(self, symbol: str, periods: int = 100) -> List[MarketDataTick]:
-        """Get historical market data from buffer"""
-        if symbol not in self.market_data_buffer:
-            return []
+    def get_historical_buffer(self, symbol: str, periods: int = 100) -> Union[TickWindow, List[Bar]]:
+        """
+        Get historical market data from buffer
+        
+        In bar mode this returns the last closed bars (oldest first), which
+        expose ``ltp``/``high``/``low``/``timestamp`` like ticks do.
         
-        buffer = self.market_data_buffer[symbol]
-        return buffer[-periods:] if periods > 0 else buffer
+        Returns a zero-copy window over the ring buffer that behaves like a list
+        of ticks (len, indexing, slicing, iteration) and exposes whole columns
+        via ``column('ltp')`` / ``to_numpy()``. It is only valid until the next
+        tick for the symbol arrives, so don't hold on to it across awaits.
+        History is owned by the market data consumer, which may be shared with
+        other strategies in the same process.
+        """
+        if self.bar_interval:
+            return self.market_data_consumer.get_bars(symbol, self.bar_interval, periods)
+        return self.market_data_consumer.get_historical_buffer(symbol, periods)
     
     def get_latest_tick(self, symbol: str) -> Optional[MarketDataTick]:
         """Get the latest tick for a symbol"""
-        buffer = self.get_historical_buffer(symbol, 1)
-        return buffer[0] if buffer else None
+        return self.market_data_consumer.get_latest_tick(symbol)
+    
+    def calculate_indicator(self, symbol: str, name: str, series, *params) -> Any:
+        """
+        Memoized ``TechnicalIndicators.calculate_<name>(series, *params)``
+        
+        ``series`` must be the symbol's latest history (from
+        ``get_historical_buffer`` or ``view.history``): results are cached per
+        symbol, feed, indicator, parameters, window length and tick (or bar)
+        sequence, and shared with other strategies. Don't modify the result.
+        """
+        calculate = getattr(self.indicators, f"calculate_{name}")
+        key = (symbol, self.bar_interval or 'tick', name, params, len(series),
+               self.market_data_consumer.get_sequence(symbol, self.bar_interval))
+        return self.indicator_registry.get(key, lambda: calculate(series, *params))
+    
+    def _get_indicator_set(self, symbol: str) -> IndicatorSet:
+        """Get (or lazily create) the incremental indicator set for a symbol"""
+        indicator_set = self.indicator_sets.get(symbol)
+        if indicator_set is None:
+            indicator_set = self.indicator_cache.acquire(
+                symbol, self.bar_interval or 'tick',
+                indicators=self.INDICATORS,
+                history=lambda periods: self.get_historical_buffer(symbol, periods),
+                **self.indicator_params
+            )
+            self.indicator_sets[symbol] = indicator_set
+        return indicator_set
+    
+    def _release_indicator_sets(self):
+        """Give this strategy's indicator sets back to the cache"""
+        for symbol in self.indicator_sets:
+            self.indicator_cache.release(symbol, self.bar_interval or 'tick', **self.indicator_params)
+        self.indicator_sets.clear()
+    
+    def get_indicators(self, symbol: str) -> Optional[IndicatorSet]:
+        """Get the incremental indicators for a symbol (None until its first tick)"""
+        return self.indicator_sets.get(symbol)
     
     def calculate_quantity(self, price: float) -> int:
         """Calculate order quantity based on capital and price"""
@@ -221,12 +421,17 @@ class BaseStrategy(ABC):
             "signals_generated": self.stats.signals_generated,
             "last_signal_time": self.stats.last_signal_time.isoformat() if self.stats.last_signal_time else None,
             "ticks_processed": self.stats.ticks_processed,
+            "bar_interval": self.bar_interval,
+            "bars_processed": self.stats.bars_processed,
             "errors_count": self.stats.errors_count,
+            "time_to_ready": round(self.time_to_ready, 3) if self.time_to_ready is not None else None,
             "uptime_start": self.stats.uptime_start.isoformat(),
             "is_healthy": self.stats.is_healthy,
             "last_error": self.stats.last_error,
             "consumer_stats": self.market_data_consumer.get_stats() if hasattr(self.market_data_consumer, 'get_stats') else {},
-            "publisher_stats": self.signal_publisher.get_stats()
+            "publisher_stats": self.signal_publisher.get_stats(),
+            "scheduler_stats": self.scheduler.get_stats(),
+            "indicator_registry": self.indicator_registry.get_stats()
         }
     
     def __repr__(self):
@@ -0,0 +1,553 @@
+"""
+Incremental (streaming) Technical Indicators for Strategy Service
+
+Each indicator keeps just enough running state to absorb one new tick in O(1)
+and exposes the latest reading as ``.value`` and the one before it as
+``.previous``. Feeding the full tick history through an indicator yields the
+same numbers as the last two entries of the matching ``TechnicalIndicators``
+batch calculation over that history.
+"""
+import logging
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DMIValue(NamedTuple):
+    plus_di: float
+    minus_di: float
+    adx: Optional[float]
+
+
+class MACDValue(NamedTuple):
+    macd: float
+    signal: Optional[float]
+    histogram: Optional[float]
+
+
+class BollingerValue(NamedTuple):
+    upper: float
+    middle: float
+    lower: float
+
+
+class StochasticValue(NamedTuple):
+    k: float
+    d: Optional[float]
+
+
+class IncrementalIndicator:
+    """Base class holding the latest and previous indicator readings"""
+
+    def __init__(self):
+        self.value: Any = None
+        self.previous: Any = None
+        self.count = 0  # Number of readings produced so far
+
+    @property
+    def ready(self) -> bool:
+        """True once at least two readings are available (value and previous)"""
+        return self.previous is not None
+
+    def _emit(self, value: Any):
+        self.previous = self.value
+        self.value = value
+        self.count += 1
+
+
+class SMA(IncrementalIndicator):
+    """Simple Moving Average over a rolling window"""
+
+    def __init__(self, period: int):
+        super().__init__()
+        self.period = period
+        self._window: deque = deque()
+        self._sum = 0.0
+        self._since_resum = 0
+
+    def update(self, close: float) -> Optional[float]:
+        window = self._window
+        window.append(close)
+        self._sum += close
+        if len(window) > self.period:
+            self._sum -= window.popleft()
+
+        # Re-sum once per window to stop floating point drift (amortised O(1))
+        self._since_resum += 1
+        if self._since_resum >= self.period:
+            self._sum = sum(window)
+            self._since_resum = 0
+
+        if len(window) == self.period:
+            self._emit(self._sum / self.period)
+        return self.value
+
+
+class EMA(IncrementalIndicator):
+    """Exponential Moving Average seeded with the SMA of the first period"""
+
+    def __init__(self, period: int):
+        super().__init__()
+        self.period = period
+        self.multiplier = 2 / (period + 1)
+        self._seed_sum = 0.0
+        self._seen = 0
+
+    def update(self, close: float) -> Optional[float]:
+        if self.value is None:
+            self._seed_sum += close
+            self._seen += 1
+            if self._seen == self.period:
+                self._emit(self._seed_sum / self.period)
+            return self.value
+
+        self._emit((close * self.multiplier) + (self.value * (1 - self.multiplier)))
+        return self.value
+
+
+class RSI(IncrementalIndicator):
+    """Relative Strength Index with Wilder's smoothing"""
+
+    def __init__(self, period: int = 14):
+        super().__init__()
+        self.period = period
+        self._prev_close: Optional[float] = None
+        self._changes = 0
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+
+    def update(self, close: float) -> Optional[float]:
+        prev_close = self._prev_close
+        self._prev_close = close
+        if prev_close is None:
+            return self.value
+
+        change = close - prev_close
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        period = self.period
+
+        if self._changes < period:
+            # Seed averages with the plain mean of the first `period` changes
+            self._avg_gain += gain
+            self._avg_loss += loss
+            self._changes += 1
+            if self._changes == period:
+                self._avg_gain /= period
+                self._avg_loss /= period
+            return self.value
+
+        # Reading reflects the averages before this change, as in calculate_rsi
+        if self._avg_loss == 0:
+            rsi = 100
+        else:
+            rs = self._avg_gain / self._avg_loss
+            rsi = 100 - (100 / (1 + rs))
+        self._emit(rsi)
+
+        self._avg_gain = (self._avg_gain * (period - 1) + gain) / period
+        self._avg_loss = (self._avg_loss * (period - 1) + loss) / period
+        self._changes += 1
+        return self.value
+
+
+class DMI(IncrementalIndicator):
+    """Directional Movement Index (+DI, -DI) with ADX"""
+
+    def __init__(self, period: int = 14):
+        super().__init__()
+        self.period = period
+        self._prev_high: Optional[float] = None
+        self._prev_low: Optional[float] = None
+        self._moves = 0
+        self._avg_plus_dm = 0.0
+        self._avg_minus_dm = 0.0
+        self._avg_tr = 0.0
+        self._dx_seen = 0
+        self._adx_seed = 0.0
+        self._adx: Optional[float] = None
+
+    @property
+    def plus_di(self) -> Optional[float]:
+        return self.value.plus_di if self.value else None
+
+    @property
+    def minus_di(self) -> Optional[float]:
+        return self.value.minus_di if self.value else None
+
+    @property
+    def adx(self) -> Optional[float]:
+        return self.value.adx if self.value else None
+
+    def update(self, high: float, low: float) -> Optional[DMIValue]:
+        prev_high, prev_low = self._prev_high, self._prev_low
+        self._prev_high, self._prev_low = high, low
+        if prev_high is None:
+            return self.value
+
+        high_diff = high - prev_high
+        low_diff = prev_low - low
+        plus_dm = high_diff if high_diff > low_diff and high_diff > 0 else 0.0
+        minus_dm = low_diff if low_diff > high_diff and low_diff > 0 else 0.0
+        true_range = max(high - low, abs(high - prev_high), abs(low - prev_low))
+        period = self.period
+
+        if self._moves < period:
+            self._avg_plus_dm += plus_dm
+            self._avg_minus_dm += minus_dm
+            self._avg_tr += true_range
+            self._moves += 1
+            if self._moves == period:
+                self._avg_plus_dm /= period
+                self._avg_minus_dm /= period
+                self._avg_tr /= period
+            return self.value
+
+        # Reading reflects the averages before this move, as in calculate_dmi
+        if self._avg_tr == 0:
+            di_plus = 0
+            di_minus = 0
+        else:
+            di_plus = (self._avg_plus_dm / self._avg_tr) * 100
+            di_minus = (self._avg_minus_dm / self._avg_tr) * 100
+        self._emit(DMIValue(di_plus, di_minus, self._update_adx(di_plus, di_minus)))
+
+        self._avg_plus_dm = (self._avg_plus_dm * (period - 1) + plus_dm) / period
+        self._avg_minus_dm = (self._avg_minus_dm * (period - 1) + minus_dm) / period
+        self._avg_tr = (self._avg_tr * (period - 1) + true_range) / period
+        self._moves += 1
+        return self.value
+
+    def _update_adx(self, di_plus: float, di_minus: float) -> Optional[float]:
+        """Wilder-smoothed DX, seeded with the mean of the first `period` readings"""
+        di_sum = di_plus + di_minus
+        dx = abs(di_plus - di_minus) / di_sum * 100 if di_sum else 0.0
+        period = self.period
+
+        if self._adx is None:
+            self._adx_seed += dx
+            self._dx_seen += 1
+            if self._dx_seen == period:
+                self._adx = self._adx_seed / period
+            return self._adx
+
+        self._adx = (self._adx * (period - 1) + dx) / period
+        return self._adx
+
+
+class MACD(IncrementalIndicator):
+    """
+    Moving Average Convergence Divergence
+
+    Readings line up index-for-index with ``TechnicalIndicators.calculate_macd``,
+    which pairs the i-th fast EMA value with the i-th slow EMA value and the
+    i-th MACD value with the i-th signal value.
+    """
+
+    def __init__(self, fast_period: int = 12, slow_period: int = 26, signal_period: int = 9):
+        super().__init__()
+        if fast_period > slow_period:
+            raise ValueError("fast_period must not exceed slow_period")
+        self.fast_period = fast_period
+        self.slow_period = slow_period
+        self.signal_period = signal_period
+        self._fast = EMA(fast_period)
+        self._slow = EMA(slow_period)
+        self._signal = EMA(signal_period)
+        self._fast_values: deque = deque(maxlen=slow_period - fast_period + 1)
+        self._macd_values: deque = deque(maxlen=signal_period)
+
+    def update(self, close: float) -> Optional[MACDValue]:
+        fast = self._fast.update(close)
+        slow = self._slow.update(close)
+        if fast is not None:
+            self._fast_values.append(fast)
+        if slow is None:
+            return self.value
+
+        macd = self._fast_values[0] - slow
+        self._macd_values.append(macd)
+        signal = self._signal.update(macd)
+        histogram = self._macd_values[0] - signal if signal is not None else None
+        self._emit(MACDValue(macd, signal, histogram))
+        return self.value
+
+
+class BollingerBands(IncrementalIndicator):
+    """Bollinger Bands using the population standard deviation of the window"""
+
+    def __init__(self, period: int = 20, std_dev: float = 2.0):
+        super().__init__()
+        self.period = period
+        self.std_dev = std_dev
+        self._window: deque = deque()
+        self._shift: Optional[float] = None  # Centres values to keep sum of squares precise
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._since_resum = 0
+
+    def update(self, close: float) -> Optional[BollingerValue]:
+        if self._shift is None:
+            self._shift = close
+        x = close - self._shift
+        window = self._window
+        window.append(x)
+        self._sum += x
+        self._sum_sq += x * x
+        if len(window) > self.period:
+            old = window.popleft()
+            self._sum -= old
+            self._sum_sq -= old * old
+
+        self._since_resum += 1
+        if self._since_resum >= self.period:
+            self._sum = sum(window)
+            self._sum_sq = sum(v * v for v in window)
+            self._since_resum = 0
+
+        if len(window) < self.period:
+            return self.value
+
+        mean = self._sum / self.period
+        variance = max(self._sum_sq / self.period - mean * mean, 0.0)
+        std = variance ** 0.5
+        middle = mean + self._shift
+        self._emit(BollingerValue(middle + self.std_dev * std, middle, middle - self.std_dev * std))
+        return self.value
+
+
+class Stochastic(IncrementalIndicator):
+    """Stochastic Oscillator (%K, %D) using monotonic deques for the rolling extremes"""
+
+    def __init__(self, k_period: int = 14, d_period: int = 3):
+        super().__init__()
+        self.k_period = k_period
+        self.d_period = d_period
+        self._index = 0
+        self._highs: deque = deque()  # (index, high), decreasing highs
+        self._lows: deque = deque()   # (index, low), increasing lows
+        self._d = SMA(d_period)
+
+    def update(self, high: float, low: float, close: float) -> Optional[StochasticValue]:
+        index = self._index
+        self._index += 1
+
+        highs, lows = self._highs, self._lows
+        while highs and highs[-1][1] <= high:
+            highs.pop()
+        highs.append((index, high))
+        while lows and lows[-1][1] >= low:
+            lows.pop()
+        lows.append((index, low))
+
+        oldest = index - self.k_period + 1
+        if highs[0][0] < oldest:
+            highs.popleft()
+        if lows[0][0] < oldest:
+            lows.popleft()
+        if oldest < 0:
+            return self.value
+
+        highest_high = highs[0][1]
+        lowest_low = lows[0][1]
+        if highest_high == lowest_low:
+            k_value = 50  # Neutral when no range
+        else:
+            k_value = ((close - lowest_low) / (highest_high - lowest_low)) * 100
+
+        self._emit(StochasticValue(k_value, self._d.update(k_value)))
+        return self.value
+
+
+class IndicatorSet:
+    """
+    Incremental indicators for one symbol, fed tick by tick
+
+    Only enabled indicators are updated. Indicators are enabled up front
+    (``indicators``), with ``enable``, or on first attribute access (e.g.
+    ``indicator_set.macd``). An indicator enabled after the set has absorbed
+    data is first replayed over the most recent of those ticks or bars that
+    ``history(n)`` returns (without a history source it starts empty).
+    """
+
+    INDICATORS = ('rsi', 'dmi', 'ema', 'sma', 'macd', 'bollinger', 'stochastic')
+
+    DEFAULT_PARAMS: Dict[str, Any] = {
+        'rsi_period': 14,
+        'dmi_period': 14,
+        'ema_period': 20,
+        'sma_period': 20,
+        'macd_fast': 12,
+        'macd_slow': 26,
+        'macd_signal': 9,
+        'bollinger_period': 20,
+        'bollinger_std_dev': 2.0,
+        'stochastic_k': 14,
+        'stochastic_d': 3,
+    }
+
+    def __init__(self, symbol: str, indicators: Iterable[str] = (),
+                 history: Optional[Callable[[int], Iterable[Any]]] = None, **params):
+        unknown = set(params) - set(self.DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown indicator parameters: {sorted(unknown)}")
+
+        self.symbol = symbol
+        self.params = {**self.DEFAULT_PARAMS, **params}
+        self.history = history
+        self.ticks_seen = 0
+        # Update functions of enabled indicators by the inputs they take
+        self._close_updates: List[Callable] = []
+        self._high_low_updates: List[Callable] = []
+        self._hlc_updates: List[Callable] = []
+        for name in indicators:
+            self.enable(name)
+
+    def __getattr__(self, name: str):
+        # Only reached for indicators not enabled yet
+        if name in IndicatorSet.INDICATORS:
+            return self.enable(name)
+        raise AttributeError(f"'IndicatorSet' object has no attribute '{name}'")
+
+    @property
+    def enabled(self) -> List[str]:
+        return [name for name in self.INDICATORS if name in self.__dict__]
+
+    def enable(self, name: str) -> IncrementalIndicator:
+        """Start updating an indicator (no-op if it already is); returns it"""
+        indicator = self.__dict__.get(name)
+        if indicator is not None:
+            return indicator
+        if name not in self.INDICATORS:
+            raise ValueError(f"Unknown indicator {name} (expected one of {', '.join(self.INDICATORS)})")
+
+        p = self.params
+        if name == 'rsi':
+            indicator, updates = RSI(p['rsi_period']), self._close_updates
+        elif name == 'dmi':
+            indicator, updates = DMI(p['dmi_period']), self._high_low_updates
+        elif name == 'ema':
+            indicator, updates = EMA(p['ema_period']), self._close_updates
+        elif name == 'sma':
+            indicator, updates = SMA(p['sma_period']), self._close_updates
+        elif name == 'macd':
+            indicator, updates = MACD(p['macd_fast'], p['macd_slow'], p['macd_signal']), self._close_updates
+        elif name == 'bollinger':
+            indicator, updates = BollingerBands(p['bollinger_period'], p['bollinger_std_dev']), self._close_updates
+        else:
+            indicator, updates = Stochastic(p['stochastic_k'], p['stochastic_d']), self._hlc_updates
+
+        # Catch up on what the set has already absorbed
+        if self.ticks_seen and self.history is not None:
+            for item in self.history(self.ticks_seen):
+                if updates is self._close_updates:
+                    indicator.update(item.ltp)
+                elif updates is self._high_low_updates:
+                    indicator.update(item.high, item.low)
+                else:
+                    indicator.update(item.high, item.low, item.ltp)
+        setattr(self, name, indicator)
+        updates.append(indicator.update)
+        return indicator
+
+    def update(self, tick) -> None:
+        """Absorb one tick (anything with ltp, high and low attributes)"""
+        close = tick.ltp
+        for update in self._close_updates:
+            update(close)
+        if self._high_low_updates or self._hlc_updates:
+            high, low = tick.high, tick.low
+            for update in self._high_low_updates:
+                update(high, low)
+            for update in self._hlc_updates:
+                update(high, low, close)
+        self.ticks_seen += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Latest readings of the enabled indicators as a plain dict (for logging and signal metadata)"""
+        readings = {}
+        for name in self.enabled:
+            value = self.__dict__[name].value
+            readings[name] = value._asdict() if hasattr(value, '_asdict') else value
+        readings['ticks_seen'] = self.ticks_seen
+        return readings
+
+    def __repr__(self):
+        return f"<IndicatorSet symbol={self.symbol} ticks_seen={self.ticks_seen} enabled={self.enabled}>"
+
+
+class IndicatorCache:
+    """
+    IndicatorSets shared by strategies in one process
+
+    Sets are keyed by symbol, feed ('tick' or a bar interval) and parameters,
+    so strategies on the same symbol with the same settings share one set. The
+    consumer hands the same tick (or bar) object to every handler, so
+    ``update`` only advances a set once per tick however many strategies
+    report it. Sets are reference counted and dropped on the last ``release``.
+    """
+
+    def __init__(self):
+        self._sets: Dict[tuple, IndicatorSet] = {}
+        self._refs: Dict[tuple, int] = {}
+        self._last_item: Dict[int, Any] = {}  # id(IndicatorSet) -> last tick/bar absorbed
+        self.updates = 0
+        self.shared_updates = 0  # Updates skipped because another strategy already applied them
+
+    @staticmethod
+    def _key(symbol: str, feed: str, params: Dict[str, Any]) -> tuple:
+        return (symbol, feed, tuple(sorted(params.items())))
+
+    def acquire(self, symbol: str, feed: str = 'tick', indicators: Iterable[str] = (),
+                history: Optional[Callable[[int], Iterable[Any]]] = None, **params) -> IndicatorSet:
+        """
+        Get (or create) the shared set for a symbol/feed/parameters and take a
+        reference; indicators are enabled on the set (the union of what its
+        strategies declare), replayed from history if it already has data
+        """
+        key = self._key(symbol, feed, params)
+        indicator_set = self._sets.get(key)
+        if indicator_set is None:
+            indicator_set = IndicatorSet(symbol, indicators, history, **params)
+            self._sets[key] = indicator_set
+            self._refs[key] = 0
+        else:
+            if indicator_set.history is None:
+                indicator_set.history = history
+            for name in indicators:
+                indicator_set.enable(name)
+        self._refs[key] += 1
+        return indicator_set
+
+    def release(self, symbol: str, feed: str = 'tick', **params) -> None:
+        """Drop a reference; the set is discarded when no strategy uses it"""
+        key = self._key(symbol, feed, params)
+        if key not in self._refs:
+            return
+        self._refs[key] -= 1
+        if self._refs[key] <= 0:
+            indicator_set = self._sets.pop(key)
+            del self._refs[key]
+            self._last_item.pop(id(indicator_set), None)
+
+    def update(self, indicator_set: IndicatorSet, item) -> None:
+        """Absorb a tick or bar into a shared set unless it already has"""
+        set_id = id(indicator_set)
+        if self._last_item.get(set_id) is item:
+            self.shared_updates += 1
+            return
+        self._last_item[set_id] = item
+        indicator_set.update(item)
+        self.updates += 1
+
+    def __len__(self):
+        return len(self._sets)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "indicator_sets": len(self._sets),
+            "references": sum(self._refs.values()),
+            "updates": self.updates,
+            "shared_updates": self.shared_updates
+        }
@@ -0,0 +1,67 @@
+"""
+Memoized batch indicators shared by strategies in one process
+
+Several strategies compute the same ``TechnicalIndicators`` series for the
+same symbol on the same tick (e.g. MACD(12, 26, 9) and Stochastic(14, 3) in
+both momentum strategies). ``IndicatorRegistry`` caches each result under
+(symbol, feed, indicator, parameters, window length, sequence), where the
+sequence is the symbol's tick (or closed bar) count in the market data
+consumer, so the first strategy to ask on a tick computes the series and the
+others reuse it. A new tick changes the sequence, so results are never stale;
+superseded entries simply age out of the bounded LRU.
+
+Cached results are shared between callers and must not be modified.
+"""
+import os
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+INDICATOR_REGISTRY_SIZE = int(os.getenv('INDICATOR_REGISTRY_SIZE', '4096'))
+
+
+class IndicatorRegistry:
+    """Bounded LRU cache of batch indicator results"""
+
+    def __init__(self, max_entries: int = INDICATOR_REGISTRY_SIZE):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached result for key, computing (and caching) it on a miss"""
+        entries = self._entries
+        try:
+            result = entries[key]
+        except KeyError:
+            pass
+        else:
+            entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        result = compute()
+        entries[key] = result
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions
+        }
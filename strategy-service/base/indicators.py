@@ -1,318 +1,361 @@
 """
 Technical Indicators for Strategy Service
+
+The calculations are float-series kernels (``ema_series``, ``rolling_max``,
+...) that take any indexable sequence of floats: a list, or a zero-copy
+column of the tick ring buffer. ``TechnicalIndicators`` methods are thin
+adapters that pull the price columns out of a tick (or bar) series and call
+the kernels, or the NumPy backend for long series. Composite indicators
+(MACD, Bollinger Bands, Stochastic) are built from kernels directly, so no
+intermediate tick objects are created.
 """
 import logging
-from typing import List, Dict, Tuple
+import math
+import os
+from collections import deque
+from typing import Dict, List, Sequence
 from shared.models import MarketDataTick
+from base import vectorized_indicators as vectorized
 
 logger = logging.getLogger(__name__)
 
+# Series at least this long are computed with the NumPy backend (when available)
+VECTORIZE_THRESHOLD = int(os.getenv('INDICATOR_VECTORIZE_THRESHOLD', '256'))
+
+def _use_vectorized(ticks: List[MarketDataTick]) -> bool:
+    """Check whether a tick series should go through the NumPy backend"""
+    return vectorized.NUMPY_AVAILABLE and len(ticks) >= VECTORIZE_THRESHOLD
+
+def _to_lists(series: Dict) -> Dict[str, List[float]]:
+    """Convert a dict of NumPy arrays into the plain-list format returned by TechnicalIndicators"""
+    return {key: values.tolist() for key, values in series.items()}
+
+def _column(ticks, name: str) -> Sequence[float]:
+    """One price attribute of a tick series as a float sequence (zero-copy for ring buffer windows)"""
+    if hasattr(ticks, 'column'):
+        return ticks.column(name)
+    return [getattr(tick, name) for tick in ticks]
+
+# Float-series kernels
+
+def sma_series(values: Sequence[float], period: int) -> List[float]:
+    """Simple moving average of each full window (running sum)"""
+    n = len(values)
+    if period <= 0 or n < period:
+        return []
+    total = 0.0
+    for i in range(period):
+        total += values[i]
+    out = [total / period]
+    for i in range(period, n):
+        total += values[i] - values[i - period]
+        out.append(total / period)
+    return out
+
+def ema_series(values: Sequence[float], period: int) -> List[float]:
+    """Exponential moving average; the first value is the SMA of the first period"""
+    n = len(values)
+    if period <= 0 or n < period:
+        return []
+    multiplier = 2 / (period + 1)
+    keep = 1 - multiplier
+    total = 0.0
+    for i in range(period):
+        total += values[i]
+    ema = total / period
+    out = [ema]
+    for i in range(period, n):
+        ema = values[i] * multiplier + ema * keep
+        out.append(ema)
+    return out
+
+def wilder_series(values: Sequence[float], period: int) -> List[float]:
+    """
+    Wilder-smoothed averages as used by RSI/DMI: the mean of the first period
+    values, then (avg * (period - 1) + value) / period for each later value
+    except the last (matching the batch loops, which smooth after emitting)
+    """
+    n = len(values)
+    if period <= 0 or n <= period:
+        return []
+    total = 0.0
+    for i in range(period):
+        total += values[i]
+    avg = total / period
+    out = [avg]
+    for i in range(period, n - 1):
+        avg = (avg * (period - 1) + values[i]) / period
+        out.append(avg)
+    return out
+
+def rolling_max(values: Sequence[float], period: int) -> List[float]:
+    """Maximum of each full window (monotonic deque, O(n))"""
+    n = len(values)
+    if period <= 0 or n < period:
+        return []
+    window = deque()
+    out = []
+    for i in range(n):
+        value = values[i]
+        while window and values[window[-1]] <= value:
+            window.pop()
+        window.append(i)
+        if window[0] <= i - period:
+            window.popleft()
+        if i >= period - 1:
+            out.append(values[window[0]])
+    return out
+
+def rolling_min(values: Sequence[float], period: int) -> List[float]:
+    """Minimum of each full window (monotonic deque, O(n))"""
+    n = len(values)
+    if period <= 0 or n < period:
+        return []
+    window = deque()
+    out = []
+    for i in range(n):
+        value = values[i]
+        while window and values[window[-1]] >= value:
+            window.pop()
+        window.append(i)
+        if window[0] <= i - period:
+            window.popleft()
+        if i >= period - 1:
+            out.append(values[window[0]])
+    return out
+
+def rolling_std(values: Sequence[float], period: int, means: Sequence[float] = None) -> List[float]:
+    """Population standard deviation of each full window (two-pass per window for stability)"""
+    n = len(values)
+    if period <= 0 or n < period:
+        return []
+    if means is None:
+        means = sma_series(values, period)
+    out = []
+    for start in range(n - period + 1):
+        mean = means[start]
+        squares = 0.0
+        for i in range(start, start + period):
+            deviation = values[i] - mean
+            squares += deviation * deviation
+        out.append(math.sqrt(squares / period))
+    return out
+
+def rsi_series(closes: Sequence[float], period: int = 14) -> List[float]:
+    """RSI from closing prices"""
+    n = len(closes)
+    if n < period + 1:
+        return []
+    gains = [0.0] * (n - 1)
+    losses = [0.0] * (n - 1)
+    for i in range(1, n):
+        change = closes[i] - closes[i - 1]
+        if change > 0:
+            gains[i - 1] = change
+        else:
+            losses[i - 1] = -change
+
+    avg_gains = wilder_series(gains, period)
+    avg_losses = wilder_series(losses, period)
+    out = []
+    for avg_gain, avg_loss in zip(avg_gains, avg_losses):
+        if avg_loss == 0:
+            out.append(100)
+        else:
+            out.append(100 - (100 / (1 + avg_gain / avg_loss)))
+    return out
+
+def dmi_series(highs: Sequence[float], lows: Sequence[float], period: int = 14) -> Dict[str, List[float]]:
+    """+DI / -DI from high and low prices"""
+    n = len(highs)
+    if n < period + 1:
+        return {"+DI": [], "-DI": []}
+    plus_dm = [0.0] * (n - 1)
+    minus_dm = [0.0] * (n - 1)
+    true_ranges = [0.0] * (n - 1)
+    for i in range(1, n):
+        high, low, prev_high, prev_low = highs[i], lows[i], highs[i - 1], lows[i - 1]
+        high_diff = high - prev_high
+        low_diff = prev_low - low
+        if high_diff > low_diff and high_diff > 0:
+            plus_dm[i - 1] = high_diff
+        if low_diff > high_diff and low_diff > 0:
+            minus_dm[i - 1] = low_diff
+        true_ranges[i - 1] = max(high - low, abs(high_diff), abs(low_diff))
+
+    avg_plus = wilder_series(plus_dm, period)
+    avg_minus = wilder_series(minus_dm, period)
+    avg_tr = wilder_series(true_ranges, period)
+    di_plus = []
+    di_minus = []
+    for plus, minus, tr in zip(avg_plus, avg_minus, avg_tr):
+        if tr == 0:
+            di_plus.append(0)
+            di_minus.append(0)
+        else:
+            di_plus.append((plus / tr) * 100)
+            di_minus.append((minus / tr) * 100)
+    return {"+DI": di_plus, "-DI": di_minus}
+
+def macd_series(closes: Sequence[float], fast_period: int = 12, slow_period: int = 26, signal_period: int = 9) -> Dict[str, List[float]]:
+    """MACD line, signal line (EMA of MACD) and histogram"""
+    if len(closes) < slow_period:
+        return {"macd": [], "signal": [], "histogram": []}
+    fast_ema = ema_series(closes, fast_period)
+    slow_ema = ema_series(closes, slow_period)
+    macd_line = [fast - slow for fast, slow in zip(fast_ema, slow_ema)]
+    if len(macd_line) < signal_period:
+        return {"macd": macd_line, "signal": [], "histogram": []}
+    signal_line = ema_series(macd_line, signal_period)
+    histogram = [macd - signal for macd, signal in zip(macd_line, signal_line)]
+    return {"macd": macd_line, "signal": signal_line, "histogram": histogram}
+
+def bollinger_series(closes: Sequence[float], period: int = 20, std_dev: float = 2.0) -> Dict[str, List[float]]:
+    """Bollinger Bands (population standard deviation over each window)"""
+    middle = sma_series(closes, period)
+    if not middle:
+        return {"upper": [], "middle": [], "lower": []}
+    stds = rolling_std(closes, period, middle)
+    return {
+        "upper": [mean + std_dev * std for mean, std in zip(middle, stds)],
+        "middle": middle,
+        "lower": [mean - std_dev * std for mean, std in zip(middle, stds)]
+    }
+
+def stochastic_series(highs: Sequence[float], lows: Sequence[float], closes: Sequence[float],
+                      k_period: int = 14, d_period: int = 3) -> Dict[str, List[float]]:
+    """Stochastic %K and %D (SMA of %K)"""
+    highest = rolling_max(highs, k_period)
+    if not highest:
+        return {"%K": [], "%D": []}
+    lowest = rolling_min(lows, k_period)
+    k_values = []
+    for i, (highest_high, lowest_low) in enumerate(zip(highest, lowest)):
+        if highest_high == lowest_low:
+            k_values.append(50)  # Neutral when no range
+        else:
+            k_values.append(((closes[i + k_period - 1] - lowest_low) / (highest_high - lowest_low)) * 100)
+    return {"%K": k_values, "%D": sma_series(k_values, d_period)}
+
 class TechnicalIndicators:
     """Collection of technical indicators for trading strategies"""
-    
+
     @staticmethod
     def calculate_rsi(ticks: List[MarketDataTick], period: int = 14) -> List[float]:
         """Calculate RSI (Relative Strength Index)"""
         try:
             if len(ticks) < period + 1:
                 return []
-            
-            closes = [tick.ltp for tick in ticks]
-            gains = []
-            losses = []
-            
-            # Calculate price changes
-            for i in range(1, len(closes)):
-                change = closes[i] - closes[i-1]
-                gains.append(max(change, 0))
-                losses.append(max(-change, 0))
-            
-            if len(gains) < period:
-                return []
-            
-            # Calculate initial average gains and losses
-            avg_gain = sum(gains[:period]) / period
-            avg_loss = sum(losses[:period]) / period
-            
-            rsi_values = []
-            
-            # Calculate RSI for remaining periods
-            for i in range(period, len(gains)):
-                if avg_loss == 0:
-                    rsi = 100
-                else:
-                    rs = avg_gain / avg_loss
-                    rsi = 100 - (100 / (1 + rs))
-                rsi_values.append(rsi)
-                
-                # Update averages using Wilder's smoothing
-                avg_gain = (avg_gain * (period - 1) + gains[i]) / period
-                avg_loss = (avg_loss * (period - 1) + losses[i]) / period
-            
-            return rsi_values
-            
+
+            if _use_vectorized(ticks):
+                closes, = vectorized.tick_columns(ticks, 'ltp')
+                return vectorized.calculate_rsi(closes, period).tolist()
+
+            return rsi_series(_column(ticks, 'ltp'), period)
+
         except Exception as e:
             logger.error(f"❌ Error calculating RSI: {e}")
             return []
-    
+
     @staticmethod
     def calculate_dmi(ticks: List[MarketDataTick], period: int = 14) -> Dict[str, List[float]]:
         """Calculate DMI (Directional Movement Index)"""
         try:
             if len(ticks) < period + 1:
                 return {"+DI": [], "-DI": []}
-            
-            highs = [tick.high for tick in ticks]
-            lows = [tick.low for tick in ticks]
-            
-            plus_dm = []
-            minus_dm = []
-            true_ranges = []
-            
-            # Calculate directional movement and true range
-            for i in range(1, len(ticks)):
-                high_diff = highs[i] - highs[i-1]
-                low_diff = lows[i-1] - lows[i]
-                
-                # Plus DM
-                if high_diff > low_diff and high_diff > 0:
-                    plus_dm.append(high_diff)
-                else:
-                    plus_dm.append(0)
-                
-                # Minus DM
-                if low_diff > high_diff and low_diff > 0:
-                    minus_dm.append(low_diff)
-                else:
-                    minus_dm.append(0)
-                
-                # True Range
-                tr1 = highs[i] - lows[i]
-                tr2 = abs(highs[i] - highs[i-1])
-                tr3 = abs(lows[i] - lows[i-1])
-                true_ranges.append(max(tr1, tr2, tr3))
-            
-            if len(plus_dm) < period:
-                return {"+DI": [], "-DI": []}
-            
-            # Calculate smoothed averages
-            avg_plus_dm = sum(plus_dm[:period]) / period
-            avg_minus_dm = sum(minus_dm[:period]) / period
-            avg_tr = sum(true_ranges[:period]) / period
-            
-            di_plus_values = []
-            di_minus_values = []
-            
-            # Calculate DI values
-            for i in range(period, len(plus_dm)):
-                if avg_tr == 0:
-                    di_plus = 0
-                    di_minus = 0
-                else:
-                    di_plus = (avg_plus_dm / avg_tr) * 100
-                    di_minus = (avg_minus_dm / avg_tr) * 100
-                
-                di_plus_values.append(di_plus)
-                di_minus_values.append(di_minus)
-                
-                # Update averages using Wilder's smoothing
-                avg_plus_dm = (avg_plus_dm * (period - 1) + plus_dm[i]) / period
-                avg_minus_dm = (avg_minus_dm * (period - 1) + minus_dm[i]) / period
-                avg_tr = (avg_tr * (period - 1) + true_ranges[i]) / period
-            
-            return {
-                "+DI": di_plus_values,
-                "-DI": di_minus_values
-            }
-            
+
+            if _use_vectorized(ticks):
+                highs, lows = vectorized.tick_columns(ticks, 'high', 'low')
+                return _to_lists(vectorized.calculate_dmi(highs, lows, period))
+
+            return dmi_series(_column(ticks, 'high'), _column(ticks, 'low'), period)
+
         except Exception as e:
             logger.error(f"❌ Error calculating DMI: {e}")
             return {"+DI": [], "-DI": []}
-    
+
     @staticmethod
     def calculate_sma(ticks: List[MarketDataTick], period: int) -> List[float]:
         """Calculate Simple Moving Average"""
         try:
             if len(ticks) < period:
                 return []
-            
-            closes = [tick.ltp for tick in ticks]
-            sma_values = []
-            
-            for i in range(period - 1, len(closes)):
-                sma = sum(closes[i - period + 1:i + 1]) / period
-                sma_values.append(sma)
-            
-            return sma_values
-            
+
+            if _use_vectorized(ticks):
+                closes, = vectorized.tick_columns(ticks, 'ltp')
+                return vectorized.calculate_sma(closes, period).tolist()
+
+            return sma_series(_column(ticks, 'ltp'), period)
+
         except Exception as e:
             logger.error(f"❌ Error calculating SMA: {e}")
             return []
-    
+
     @staticmethod
     def calculate_ema(ticks: List[MarketDataTick], period: int) -> List[float]:
         """Calculate Exponential Moving Average"""
         try:
             if len(ticks) < period:
                 return []
-            
-            closes = [tick.ltp for tick in ticks]
-            ema_values = []
-            
-            # Calculate smoothing factor
-            multiplier = 2 / (period + 1)
-            
-            # First EMA is SMA
-            first_sma = sum(closes[:period]) / period
-            ema_values.append(first_sma)
-            
-            # Calculate subsequent EMAs
-            for i in range(period, len(closes)):
-                ema = (closes[i] * multiplier) + (ema_values[-1] * (1 - multiplier))
-                ema_values.append(ema)
-            
-            return ema_values
-            
+
+            if _use_vectorized(ticks):
+                closes, = vectorized.tick_columns(ticks, 'ltp')
+                return vectorized.calculate_ema(closes, period).tolist()
+
+            return ema_series(_column(ticks, 'ltp'), period)
+
         except Exception as e:
             logger.error(f"❌ Error calculating EMA: {e}")
             return []
-    
+
     @staticmethod
     def calculate_bollinger_bands(ticks: List[MarketDataTick], period: int = 20, std_dev: float = 2.0) -> Dict[str, List[float]]:
         """Calculate Bollinger Bands"""
         try:
             if len(ticks) < period:
                 return {"upper": [], "middle": [], "lower": []}
-            
-            closes = [tick.ltp for tick in ticks]
-            sma_values = TechnicalIndicators.calculate_sma(ticks, period)
-            
-            upper_band = []
-            lower_band = []
-            
-            for i in range(period - 1, len(closes)):
-                # Calculate standard deviation for this period
-                period_closes = closes[i - period + 1:i + 1]
-                mean = sum(period_closes) / len(period_closes)
-                variance = sum((x - mean) ** 2 for x in period_closes) / len(period_closes)
-                std = variance ** 0.5
-                
-                sma = sma_values[i - period + 1]
-                upper_band.append(sma + (std_dev * std))
-                lower_band.append(sma - (std_dev * std))
-            
-            return {
-                "upper": upper_band,
-                "middle": sma_values,
-                "lower": lower_band
-            }
-            
+
+            if _use_vectorized(ticks):
+                closes, = vectorized.tick_columns(ticks, 'ltp')
+                return _to_lists(vectorized.calculate_bollinger_bands(closes, period, std_dev))
+
+            return bollinger_series(_column(ticks, 'ltp'), period, std_dev)
+
         except Exception as e:
             logger.error(f"❌ Error calculating Bollinger Bands: {e}")
             return {"upper": [], "middle": [], "lower": []}
-    
+
     @staticmethod
     def calculate_macd(ticks: List[MarketDataTick], fast_period: int = 12, slow_period: int = 26, signal_period: int = 9) -> Dict[str, List[float]]:
         """Calculate MACD (Moving Average Convergence Divergence)"""
         try:
             if len(ticks) < slow_period:
                 return {"macd": [], "signal": [], "histogram": []}
-            
-            closes = [tick.ltp for tick in ticks]
-            
-            # Calculate EMAs
-            fast_ema = TechnicalIndicators.calculate_ema(ticks, fast_period)
-            slow_ema = TechnicalIndicators.calculate_ema(ticks, slow_period)
-            
-            # Calculate MACD line
-            macd_line = []
-            min_length = min(len(fast_ema), len(slow_ema))
-            
-            for i in range(min_length):
-                macd_line.append(fast_ema[i] - slow_ema[i])
-            
-            # Calculate signal line (EMA of MACD)
-            if len(macd_line) < signal_period:
-                return {"macd": macd_line, "signal": [], "histogram": []}
-            
-            # Create temporary ticks for signal line calculation
-            macd_ticks = []
-            for i, macd_value in enumerate(macd_line):
-                # Create a dummy tick with MACD value as price
-                tick = MarketDataTick(
-                    symbol="MACD",
-                    token="",
-                    ltp=macd_value,
-                    change=0,
-                    change_percent=0,
-                    high=macd_value,
-                    low=macd_value,
-                    volume=0,
-                    bid=macd_value,
-                    ask=macd_value,
-                    open=macd_value,
-                    close=macd_value,
-                    timestamp=ticks[i].timestamp,
-                    exchange_timestamp=ticks[i].exchange_timestamp
-                )
-                macd_ticks.append(tick)
-            
-            signal_line = TechnicalIndicators.calculate_ema(macd_ticks, signal_period)
-            
-            # Calculate histogram
-            histogram = []
-            min_signal_length = min(len(macd_line), len(signal_line))
-            
-            for i in range(min_signal_length):
-                histogram.append(macd_line[i] - signal_line[i])
-            
-            return {
-                "macd": macd_line,
-                "signal": signal_line,
-                "histogram": histogram
-            }
-            
+
+            if _use_vectorized(ticks):
+                closes, = vectorized.tick_columns(ticks, 'ltp')
+                return _to_lists(vectorized.calculate_macd(closes, fast_period, slow_period, signal_period))
+
+            return macd_series(_column(ticks, 'ltp'), fast_period, slow_period, signal_period)
+
         except Exception as e:
             logger.error(f"❌ Error calculating MACD: {e}")
             return {"macd": [], "signal": [], "histogram": []}
-    
+
     @staticmethod
     def calculate_stochastic(ticks: List[MarketDataTick], k_period: int = 14, d_period: int = 3) -> Dict[str, List[float]]:
         """Calculate Stochastic Oscillator"""
         try:
             if len(ticks) < k_period:
                 return {"%K": [], "%D": []}
-            
-            k_values = []
-            
-            for i in range(k_period - 1, len(ticks)):
-                # Get high and low for the period
-                period_highs = [ticks[j].high for j in range(i - k_period + 1, i + 1)]
-                period_lows = [ticks[j].low for j in range(i - k_period + 1, i + 1)]
-                
-                highest_high = max(period_highs)
-                lowest_low = min(period_lows)
-                current_close = ticks[i].ltp
-                
-                if highest_high == lowest_low:
-                    k_value = 50  # Neutral when no range
-                else:
-                    k_value = ((current_close - lowest_low) / (highest_high - lowest_low)) * 100
-                
-                k_values.append(k_value)
-            
-            # Calculate %D (SMA of %K)
-            d_values = []
-            if len(k_values) >= d_period:
-                for i in range(d_period - 1, len(k_values)):
-                    d_value = sum(k_values[i - d_period + 1:i + 1]) / d_period
-                    d_values.append(d_value)
-            
-            return {
-                "%K": k_values,
-                "%D": d_values
-            }
-            
+
+            if _use_vectorized(ticks):
+                highs, lows, closes = vectorized.tick_columns(ticks, 'high', 'low', 'ltp')
+                return _to_lists(vectorized.calculate_stochastic(highs, lows, closes, k_period, d_period))
+
+            return stochastic_series(_column(ticks, 'high'), _column(ticks, 'low'), _column(ticks, 'ltp'),
+                                     k_period, d_period)
+
         except Exception as e:
             logger.error(f"❌ Error calculating Stochastic: {e}")
             return {"%K": [], "%D": []}
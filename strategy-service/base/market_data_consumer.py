@@ -5,31 +5,181 @@ import asyncio
 import logging
 import os
 import json
+import socket
+import time
 from datetime import datetime
-from typing import Dict, List, Optional, Callable, Any
+from typing import Dict, List, Optional, Callable, Any, Tuple
 import redis.asyncio as redis
-from shared.models import MarketDataTick
+from shared.models import Bar, MarketDataTick
 from shared.timezone import get_ist_now, get_ist_timestamp
+from shared.tick_store import TickStore, TickWindow, datetime_to_ns
+from shared.tick_codec import TickDecodeError, decode_fields
+from shared.tick_archive import TickArchive, day_of, iter_ticks
+from base.bar_builder import BarBuilder
 
 logger = logging.getLogger(__name__)
 
+# Ticks of history loaded per symbol before live consumption (0 disables warm-up)
+WARMUP_TICKS = int(os.getenv('WARMUP_TICKS', '1000'))
+# Tick recorder directory used when the streams hold fewer than WARMUP_TICKS
+WARMUP_ARCHIVE_DIR = os.getenv('WARMUP_ARCHIVE_DIR', '')
+# Most recent recorded days searched for older ticks
+WARMUP_ARCHIVE_DAYS = int(os.getenv('WARMUP_ARCHIVE_DAYS', '3'))
+# Symbols per XREVRANGE pipeline (pipelines run concurrently)
+WARMUP_PIPELINE_SYMBOLS = int(os.getenv('WARMUP_PIPELINE_SYMBOLS', '50'))
+
+# "group" (XREADGROUP, at-least-once) or "stream" (plain XREAD, no acks or PEL)
+CONSUMER_READ_MODE = os.getenv('CONSUMER_READ_MODE', 'group')
+# Entries read per stream per call; adapts between the bounds with the backlog
+CONSUMER_BATCH_MIN = int(os.getenv('CONSUMER_BATCH_MIN', '10'))
+CONSUMER_BATCH_MAX = int(os.getenv('CONSUMER_BATCH_MAX', '1000'))
+CONSUMER_BLOCK_MS = int(os.getenv('CONSUMER_BLOCK_MS', '1000'))
+# Window over which per-stream throughput is measured
+STREAM_RATE_WINDOW = float(os.getenv('STREAM_RATE_WINDOW', '10'))
+
+# Consumer name in the group; stable across restarts (default: the host name)
+CONSUMER_NAME = os.getenv('CONSUMER_NAME', '')
+# Seconds between pending-entry recovery passes
+CONSUMER_CLAIM_INTERVAL = float(os.getenv('CONSUMER_CLAIM_INTERVAL', '30'))
+# Entries pending on another consumer this long are claimed
+CONSUMER_CLAIM_IDLE_MS = int(os.getenv('CONSUMER_CLAIM_IDLE_MS', '60000'))
+# Entries claimed per XAUTOCLAIM call
+CONSUMER_CLAIM_COUNT = int(os.getenv('CONSUMER_CLAIM_COUNT', '500'))
+# Consumers with nothing pending and idle this long are deleted from the group
+CONSUMER_REAP_IDLE_MS = int(os.getenv('CONSUMER_REAP_IDLE_MS', '600000'))
+
+
+def _stream_id(message_id) -> Tuple[int, int]:
+    """Redis stream entry id as a comparable (milliseconds, sequence) pair"""
+    if isinstance(message_id, bytes):
+        message_id = message_id.decode()
+    milliseconds, _, sequence = message_id.partition('-')
+    return int(milliseconds), int(sequence or 0)
+
+
+class _StreamStats:
+    """Throughput and lag of one stream"""
+    
+    __slots__ = ("messages", "batches", "lag_ms", "max_lag_ms", "rate", "_window_start", "_window_messages")
+    
+    def __init__(self):
+        self.messages = 0
+        self.batches = 0
+        self.lag_ms = 0
+        self.max_lag_ms = 0
+        self.rate = 0.0
+        self._window_start = time.monotonic()
+        self._window_messages = 0
+    
+    def record(self, count: int, last_id, now: float):
+        """Account for a batch of count entries ending at last_id"""
+        self.messages += count
+        self.batches += 1
+        # Entry ids carry the XADD time in milliseconds
+        self.lag_ms = max(0, int(time.time() * 1000) - _stream_id(last_id)[0])
+        self.max_lag_ms = max(self.max_lag_ms, self.lag_ms)
+        self._window_messages += count
+        elapsed = now - self._window_start
+        if elapsed >= STREAM_RATE_WINDOW:
+            self.rate = self._window_messages / elapsed
+            self._window_start = now
+            self._window_messages = 0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        # An idle stream has no batches to close its window
+        elapsed = time.monotonic() - self._window_start
+        rate = self._window_messages / elapsed if elapsed >= STREAM_RATE_WINDOW else self.rate
+        return {
+            "messages": self.messages,
+            "batches": self.batches,
+            "messages_per_second": round(rate, 1),
+            "lag_ms": self.lag_ms,
+            "max_lag_ms": self.max_lag_ms
+        }
+
 class MarketDataConsumer:
-    """Redis Stream consumer for market data with auto-reconnect"""
+    """
+    Redis Stream consumer for market data with auto-reconnect
+    
+    The consumer is the single owner of tick history in a strategy process.
+    Several strategies can share one consumer (and one Redis connection):
+    each registers a tick handler for its symbols and reads history through
+    zero-copy views from ``get_historical_buffer``.
+    
+    In ``group`` read mode entries are read through the consumer group and
+    acknowledged in one pipelined multi-id XACK per stream per batch. The
+    ``stream`` mode reads with plain XREAD from the last id seen, for
+    consumers that don't need at-least-once delivery.
+    
+    The consumer name is stable across restarts (``CONSUMER_NAME`` or the
+    host name), so a restarted replica first re-reads the entries it left
+    unacknowledged. Replicas on the same group split the entries between
+    them; a recovery task claims entries left pending by replicas that are
+    gone and deletes consumers that stay idle with nothing pending.
+    """
+    
+    # Consumers created per group in this process (later ones get a suffix)
+    _names_in_use: Dict[str, int] = {}
     
-    def __init__(self, redis_url: str, consumer_group: str = "strategy_consumers"):
+    def __init__(self, redis_url: str, consumer_group: str = "strategy_consumers", redis_client=None,
+                 read_mode: str = CONSUMER_READ_MODE, consumer_name: Optional[str] = None):
+        if read_mode not in ("group", "stream"):
+            raise ValueError(f"Unknown read mode {read_mode} (expected 'group' or 'stream')")
         self.redis_url = redis_url
         self.consumer_group = consumer_group
-        self.consumer_name = f"consumer_{os.getpid()}_{id(self)}"
-        self.redis_client = None
+        self.read_mode = read_mode
+        if consumer_name is None:
+            index = MarketDataConsumer._names_in_use.get(consumer_group, 0)
+            MarketDataConsumer._names_in_use[consumer_group] = index + 1
+            consumer_name = CONSUMER_NAME or socket.gethostname()
+            if index:
+                consumer_name = f"{consumer_name}-{index}"
+        self.consumer_name = consumer_name
+        self.redis_client = redis_client
+        self._owns_client = redis_client is None
         self.running = False
-        self.tick_handler: Optional[Callable[[MarketDataTick], None]] = None
-        self.market_data_buffer: Dict[str, List[MarketDataTick]] = {}
+        self.symbols: List[str] = []
+        # Strategies consuming each symbol; streams are dropped at zero
+        self._symbol_refs: Dict[str, int] = {}
+        self._consume_task: Optional[asyncio.Task] = None
+        self._recovery_task: Optional[asyncio.Task] = None
+        self._all_symbol_handlers: List[Callable[[MarketDataTick], None]] = []
+        self._symbol_handlers: Dict[str, List[Callable[[MarketDataTick], None]]] = {}
         self.max_buffer_size = 1000  # Keep last 1000 ticks per symbol
+        self.tick_store = TickStore(capacity=self.max_buffer_size)
+        self.latest_ticks: Dict[str, MarketDataTick] = {}
+        self.messages_processed = 0
+        
+        # Adaptive read size, throughput/lag per stream and the last id read
+        # from each stream (where stream mode continues from)
+        self.batch_size = CONSUMER_BATCH_MIN
+        self.acks_sent = 0
+        self.stream_stats: Dict[str, _StreamStats] = {}
+        self._last_ids: Dict[str, str] = {}
+        
+        # Pending-entry recovery
+        self.recovery_stats: Dict[str, int] = {
+            "own_pending_recovered": 0, "claimed": 0, "stale_skipped": 0,
+            "deleted_entries": 0, "consumers_reaped": 0
+        }
+        
+        # Bar aggregation, one builder per interval in use
+        self.bar_builders: Dict[str, BarBuilder] = {}
+        self._bar_handlers: Dict[str, Dict[str, List[Callable[[Bar], None]]]] = {}
+        
+        # Newest entry loaded by warm-up per stream; the group may deliver it
+        # (and older entries) again, and those are skipped
+        self._warmed_until: Dict[str, Tuple[int, int]] = {}
+        self.warmup_stats: Dict[str, Any] = {
+            "symbols": 0, "ticks_from_stream": 0, "ticks_from_archive": 0,
+            "duplicates_skipped": 0, "seconds": 0.0
+        }
         
     async def connect(self):
-        """Connect to Redis"""
+        """Connect to Redis (no-op if already connected or given a shared client)"""
         try:
-            self.redis_client = redis.from_url(self.redis_url)
+            if self.redis_client is None:
+                self.redis_client = redis.from_url(self.redis_url)
             await self.redis_client.ping()
             logger.info(f"✅ Redis connected for consumer {self.consumer_name}")
             return True
@@ -38,27 +188,94 @@ class MarketDataConsumer:
             return False
     
     async def disconnect(self):
-        """Disconnect from Redis"""
-        if self.redis_client:
+        """Disconnect from Redis (a shared client is left open for its owner)"""
+        if self.redis_client and self._owns_client:
             await self.redis_client.close()
+            self.redis_client = None
             logger.info("✅ Redis disconnected")
     
     def set_tick_handler(self, handler: Callable[[MarketDataTick], None]):
-        """Set the tick data handler"""
-        self.tick_handler = handler
+        """Set the tick data handler (replaces handlers registered for all symbols)"""
+        self._all_symbol_handlers = [handler]
+    
+    def add_tick_handler(self, handler: Callable[[MarketDataTick], None], symbols: Optional[List[str]] = None):
+        """Register a tick handler for the given symbols (all symbols if None)"""
+        if symbols is None:
+            if handler not in self._all_symbol_handlers:
+                self._all_symbol_handlers.append(handler)
+            return
+        
+        for symbol in symbols:
+            handlers = self._symbol_handlers.setdefault(symbol, [])
+            if handler not in handlers:
+                handlers.append(handler)
+    
+    def remove_tick_handler(self, handler: Callable[[MarketDataTick], None]):
+        """Unregister a tick handler from every symbol"""
+        if handler in self._all_symbol_handlers:
+            self._all_symbol_handlers.remove(handler)
+        for symbol in list(self._symbol_handlers):
+            handlers = self._symbol_handlers[symbol]
+            if handler in handlers:
+                handlers.remove(handler)
+            if not handlers:
+                del self._symbol_handlers[symbol]
+    
+    def add_bar_handler(self, handler: Callable[[Bar], None], symbols: List[str], interval: str):
+        """Register a handler called with each closed bar of the given interval"""
+        if interval not in self.bar_builders:
+            self.bar_builders[interval] = BarBuilder(interval, history_size=self.max_buffer_size)
+            self._bar_handlers[interval] = {}
+        
+        for symbol in symbols:
+            handlers = self._bar_handlers[interval].setdefault(symbol, [])
+            if handler not in handlers:
+                handlers.append(handler)
+    
+    def remove_bar_handler(self, handler: Callable[[Bar], None]):
+        """Unregister a bar handler from every interval and symbol"""
+        for by_symbol in self._bar_handlers.values():
+            for symbol in list(by_symbol):
+                handlers = by_symbol[symbol]
+                if handler in handlers:
+                    handlers.remove(handler)
+                if not handlers:
+                    del by_symbol[symbol]
+    
+    @property
+    def tick_handler(self) -> Optional[Callable[[MarketDataTick], None]]:
+        """First handler registered for all symbols (kept for backward compatibility)"""
+        return self._all_symbol_handlers[0] if self._all_symbol_handlers else None
     
     async def start_consuming(self, symbols: List[str]):
-        """Start consuming market data for given symbols"""
+        """
+        Start consuming market data for given symbols
+        
+        Returns once the consumer groups exist; messages are read by a
+        background task. Calling it again (e.g. from another strategy sharing
+        this consumer) adds the new symbols to the running loop.
+        """
         if not self.redis_client:
             logger.error("❌ Not connected to Redis")
             return False
         
-        self.running = True
-        logger.info(f"🚀 Starting to consume market data for {len(symbols)} symbols: {symbols}")
+        for symbol in dict.fromkeys(symbols):
+            self._symbol_refs[symbol] = self._symbol_refs.get(symbol, 0) + 1
+        new_symbols = [symbol for symbol in dict.fromkeys(symbols) if symbol not in self.symbols]
+        if new_symbols:
+            logger.info(f"🚀 Starting to consume market data for {len(new_symbols)} symbols: {new_symbols}")
+            await self.warm_up(new_symbols)
+        
+        if self.read_mode == "stream":
+            await self._init_last_ids(new_symbols)
         
         # Create consumer group for each symbol stream
-        for symbol in symbols:
+        joined = []
+        for symbol in new_symbols:
             stream_name = f"market_data_stream:{symbol}"
+            if self.read_mode == "stream":
+                self.symbols.append(symbol)
+                continue
             try:
                 # Create consumer group (ignore if already exists)
                 await self.redis_client.xgroup_create(
@@ -73,74 +290,453 @@ class MarketDataConsumer:
                     logger.info(f"✅ Consumer group already exists for {stream_name}")
                 else:
                     logger.error(f"❌ Error creating consumer group for {stream_name}: {e}")
+            joined.append(symbol)
+        
+        # Entries this consumer read before a restart come before new ones
+        if joined:
+            await self._recover_own_pending([f"market_data_stream:{symbol}" for symbol in joined])
+            self.symbols.extend(joined)
         
         # Start consuming loop
-        await self._consume_loop(symbols)
+        self.running = True
+        if self._consume_task is None or self._consume_task.done():
+            self._consume_task = asyncio.create_task(self._consume_loop())
+        if self.read_mode == "group" and (self._recovery_task is None or self._recovery_task.done()):
+            self._recovery_task = asyncio.create_task(self._recovery_loop())
+        return True
+    
+    async def _init_last_ids(self, symbols: List[str]):
+        """Start XREAD after the newest entry of each stream (or the warmed-up one)"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        for symbol in symbols:
+            pipe.xrevrange(f"market_data_stream:{symbol}", "+", "-", count=1)
+        try:
+            responses = await pipe.execute()
+        except Exception as e:
+            logger.error(f"❌ Error reading stream positions: {e}")
+            responses = [[] for _ in symbols]
+        
+        for symbol, entries in zip(symbols, responses):
+            stream_name = f"market_data_stream:{symbol}"
+            warmed_until = self._warmed_until.pop(stream_name, None)
+            if warmed_until is not None:
+                self._last_ids[stream_name] = f"{warmed_until[0]}-{warmed_until[1]}"
+            elif entries:
+                last_id = entries[0][0]
+                self._last_ids[stream_name] = last_id.decode() if isinstance(last_id, bytes) else last_id
+            else:
+                self._last_ids[stream_name] = "0-0"
     
-    async def _consume_loop(self, symbols: List[str]):
+    async def _consume_loop(self):
         """Main consumption loop"""
         while self.running:
             try:
-                # Read from all symbol streams
-                stream_names = [f"market_data_stream:{symbol}" for symbol in symbols]
+                # Read from all symbol streams (symbols may be added while running)
+                stream_names = [f"market_data_stream:{symbol}" for symbol in self.symbols]
+                if not stream_names:
+                    # Every symbol was removed; wait for new ones
+                    await asyncio.sleep(CONSUMER_BLOCK_MS / 1000)
+                    continue
                 
-                # Read new messages
-                messages = await self.redis_client.xreadgroup(
-                    self.consumer_group,
-                    self.consumer_name,
-                    {stream_name: ">" for stream_name in stream_names},
-                    count=10,
-                    block=1000  # Block for 1 second
-                )
+                if self.read_mode == "group":
+                    messages = await self.redis_client.xreadgroup(
+                        self.consumer_group,
+                        self.consumer_name,
+                        {stream_name: ">" for stream_name in stream_names},
+                        count=self.batch_size,
+                        block=CONSUMER_BLOCK_MS
+                    )
+                else:
+                    messages = await self.redis_client.xread(
+                        {stream_name: self._last_ids.get(stream_name, "$") for stream_name in stream_names},
+                        count=self.batch_size,
+                        block=CONSUMER_BLOCK_MS
+                    )
+                
+                await self._process_batch(messages or [])
                 
-                for stream_name, stream_messages in messages:
-                    for message_id, fields in stream_messages:
-                        await self._process_message(stream_name, message_id, fields)
+                # Close bars for symbols that have gone quiet
+                self.flush_bars()
                         
             except Exception as e:
                 logger.error(f"❌ Error in consume loop: {e}")
                 await asyncio.sleep(5)  # Wait before retrying
     
-    async def _process_message(self, stream_name: str, message_id: str, fields: Dict):
-        """Process a market data message"""
-        try:
-            # Convert bytes to strings if needed
-            processed_fields = {}
-            for key, value in fields.items():
-                if isinstance(key, bytes):
-                    key = key.decode()
-                if isinstance(value, bytes):
-                    value = value.decode()
-                processed_fields[key] = value
+    async def _process_batch(self, messages: List, recovered: bool = False):
+        """
+        Process one read, acknowledge it and resize the next read
+        
+        recovered batches (claimed from other consumers) don't resize reads,
+        and entries older than what the stream already delivered are
+        acknowledged without being processed: the tick history has moved on.
+        """
+        now = time.monotonic()
+        acks: Dict[Any, List] = {}
+        largest = 0
+        for stream_name, stream_messages in messages:
+            if not stream_messages:
+                continue
+            name = stream_name.decode() if isinstance(stream_name, bytes) else stream_name
+            ids = acks.setdefault(stream_name, [])
+            if recovered and name in self._last_ids:
+                newest = _stream_id(self._last_ids[name])
+                stale = [entry for entry in stream_messages if _stream_id(entry[0]) <= newest]
+                if stale:
+                    ids.extend(message_id for message_id, _ in stale)
+                    self.recovery_stats["stale_skipped"] += len(stale)
+                    stream_messages = stream_messages[len(stale):]
+                    if not stream_messages:
+                        continue
+            largest = max(largest, len(stream_messages))
+            for message_id, fields in stream_messages:
+                # Entries trimmed from the stream come back without fields
+                if not fields:
+                    ids.append(message_id)
+                    self.recovery_stats["deleted_entries"] += 1
+                elif self._process_message(stream_name, message_id, fields):
+                    ids.append(message_id)
             
-            # Parse the tick data
-            tick = self._parse_tick_data(processed_fields)
-            if not tick:
+            last_id = stream_messages[-1][0]
+            self._last_ids[name] = last_id.decode() if isinstance(last_id, bytes) else last_id
+            stats = self.stream_stats.get(name)
+            if stats is None:
+                stats = self.stream_stats[name] = _StreamStats()
+            stats.record(len(stream_messages), last_id, now)
+        
+        if self.read_mode == "group":
+            await self._ack(acks)
+        
+        # A full batch means a backlog: read more per call until it drains;
+        # mostly-empty batches shrink back to keep per-read latency low
+        if recovered:
+            return
+        if largest >= self.batch_size:
+            self.batch_size = min(self.batch_size * 2, CONSUMER_BATCH_MAX)
+        elif largest < self.batch_size // 4:
+            self.batch_size = max(self.batch_size // 2, CONSUMER_BATCH_MIN)
+    
+    async def _ack(self, acks: Dict[Any, List]):
+        """One multi-id XACK per stream, sent in a single pipeline"""
+        if not any(acks.values()):
+            return
+        pipe = self.redis_client.pipeline(transaction=False)
+        for stream_name, ids in acks.items():
+            if ids:
+                pipe.xack(stream_name, self.consumer_group, *ids)
+        try:
+            await pipe.execute()
+            self.acks_sent += sum(len(ids) for ids in acks.values())
+        except Exception as e:
+            # Left pending in the group and delivered again on claim
+            logger.error(f"❌ Error acknowledging messages: {e}")
+    
+    async def _recover_own_pending(self, stream_names: List[str]):
+        """Re-read entries delivered to this consumer name but never acknowledged"""
+        if self.read_mode != "group":
+            return
+        # Pending entries stay pending until acknowledged, so each stream is
+        # read onwards from the last id returned until it comes back empty
+        cursors = {stream_name: "0" for stream_name in stream_names}
+        recovered = 0
+        while cursors:
+            try:
+                response = await self.redis_client.xreadgroup(
+                    self.consumer_group, self.consumer_name, cursors, count=CONSUMER_BATCH_MAX
+                )
+            except Exception as e:
+                logger.error(f"❌ Error reading pending entries: {e}")
                 return
+            exhausted = set(cursors)
+            for stream_name, stream_messages in response or []:
+                name = stream_name.decode() if isinstance(stream_name, bytes) else stream_name
+                if stream_messages:
+                    exhausted.discard(name)
+                    cursors[name] = stream_messages[-1][0]
+                    recovered += len(stream_messages)
+            for name in exhausted:
+                del cursors[name]
+            await self._process_batch(response or [])
+        if recovered:
+            self.recovery_stats["own_pending_recovered"] += recovered
+            logger.info(f"♻️ Recovered {recovered} unacknowledged entries for {self.consumer_name}")
+    
+    async def _recovery_loop(self):
+        """Periodically claim entries stuck on dead consumers and reap idle consumers"""
+        while self.running:
+            await asyncio.sleep(CONSUMER_CLAIM_INTERVAL)
+            try:
+                await self.recover_pending()
+            except Exception as e:
+                logger.error(f"❌ Error in recovery loop: {e}")
+    
+    async def recover_pending(self, min_idle_ms: int = CONSUMER_CLAIM_IDLE_MS,
+                              reap_idle_ms: int = CONSUMER_REAP_IDLE_MS) -> Dict[str, int]:
+        """
+        One recovery pass over this consumer's streams
+        
+        Entries pending on any consumer for at least min_idle_ms are claimed
+        with XAUTOCLAIM (pipelined across streams, repeated while a stream has
+        more) and processed; then consumers idle for reap_idle_ms with nothing
+        pending are deleted from the group.
+        """
+        cursors = {f"market_data_stream:{symbol}": "0-0" for symbol in self.symbols}
+        claimed = 0
+        while cursors:
+            names = list(cursors)
+            pipe = self.redis_client.pipeline(transaction=False)
+            for stream_name in names:
+                pipe.xautoclaim(stream_name, self.consumer_group, self.consumer_name,
+                                min_idle_ms, cursors[stream_name], count=CONSUMER_CLAIM_COUNT)
+            responses = await pipe.execute(raise_on_error=False)
             
-            # Add to buffer
-            symbol = tick.symbol
-            if symbol not in self.market_data_buffer:
-                self.market_data_buffer[symbol] = []
-            
-            self.market_data_buffer[symbol].append(tick)
-            
-            # Keep buffer size manageable
-            if len(self.market_data_buffer[symbol]) > self.max_buffer_size:
-                self.market_data_buffer[symbol] = self.market_data_buffer[symbol][-self.max_buffer_size:]
+            batch = []
+            for stream_name, response in zip(names, responses):
+                if isinstance(response, Exception):
+                    logger.error(f"❌ Error claiming pending entries on {stream_name}: {response}")
+                    del cursors[stream_name]
+                    continue
+                next_id, messages = response[0], response[1]
+                if len(response) > 2:
+                    self.recovery_stats["deleted_entries"] += len(response[2])
+                if messages:
+                    batch.append((stream_name, messages))
+                    claimed += len(messages)
+                next_id = next_id.decode() if isinstance(next_id, bytes) else next_id
+                if next_id == "0-0":
+                    del cursors[stream_name]
+                else:
+                    cursors[stream_name] = next_id
+            await self._process_batch(batch, recovered=True)
+        if claimed:
+            self.recovery_stats["claimed"] += claimed
+            logger.info(f"♻️ Claimed {claimed} entries left pending by other consumers")
+        
+        await self._reap_consumers(reap_idle_ms)
+        return dict(self.recovery_stats)
+    
+    async def _reap_consumers(self, reap_idle_ms: int):
+        """Delete consumers idle for reap_idle_ms that own no pending entries"""
+        stream_names = [f"market_data_stream:{symbol}" for symbol in self.symbols]
+        pipe = self.redis_client.pipeline(transaction=False)
+        for stream_name in stream_names:
+            pipe.xinfo_consumers(stream_name, self.consumer_group)
+        responses = await pipe.execute(raise_on_error=False)
+        
+        pipe = self.redis_client.pipeline(transaction=False)
+        reaped = []
+        for stream_name, consumers in zip(stream_names, responses):
+            if isinstance(consumers, Exception):
+                continue
+            for consumer in consumers:
+                name = consumer["name"]
+                name = name.decode() if isinstance(name, bytes) else name
+                # Claiming drains a dead consumer's entries before it's deleted
+                if name != self.consumer_name and consumer["pending"] == 0 and consumer["idle"] >= reap_idle_ms:
+                    pipe.xgroup_delconsumer(stream_name, self.consumer_group, name)
+                    reaped.append(name)
+        if reaped:
+            await pipe.execute()
+            self.recovery_stats["consumers_reaped"] += len(reaped)
+            logger.info(f"🧹 Removed {len(reaped)} idle consumers from {self.consumer_group}: {sorted(set(reaped))}")
+    
+    def _process_message(self, stream_name: str, message_id: str, fields: Dict) -> bool:
+        """Process a market data message; True if it should be acknowledged"""
+        try:
+            if self._warmed_until and self._is_warmed(stream_name, message_id):
+                return True
             
-            # Call tick handler if set
-            if self.tick_handler:
-                try:
-                    self.tick_handler(tick)
-                except Exception as e:
-                    logger.error(f"❌ Error in tick handler: {e}")
+            # Decode the tick (compact binary or legacy field format)
+            tick = self._decode_message(fields)
+            if not tick:
+                # Won't decode on a retry either
+                return True
             
-            # Acknowledge the message
-            await self.redis_client.xack(stream_name, self.consumer_group, message_id)
+            self.ingest(tick)
+            return True
             
         except Exception as e:
             logger.error(f"❌ Error processing message {message_id}: {e}")
+            return False
+    
+    def _is_warmed(self, stream_name, message_id) -> bool:
+        """True for entries already loaded by warm-up"""
+        if isinstance(stream_name, bytes):
+            stream_name = stream_name.decode()
+        warmed_until = self._warmed_until.get(stream_name)
+        if warmed_until is None:
+            return False
+        if _stream_id(message_id) <= warmed_until:
+            self.warmup_stats["duplicates_skipped"] += 1
+            return True
+        # Entries arrive in id order, so nothing older follows
+        del self._warmed_until[stream_name]
+        return False
+    
+    async def warm_up(self, symbols: List[str], count: int = WARMUP_TICKS,
+                      archive_dir: str = WARMUP_ARCHIVE_DIR) -> Dict[str, Any]:
+        """
+        Load the last ``count`` ticks per symbol into the tick store and bar
+        builders before live consumption
+        
+        History comes from the streams (pipelined XREVRANGE, several pipelines
+        in flight at once) and, for symbols whose stream holds fewer ticks,
+        from the tick recorder's day files. Handlers are not called: strategies
+        prime their indicators from the loaded history instead, so old ticks
+        never trigger signals.
+        """
+        if count <= 0 or not symbols:
+            return self.warmup_stats
+        started = time.perf_counter()
+        
+        chunks = [symbols[i:i + WARMUP_PIPELINE_SYMBOLS] for i in range(0, len(symbols), WARMUP_PIPELINE_SYMBOLS)]
+        history: Dict[str, List[MarketDataTick]] = {}
+        for chunk_history in await asyncio.gather(*(self._read_stream_history(chunk, count) for chunk in chunks)):
+            history.update(chunk_history)
+        from_stream = sum(len(ticks) for ticks in history.values())
+        
+        from_archive = 0
+        short = [symbol for symbol in symbols if len(history.get(symbol, ())) < count]
+        if archive_dir and short and os.path.isdir(archive_dir):
+            loop = asyncio.get_running_loop()
+            older = await asyncio.gather(*(
+                loop.run_in_executor(None, self._read_archive_history, archive_dir, symbol,
+                                     count - len(history.get(symbol, ())), history.get(symbol))
+                for symbol in short
+            ), return_exceptions=True)
+            for symbol, ticks in zip(short, older):
+                if isinstance(ticks, Exception):
+                    logger.error(f"❌ Error reading recorded ticks for {symbol}: {ticks}")
+                    continue
+                if ticks:
+                    history[symbol] = ticks + history.get(symbol, [])
+                    from_archive += len(ticks)
+        
+        for ticks in history.values():
+            for tick in ticks:
+                self._load_tick(tick)
+        # Bars whose interval has already ended are closed into history (not dispatched)
+        for builder in self.bar_builders.values():
+            builder.flush()
+        
+        elapsed = time.perf_counter() - started
+        stats = self.warmup_stats
+        stats["symbols"] += len(symbols)
+        stats["ticks_from_stream"] += from_stream
+        stats["ticks_from_archive"] += from_archive
+        stats["seconds"] = round(stats["seconds"] + elapsed, 3)
+        logger.info(f"🔥 Warmed up {len(symbols)} symbols with {from_stream + from_archive} ticks "
+                    f"({from_stream} from streams, {from_archive} recorded) in {elapsed:.3f}s")
+        return stats
+    
+    async def _read_stream_history(self, symbols: List[str], count: int) -> Dict[str, List[MarketDataTick]]:
+        """Last count ticks of each symbol's stream, oldest first, in one pipeline"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        for symbol in symbols:
+            pipe.xrevrange(f"market_data_stream:{symbol}", "+", "-", count=count)
+        try:
+            responses = await pipe.execute()
+        except Exception as e:
+            logger.error(f"❌ Error reading stream history: {e}")
+            return {}
+        
+        history = {}
+        for symbol, entries in zip(symbols, responses):
+            if not entries:
+                continue
+            self._warmed_until[f"market_data_stream:{symbol}"] = _stream_id(entries[0][0])
+            ticks = []
+            for _, fields in reversed(entries):
+                tick = self._decode_message(fields)
+                if tick:
+                    ticks.append(tick)
+            history[symbol] = ticks
+        return history
+    
+    @staticmethod
+    def _read_archive_history(archive_dir: str, symbol: str, count: int,
+                              newer: Optional[List[MarketDataTick]]) -> List[MarketDataTick]:
+        """Up to count recorded ticks older than the stream history, oldest first"""
+        before_ns = datetime_to_ns(newer[0].exchange_timestamp) if newer else None
+        last_day = day_of(before_ns) if before_ns is not None else None
+        archive = TickArchive(archive_dir)
+        try:
+            days = [day for day in archive.days() if last_day is None or day <= last_day]
+            parts = []
+            needed = count
+            for day in reversed(days[-WARMUP_ARCHIVE_DAYS:]):
+                tick_file = archive.open(day, symbol)
+                if tick_file is None:
+                    continue
+                columns = tick_file.read(end=before_ns)
+                columns = {name: values[-needed:] for name, values in columns.items()}
+                parts.append([MarketDataTick(**fields) for fields in iter_ticks(symbol, tick_file.token, columns)])
+                needed -= len(parts[-1])
+                if needed <= 0:
+                    break
+        finally:
+            archive.close()
+        return [tick for part in reversed(parts) for tick in part]
+    
+    def _load_tick(self, tick: MarketDataTick):
+        """Buffer a historical tick and roll it into bars without calling handlers"""
+        self.tick_store.append(tick)
+        self.latest_ticks[tick.symbol] = tick
+        for interval, builder in self.bar_builders.items():
+            if tick.symbol in self._bar_handlers[interval]:
+                builder.update(tick)
+    
+    def ingest(self, tick: MarketDataTick):
+        """Buffer a tick and run the tick and bar handlers (also used to replay ticks)"""
+        # Add to ring buffer (fixed capacity, oldest ticks are overwritten)
+        self.tick_store.append(tick)
+        self.latest_ticks[tick.symbol] = tick
+        
+        self.messages_processed += 1
+        
+        # Call tick handlers (all-symbol handlers, then the symbol's own)
+        for handler in self._all_symbol_handlers + self._symbol_handlers.get(tick.symbol, []):
+            try:
+                handler(tick)
+            except Exception as e:
+                logger.error(f"❌ Error in tick handler: {e}")
+        
+        # Roll the tick into bars for intervals that have subscribers
+        for interval, builder in self.bar_builders.items():
+            if tick.symbol in self._bar_handlers[interval]:
+                bar = builder.update(tick)
+                if bar:
+                    self._dispatch_bar(bar)
+    
+    def ingest_bar(self, bar: Bar, latest_tick: Optional[MarketDataTick] = None):
+        """Add an already closed bar (replayed from a file) and run its bar handlers"""
+        builder = self.bar_builders.get(bar.interval)
+        if builder is None:
+            return
+        if latest_tick is not None:
+            self.latest_ticks[bar.symbol] = latest_tick
+        builder.add_bar(bar)
+        self.messages_processed += 1
+        self._dispatch_bar(bar)
+    
+    def _decode_message(self, fields: Dict) -> Optional[MarketDataTick]:
+        """Decode a stream message in the compact binary or the legacy field format"""
+        try:
+            compact = decode_fields(fields)
+        except TickDecodeError as e:
+            logger.error(f"❌ Error decoding compact tick: {e}")
+            return None
+        if compact is not None:
+            return MarketDataTick(**compact)
+        
+        # Legacy format: convert bytes to strings
+        processed_fields = {}
+        for key, value in fields.items():
+            if isinstance(key, bytes):
+                key = key.decode()
+            if isinstance(value, bytes):
+                value = value.decode()
+            processed_fields[key] = value
+        return self._parse_tick_data(processed_fields)
     
     def _parse_tick_data(self, fields: Dict[str, str]) -> Optional[MarketDataTick]:
         """Parse tick data from Redis fields"""
@@ -196,20 +792,108 @@ class MarketDataConsumer:
             logger.error(f"❌ Error parsing tick data: {e}")
             return None
     
-    def get_historical_buffer(self, symbol: str, periods: int = 100) -> List[MarketDataTick]:
-        """Get historical market data from buffer"""
-        if symbol not in self.market_data_buffer:
-            return []
-        
-        buffer = self.market_data_buffer[symbol]
-        return buffer[-periods:] if periods > 0 else buffer
+    def _dispatch_bar(self, bar: Bar):
+        """Call the handlers subscribed to a closed bar"""
+        for handler in list(self._bar_handlers.get(bar.interval, {}).get(bar.symbol, [])):
+            try:
+                handler(bar)
+            except Exception as e:
+                logger.error(f"❌ Error in bar handler: {e}")
+    
+    def flush_bars(self, now: Optional[float] = None):
+        """Close bars whose interval has elapsed without a newer tick (now: epoch seconds, default wall clock)"""
+        for builder in self.bar_builders.values():
+            for bar in builder.flush(now):
+                self._dispatch_bar(bar)
+    
+    def get_bars(self, symbol: str, interval: str, periods: int = 100) -> List[Bar]:
+        """Get closed bars for a symbol and interval, oldest first"""
+        builder = self.bar_builders.get(interval)
+        return builder.get_bars(symbol, periods) if builder else []
+    
+    def get_historical_buffer(self, symbol: str, periods: int = 100) -> TickWindow:
+        """Get historical market data from buffer (zero-copy view, valid until the next tick)"""
+        return self.tick_store.window(symbol, periods)
     
     def get_latest_tick(self, symbol: str) -> Optional[MarketDataTick]:
         """Get the latest tick for a symbol"""
-        buffer = self.get_historical_buffer(symbol, 1)
-        return buffer[0] if buffer else None
+        return self.latest_ticks.get(symbol)
+    
+    def get_sequence(self, symbol: str, interval: Optional[str] = None) -> int:
+        """Ticks (or closed bars of interval) received so far for a symbol; changes with every new one"""
+        if interval:
+            builder = self.bar_builders.get(interval)
+            return builder.closed_count(symbol) if builder else 0
+        buffer = self.tick_store.get(symbol)
+        return buffer.sequence if buffer else 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get consumer statistics"""
+        return {
+            "consumer_name": self.consumer_name,
+            "consumer_group": self.consumer_group,
+            "read_mode": self.read_mode,
+            "symbols": list(self.symbols),
+            "messages_processed": self.messages_processed,
+            "acks_sent": self.acks_sent,
+            "batch_size": self.batch_size,
+            "streams": {name: stats.to_dict() for name, stats in self.stream_stats.items()},
+            "tick_handlers": len(self._all_symbol_handlers) + sum(len(h) for h in self._symbol_handlers.values()),
+            "buffer_bytes": self.tick_store.nbytes(),
+            "bars_closed": {interval: builder.bars_closed for interval, builder in self.bar_builders.items()},
+            "warmup": dict(self.warmup_stats),
+            "recovery": dict(self.recovery_stats),
+            "redis_connected": self.redis_client is not None
+        }
+    
+    def remove_symbols(self, symbols: List[str]) -> List[str]:
+        """
+        Release symbols taken by start_consuming; returns the symbols dropped
+        
+        Each start_consuming call holds a reference per symbol. When the last
+        one is released the stream is no longer read (from the next read on)
+        and its ticks, bars and stats are freed.
+        """
+        dropped = []
+        for symbol in dict.fromkeys(symbols):
+            refs = self._symbol_refs.get(symbol, 0) - 1
+            if refs > 0:
+                self._symbol_refs[symbol] = refs
+                continue
+            self._symbol_refs.pop(symbol, None)
+            if symbol not in self.symbols:
+                continue
+            self.symbols.remove(symbol)
+            stream_name = f"market_data_stream:{symbol}"
+            self.tick_store.discard(symbol)
+            self.latest_ticks.pop(symbol, None)
+            self._symbol_handlers.pop(symbol, None)
+            for interval, builder in self.bar_builders.items():
+                builder.discard(symbol)
+                self._bar_handlers[interval].pop(symbol, None)
+            self.stream_stats.pop(stream_name, None)
+            self._last_ids.pop(stream_name, None)
+            self._warmed_until.pop(stream_name, None)
+            dropped.append(symbol)
+        if dropped:
+            logger.info(f"🛑 Stopped consuming market data for {len(dropped)} symbols: {dropped}")
+        return dropped
     
     async def stop(self):
         """Stop consuming"""
         self.running = False
+        if self._consume_task and not self._consume_task.done():
+            self._consume_task.cancel()
+            try:
+                await self._consume_task
+            except asyncio.CancelledError:
+                pass
+        self._consume_task = None
+        if self._recovery_task and not self._recovery_task.done():
+            self._recovery_task.cancel()
+            try:
+                await self._recovery_task
+            except asyncio.CancelledError:
+                pass
+        self._recovery_task = None
         logger.info("🛑 Stopped consuming market data")
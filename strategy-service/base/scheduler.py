@@ -0,0 +1,124 @@
+"""
+Coalescing Evaluation Scheduler for Strategy Service
+
+Tick handlers mark symbols dirty instead of spawning a task per tick. A single
+runner task evaluates the dirty symbols in passes: every tick that arrives
+while a pass is pending or running just replaces the symbol's latest item, so
+a burst of N ticks over M symbols costs at most one pass over the symbols that
+changed, not N passes over all M.
+
+Back-pressure comes from there being at most one pass in flight: if strategy
+logic is slower than the feed, ticks are coalesced (and counted) rather than
+queued. The pending set is keyed by symbol, so it is bounded by the number of
+symbols the strategy trades.
+
+With ``autorun`` off (backtests) no task is started: the caller runs passes
+itself with ``flush()``.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EvaluationScheduler:
+    """Runs one evaluation pass at a time over the symbols marked since the last pass"""
+
+    def __init__(self, evaluate: Callable[[Dict[str, Any]], Awaitable[None]],
+                 debounce: float = 0.0, name: str = "strategy", autorun: bool = True):
+        """
+        Args:
+            evaluate: Coroutine called with {symbol: latest tick/bar} for dirty symbols
+            debounce: Seconds to wait after the first dirty mark before a pass
+                (0 runs on the next event loop iteration)
+            name: Used in log messages
+            autorun: Start a runner task on the first mark (off: call flush())
+        """
+        self.evaluate = evaluate
+        self.debounce = debounce
+        self.name = name
+        self.autorun = autorun
+        self._pending: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.running = True
+
+        # Statistics
+        self.ticks_received = 0
+        self.ticks_coalesced = 0  # Replaced by a newer tick before being evaluated
+        self.evaluations = 0
+        self.symbols_evaluated = 0
+        self.max_batch = 0
+        self.errors = 0
+        self.last_eval_ms = 0.0
+
+    def start(self):
+        self.running = True
+
+    def mark(self, symbol: str, item: Any):
+        """Mark a symbol dirty with its latest tick or bar (call from the event loop)"""
+        if not self.running:
+            return
+        self.ticks_received += 1
+        if symbol in self._pending:
+            self.ticks_coalesced += 1
+        self._pending[symbol] = item
+        if self._task is None and self.autorun:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def _run(self):
+        try:
+            while self._pending and self.running:
+                # Let the rest of this batch of ticks (or the debounce window) arrive
+                await asyncio.sleep(self.debounce)
+                await self.flush()
+        finally:
+            self._task = None
+
+    async def flush(self):
+        """Run one evaluation pass over the symbols marked so far (no-op if none)"""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        started = time.perf_counter()
+        try:
+            await self.evaluate(batch)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"❌ Evaluation pass failed for {self.name}: {e}")
+        self.last_eval_ms = (time.perf_counter() - started) * 1000
+        self.evaluations += 1
+        self.symbols_evaluated += len(batch)
+        if len(batch) > self.max_batch:
+            self.max_batch = len(batch)
+
+    async def stop(self):
+        """Drop pending symbols and wait for an in-flight pass to finish"""
+        self.running = False
+        self._pending.clear()
+        task = self._task
+        if task:
+            try:
+                await task
+            except Exception as e:
+                logger.error(f"❌ Error stopping scheduler for {self.name}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics"""
+        return {
+            "ticks_received": self.ticks_received,
+            "ticks_coalesced": self.ticks_coalesced,
+            "evaluations": self.evaluations,
+            "symbols_evaluated": self.symbols_evaluated,
+            "avg_batch": round(self.symbols_evaluated / self.evaluations, 2) if self.evaluations else 0.0,
+            "max_batch": self.max_batch,
+            "pending": len(self._pending),
+            "debounce_ms": self.debounce * 1000,
+            "last_eval_ms": round(self.last_eval_ms, 3),
+            "errors": self.errors
+        }
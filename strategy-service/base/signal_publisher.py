@@ -4,6 +4,7 @@ Signal Publisher for Strategy Service
 import asyncio
 import json
 import logging
+import os
 from datetime import datetime
 from typing import Dict, Any
 import redis.asyncio as redis
@@ -12,19 +13,41 @@ from shared.timezone import get_ist_now, get_ist_timestamp
 
 logger = logging.getLogger(__name__)
 
+# "stream" (XADD to a stream named after the channel) or "pubsub" (PUBLISH only)
+SIGNAL_TRANSPORT = os.getenv('SIGNAL_TRANSPORT', 'stream')
+# Also PUBLISH stream signals on the channel, for monitors such as monitor_signals.py
+SIGNAL_PUBSUB_MIRROR = os.getenv('SIGNAL_PUBSUB_MIRROR', 'true').lower() == 'true'
+# Approximate number of signals the stream keeps
+SIGNAL_STREAM_MAXLEN = int(os.getenv('SIGNAL_STREAM_MAXLEN', '100000'))
+
 class SignalPublisher:
-    """Redis publisher for trading signals"""
+    """
+    Redis publisher for trading signals
+    
+    With the ``stream`` transport each signal is appended to the
+    ``signal_channel`` stream as a JSON ``data`` field, where the order service
+    reads it through a consumer group (so signals published while it is down
+    are delivered when it is back). The same JSON can be mirrored to the pub/sub
+    channel of the same name in the same round trip.
+    """
     
-    def __init__(self, redis_url: str, signal_channel: str = "strategy_signals"):
+    def __init__(self, redis_url: str, signal_channel: str = "strategy_signals", redis_client=None,
+                 transport: str = SIGNAL_TRANSPORT, pubsub_mirror: bool = SIGNAL_PUBSUB_MIRROR):
+        if transport not in ("stream", "pubsub"):
+            raise ValueError(f"Unknown signal transport {transport} (expected 'stream' or 'pubsub')")
         self.redis_url = redis_url
         self.signal_channel = signal_channel
-        self.redis_client = None
+        self.transport = transport
+        self.pubsub_mirror = pubsub_mirror
+        self.redis_client = redis_client
+        self._owns_client = redis_client is None
         self.signals_published = 0
         
     async def connect(self):
-        """Connect to Redis"""
+        """Connect to Redis (no-op if already connected or given a shared client)"""
         try:
-            self.redis_client = redis.from_url(self.redis_url)
+            if self.redis_client is None:
+                self.redis_client = redis.from_url(self.redis_url)
             await self.redis_client.ping()
             logger.info(f"✅ Redis connected for signal publisher")
             return True
@@ -33,9 +56,10 @@ class SignalPublisher:
             return False
     
     async def disconnect(self):
-        """Disconnect from Redis"""
-        if self.redis_client:
+        """Disconnect from Redis (a shared client is left open for its owner)"""
+        if self.redis_client and self._owns_client:
             await self.redis_client.close()
+            self.redis_client = None
             logger.info("✅ Redis disconnected for signal publisher")
     
     async def publish_signal(self, signal: TradingSignal):
@@ -57,11 +81,7 @@ class SignalPublisher:
                 "metadata": signal.metadata
             }
             
-            # Publish to Redis channel
-            await self.redis_client.publish(
-                self.signal_channel,
-                json.dumps(signal_dict, default=str)
-            )
+            await self._send(json.dumps(signal_dict, default=str))
             
             self.signals_published += 1
             logger.info(f"📊 Published signal: {signal.symbol} {signal.signal_type.value} @ {signal.price} (confidence: {signal.confidence:.2f})")
@@ -83,11 +103,7 @@ class SignalPublisher:
             if 'timestamp' in signal_dict and isinstance(signal_dict['timestamp'], datetime):
                 signal_dict['timestamp'] = signal_dict['timestamp'].isoformat()
             
-            # Publish to Redis channel
-            await self.redis_client.publish(
-                self.signal_channel,
-                json.dumps(signal_dict, default=str)
-            )
+            await self._send(json.dumps(signal_dict, default=str))
             
             self.signals_published += 1
             logger.info(f"📊 Published signal: {signal_dict.get('symbol', 'UNKNOWN')} {signal_dict.get('signal_type', 'UNKNOWN')}")
@@ -98,10 +114,23 @@ class SignalPublisher:
             logger.error(f"❌ Error publishing signal dict: {e}")
             return False
     
+    async def _send(self, payload: str):
+        """XADD (and optionally PUBLISH) the payload in one round trip"""
+        if self.transport == "pubsub":
+            await self.redis_client.publish(self.signal_channel, payload)
+            return
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.xadd(self.signal_channel, {"data": payload}, maxlen=SIGNAL_STREAM_MAXLEN, approximate=True)
+        if self.pubsub_mirror:
+            pipe.publish(self.signal_channel, payload)
+        await pipe.execute()
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get publisher statistics"""
         return {
             "signals_published": self.signals_published,
             "signal_channel": self.signal_channel,
+            "transport": self.transport,
+            "pubsub_mirror": self.pubsub_mirror,
             "redis_connected": self.redis_client is not None
         }
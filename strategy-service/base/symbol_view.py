@@ -0,0 +1,44 @@
+"""
+Per-symbol view passed to ``BaseStrategy.on_tick``
+"""
+from typing import TYPE_CHECKING, List, Optional, Union
+
+from shared.models import Bar, MarketDataTick
+from shared.tick_store import TickWindow
+from base.incremental_indicators import IndicatorSet
+
+if TYPE_CHECKING:
+    from base.base_strategy import BaseStrategy
+
+
+class SymbolView:
+    """
+    What a strategy sees for one symbol in one evaluation pass
+
+    Attributes:
+        symbol: The symbol that ticked (or closed a bar)
+        tick: Latest tick for the symbol
+        bar: The bar that just closed (bar mode only, else None)
+        indicators: The symbol's incremental indicators, already updated
+    """
+
+    __slots__ = ('symbol', 'tick', 'bar', 'indicators', '_strategy')
+
+    def __init__(self, strategy: 'BaseStrategy', symbol: str, tick: MarketDataTick,
+                 indicators: Optional[IndicatorSet], bar: Optional[Bar] = None):
+        self.symbol = symbol
+        self.tick = tick
+        self.bar = bar
+        self.indicators = indicators
+        self._strategy = strategy
+
+    @property
+    def ltp(self) -> float:
+        return self.tick.ltp
+
+    def history(self, periods: int = 100) -> Union[TickWindow, List[Bar]]:
+        """Recent ticks (or closed bars in bar mode); see BaseStrategy.get_historical_buffer"""
+        return self._strategy.get_historical_buffer(self.symbol, periods)
+
+    def __repr__(self):
+        return f"<SymbolView {self.symbol} ltp={self.tick.ltp}>"
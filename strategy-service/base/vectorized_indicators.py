@@ -0,0 +1,218 @@
+"""
+NumPy-vectorized Technical Indicators for Strategy Service
+
+Same calculations and parameters as ``TechnicalIndicators`` but operating on
+contiguous float64 arrays (closes / highs / lows) instead of lists of ticks.
+Used automatically by ``TechnicalIndicators`` for long series (warm-up and
+backfill), where the pure-Python loops become the bottleneck.
+"""
+import logging
+import math
+from typing import Dict, Iterable
+
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+    NUMPY_AVAILABLE = True
+except ImportError:  # pragma: no cover - numpy is optional for strategy containers
+    np = None
+    sliding_window_view = None
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Largest decay exponent used per block in _smooth (decay ** -block <= e ** 115 ~ 1e50)
+_MAX_BLOCK_EXPONENT = 115.0
+
+
+def as_array(values: Iterable[float], count: int = -1) -> "np.ndarray":
+    """Convert a sequence of floats into a contiguous float64 array"""
+    if isinstance(values, np.ndarray):
+        return np.ascontiguousarray(values, dtype=np.float64)
+    return np.fromiter(values, dtype=np.float64, count=count)
+
+
+def tick_columns(ticks, *fields: str):
+    """Extract one float64 array per tick attribute (e.g. 'ltp', 'high', 'low')"""
+    if hasattr(ticks, 'column'):
+        # TickWindow from the ring buffer: price columns are already float64
+        return tuple(np.asarray(ticks.column(name), dtype=np.float64) for name in fields)
+    count = len(ticks)
+    return tuple(as_array((getattr(tick, name) for tick in ticks), count) for name in fields)
+
+
+def _smooth(values: "np.ndarray", alpha: float, initial: float) -> "np.ndarray":
+    """
+    Evaluate y[i] = (1 - alpha) * y[i-1] + alpha * values[i] with y[-1] = initial.
+
+    The recurrence is solved in closed form per block using cumulative sums of
+    decay-scaled inputs; blocks are sized so the scale factors stay well inside
+    float64 range.
+    """
+    n = len(values)
+    out = np.empty(n, dtype=np.float64)
+    if n == 0:
+        return out
+
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        out[:] = values
+        return out
+
+    block = max(1, min(n, int(_MAX_BLOCK_EXPONENT / -math.log(decay))))
+    powers = decay ** np.arange(1, block + 1, dtype=np.float64)
+    scaled_alpha = alpha / powers
+
+    previous = initial
+    for start in range(0, n, block):
+        chunk = values[start:start + block]
+        size = len(chunk)
+        acc = np.cumsum(chunk * scaled_alpha[:size])
+        segment = powers[:size] * (previous + acc)
+        out[start:start + size] = segment
+        previous = segment[-1]
+    return out
+
+
+def _rolling_mean(values: "np.ndarray", period: int) -> "np.ndarray":
+    """Rolling mean via cumulative sums (values are centred first to limit cancellation)"""
+    shift = values[0]
+    csum = np.cumsum(values - shift)
+    sums = csum[period - 1:].copy()
+    sums[1:] -= csum[:-period]
+    return sums / period + shift
+
+
+def _wilder(values: "np.ndarray", period: int, outputs: int) -> "np.ndarray":
+    """Wilder-smoothed averages as produced by the batch RSI/DMI loops (one per output)"""
+    averages = np.empty(outputs, dtype=np.float64)
+    averages[0] = values[:period].sum() / period
+    averages[1:] = _smooth(values[period:period + outputs - 1], 1.0 / period, averages[0])
+    return averages
+
+
+def calculate_rsi(closes: "np.ndarray", period: int = 14) -> "np.ndarray":
+    """Calculate RSI (Relative Strength Index)"""
+    closes = as_array(closes)
+    if len(closes) < period + 1:
+        return np.empty(0)
+
+    deltas = np.diff(closes)
+    outputs = len(deltas) - period
+    if outputs <= 0:
+        return np.empty(0)
+
+    avg_gain = _wilder(np.maximum(deltas, 0.0), period, outputs)
+    avg_loss = _wilder(np.maximum(-deltas, 0.0), period, outputs)
+
+    rs = np.divide(avg_gain, avg_loss, out=np.zeros_like(avg_gain), where=avg_loss != 0)
+    return np.where(avg_loss == 0, 100.0, 100.0 - (100.0 / (1.0 + rs)))
+
+
+def calculate_dmi(highs: "np.ndarray", lows: "np.ndarray", period: int = 14) -> Dict[str, "np.ndarray"]:
+    """Calculate DMI (Directional Movement Index)"""
+    highs = as_array(highs)
+    lows = as_array(lows)
+    empty = {"+DI": np.empty(0), "-DI": np.empty(0)}
+    if len(highs) < period + 1:
+        return empty
+
+    high_diff = np.diff(highs)
+    low_diff = -np.diff(lows)
+    outputs = len(high_diff) - period
+    if outputs <= 0:
+        return empty
+
+    plus_dm = np.where((high_diff > low_diff) & (high_diff > 0), high_diff, 0.0)
+    minus_dm = np.where((low_diff > high_diff) & (low_diff > 0), low_diff, 0.0)
+    true_range = np.maximum.reduce([
+        highs[1:] - lows[1:],
+        np.abs(high_diff),
+        np.abs(low_diff),
+    ])
+
+    avg_plus_dm = _wilder(plus_dm, period, outputs)
+    avg_minus_dm = _wilder(minus_dm, period, outputs)
+    avg_tr = _wilder(true_range, period, outputs)
+
+    nonzero = avg_tr != 0
+    di_plus = np.divide(avg_plus_dm, avg_tr, out=np.zeros_like(avg_tr), where=nonzero) * 100
+    di_minus = np.divide(avg_minus_dm, avg_tr, out=np.zeros_like(avg_tr), where=nonzero) * 100
+    return {"+DI": di_plus, "-DI": di_minus}
+
+
+def calculate_sma(closes: "np.ndarray", period: int) -> "np.ndarray":
+    """Calculate Simple Moving Average"""
+    closes = as_array(closes)
+    if len(closes) < period:
+        return np.empty(0)
+    return _rolling_mean(closes, period)
+
+
+def calculate_ema(closes: "np.ndarray", period: int) -> "np.ndarray":
+    """Calculate Exponential Moving Average (first value is the SMA of the first period)"""
+    closes = as_array(closes)
+    if len(closes) < period:
+        return np.empty(0)
+
+    ema = np.empty(len(closes) - period + 1, dtype=np.float64)
+    ema[0] = closes[:period].sum() / period
+    ema[1:] = _smooth(closes[period:], 2 / (period + 1), ema[0])
+    return ema
+
+
+def calculate_bollinger_bands(closes: "np.ndarray", period: int = 20, std_dev: float = 2.0) -> Dict[str, "np.ndarray"]:
+    """Calculate Bollinger Bands (population standard deviation over each window)"""
+    closes = as_array(closes)
+    if len(closes) < period:
+        return {"upper": np.empty(0), "middle": np.empty(0), "lower": np.empty(0)}
+
+    middle = _rolling_mean(closes, period)
+    std = sliding_window_view(closes - closes[0], period).std(axis=1)
+    return {
+        "upper": middle + std_dev * std,
+        "middle": middle,
+        "lower": middle - std_dev * std
+    }
+
+
+def calculate_macd(closes: "np.ndarray", fast_period: int = 12, slow_period: int = 26, signal_period: int = 9) -> Dict[str, "np.ndarray"]:
+    """Calculate MACD (Moving Average Convergence Divergence)"""
+    closes = as_array(closes)
+    if len(closes) < slow_period:
+        return {"macd": np.empty(0), "signal": np.empty(0), "histogram": np.empty(0)}
+
+    fast_ema = calculate_ema(closes, fast_period)
+    slow_ema = calculate_ema(closes, slow_period)
+    length = min(len(fast_ema), len(slow_ema))
+    macd_line = fast_ema[:length] - slow_ema[:length]
+
+    if len(macd_line) < signal_period:
+        return {"macd": macd_line, "signal": np.empty(0), "histogram": np.empty(0)}
+
+    signal_line = calculate_ema(macd_line, signal_period)
+    histogram = macd_line[:len(signal_line)] - signal_line
+    return {"macd": macd_line, "signal": signal_line, "histogram": histogram}
+
+
+def calculate_stochastic(highs: "np.ndarray", lows: "np.ndarray", closes: "np.ndarray", k_period: int = 14, d_period: int = 3) -> Dict[str, "np.ndarray"]:
+    """Calculate Stochastic Oscillator"""
+    highs = as_array(highs)
+    lows = as_array(lows)
+    closes = as_array(closes)
+    if len(closes) < k_period:
+        return {"%K": np.empty(0), "%D": np.empty(0)}
+
+    highest_high = sliding_window_view(highs, k_period).max(axis=1)
+    lowest_low = sliding_window_view(lows, k_period).min(axis=1)
+    price_range = highest_high - lowest_low
+    current_close = closes[k_period - 1:]
+
+    k_values = np.divide(
+        current_close - lowest_low, price_range,
+        out=np.zeros_like(price_range), where=price_range != 0
+    ) * 100
+    k_values[price_range == 0] = 50  # Neutral when no range
+
+    d_values = _rolling_mean(k_values, d_period) if len(k_values) >= d_period else np.empty(0)
+    return {"%K": k_values, "%D": d_values}
@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""
+Indicator benchmark and correctness suite
+
+Times every ``TechnicalIndicators`` calculation on synthetic tick series for
+each backend and checks the results against a straightforward reference
+implementation:
+
+- ``pure``: the float-series kernels in ``base/indicators.py``
+- ``vectorized``: the NumPy backend (``base/vectorized_indicators.py``)
+- ``incremental``: the streaming indicators in ``base/incremental_indicators.py``,
+  fed one tick at a time
+
+Series:
+
+- ``random_walk``: Gaussian random walk, high/low a random spread around ltp
+- ``replay``: intraday-looking ticks: volatility clustering, prices on a 0.05
+  tick grid, runs of unchanged prices and day high/low as the feed reports
+  them; or the ``ltp,high,low`` columns of ``--replay-file`` (CSV), cycled
+  to each size
+
+Batch backends get the series as a ring buffer window (what strategies pass),
+so ns/tick covers column extraction too. Allocation figures are the peak
+traced memory (tracemalloc) during one call (or one full incremental feed).
+
+Results are written as JSON (``--output``, default stdout) to track
+regressions between releases. ``--baseline`` compares against an earlier
+report and lists cases more than ``--max-slowdown`` times slower. The exit
+code is 1 if any backend disagrees with the reference or regressed.
+
+Usage:
+    python benchmarks/indicator_bench.py --output indicator_bench.json
+    python benchmarks/indicator_bench.py --sizes 50,1000 --backends pure,incremental
+    python benchmarks/indicator_bench.py --baseline previous_release.json
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.models import MarketDataTick
+from shared.tick_store import TickStore
+from shared.timezone import get_ist_now
+from base import indicators
+from base import incremental_indicators as incremental
+from base import vectorized_indicators as vectorized
+from base.indicators import TechnicalIndicators
+
+SCHEMA_VERSION = 1
+DEFAULT_SIZES = (50, 1000, 100000)
+SERIES_KINDS = ("random_walk", "replay")
+BACKENDS = ("pure", "vectorized", "incremental")
+LONG_SERIES = 10000  # Sizes from here on are timed without warm-up or repeats
+
+# Largest error accepted against the reference, relative to max(1, |reference|)
+TOLERANCES = {"pure": 1e-9, "vectorized": 1e-7, "incremental": 1e-8}
+
+
+class Series:
+    """Synthetic price columns plus the ticks built from them"""
+
+    def __init__(self, kind: str, closes: List[float], highs: List[float], lows: List[float]):
+        self.kind = kind
+        self.closes = closes
+        self.highs = highs
+        self.lows = lows
+
+    def __len__(self):
+        return len(self.closes)
+
+    def window(self):
+        """The series as a ring buffer window, as strategies receive it"""
+        now = get_ist_now()
+        store = TickStore(capacity=len(self))
+        for close, high, low in zip(self.closes, self.highs, self.lows):
+            store.append(MarketDataTick(
+                symbol="BENCH", token="0", ltp=close, change=0, change_percent=0,
+                high=high, low=low, volume=0, bid=close, ask=close, open=close,
+                close=close, timestamp=now, exchange_timestamp=now
+            ))
+        return store.window("BENCH", len(self))
+
+
+def random_walk(size: int, seed: int) -> Series:
+    rng = random.Random(seed)
+    price = 1000.0
+    closes, highs, lows = [], [], []
+    for _ in range(size):
+        price = max(1.0, price + rng.gauss(0, 1))
+        spread = abs(rng.gauss(0, 0.5))
+        closes.append(price)
+        highs.append(price + spread)
+        lows.append(price - spread)
+    return Series("random_walk", closes, highs, lows)
+
+
+def replay(size: int, seed: int, replay_file: Optional[str] = None) -> Series:
+    if replay_file:
+        return _replay_file(size, replay_file)
+
+    rng = random.Random(seed)
+    tick_size = 0.05
+    price = 2500.0
+    variance = 1e-8
+    day_high = day_low = price
+    closes, highs, lows = [], [], []
+    for _ in range(size):
+        if rng.random() < 0.3:
+            shock = 0.0  # Quote update without a trade at a new price
+        else:
+            # GARCH(1,1)-style volatility clustering
+            shock = rng.gauss(0, math.sqrt(variance))
+            variance = 2e-9 + 0.1 * shock * shock + 0.85 * variance
+        price = max(tick_size, round(price * (1 + shock) / tick_size) * tick_size)
+        day_high = max(day_high, price)
+        day_low = min(day_low, price)
+        closes.append(price)
+        highs.append(day_high)
+        lows.append(day_low)
+    return Series("replay", closes, highs, lows)
+
+
+def _replay_file(size: int, path: str) -> Series:
+    with open(path, newline='') as f:
+        rows = [row for row in csv.DictReader(f) if row.get('ltp')]
+    if not rows:
+        raise ValueError(f"{path} has no ltp rows")
+    closes, highs, lows = [], [], []
+    for i in range(size):
+        row = rows[i % len(rows)]
+        close = float(row['ltp'])
+        closes.append(close)
+        highs.append(float(row.get('high') or close))
+        lows.append(float(row.get('low') or close))
+    return Series("replay", closes, highs, lows)
+
+
+# Reference implementations: direct transcriptions of each definition (exact
+# window sums, two-pass deviations), following the repo's conventions for
+# seeding and alignment (EMA seeded with an SMA, Wilder averages seeded with
+# a mean, MACD lines aligned from the start of each EMA).
+
+def _window_mean(values: Sequence[float], end: int, period: int) -> float:
+    return math.fsum(values[end - period + 1:end + 1]) / period
+
+
+def reference_sma(values, period):
+    return [_window_mean(values, i, period) for i in range(period - 1, len(values))]
+
+
+def reference_ema(values, period):
+    if len(values) < period:
+        return []
+    alpha = 2 / (period + 1)
+    out = [math.fsum(values[:period]) / period]
+    for value in values[period:]:
+        out.append(alpha * value + (1 - alpha) * out[-1])
+    return out
+
+
+def reference_wilder(values, period, outputs):
+    out = [math.fsum(values[:period]) / period]
+    for value in values[period:period + outputs - 1]:
+        out.append((out[-1] * (period - 1) + value) / period)
+    return out
+
+
+def reference_rsi(closes, period):
+    changes = [closes[i] - closes[i - 1] for i in range(1, len(closes))]
+    outputs = len(changes) - period
+    if outputs <= 0:
+        return {"value": []}
+    gains = reference_wilder([max(c, 0.0) for c in changes], period, outputs)
+    losses = reference_wilder([max(-c, 0.0) for c in changes], period, outputs)
+    return {"value": [100.0 if loss == 0 else 100 - 100 / (1 + gain / loss) for gain, loss in zip(gains, losses)]}
+
+
+def reference_dmi(highs, lows, period):
+    plus_dm, minus_dm, true_range = [], [], []
+    for i in range(1, len(highs)):
+        up = highs[i] - highs[i - 1]
+        down = lows[i - 1] - lows[i]
+        plus_dm.append(up if up > down and up > 0 else 0.0)
+        minus_dm.append(down if down > up and down > 0 else 0.0)
+        true_range.append(max(highs[i] - lows[i], abs(up), abs(down)))
+    outputs = len(plus_dm) - period
+    if outputs <= 0:
+        return {"+DI": [], "-DI": []}
+    plus = reference_wilder(plus_dm, period, outputs)
+    minus = reference_wilder(minus_dm, period, outputs)
+    ranges = reference_wilder(true_range, period, outputs)
+    return {
+        "+DI": [0.0 if tr == 0 else 100 * p / tr for p, tr in zip(plus, ranges)],
+        "-DI": [0.0 if tr == 0 else 100 * m / tr for m, tr in zip(minus, ranges)]
+    }
+
+
+def reference_bollinger(closes, period, std_dev):
+    upper, middle, lower = [], [], []
+    for i in range(period - 1, len(closes)):
+        mean = _window_mean(closes, i, period)
+        std = math.sqrt(math.fsum((x - mean) ** 2 for x in closes[i - period + 1:i + 1]) / period)
+        upper.append(mean + std_dev * std)
+        middle.append(mean)
+        lower.append(mean - std_dev * std)
+    return {"upper": upper, "middle": middle, "lower": lower}
+
+
+def reference_macd(closes, fast, slow, signal):
+    fast_ema = reference_ema(closes, fast)
+    slow_ema = reference_ema(closes, slow)
+    line = [f - s for f, s in zip(fast_ema, slow_ema)]
+    signal_line = reference_ema(line, signal)
+    return {"macd": line, "signal": signal_line, "histogram": [m - s for m, s in zip(line, signal_line)]}
+
+
+def reference_stochastic(highs, lows, closes, k_period, d_period):
+    k_values = []
+    for i in range(k_period - 1, len(closes)):
+        highest = max(highs[i - k_period + 1:i + 1])
+        lowest = min(lows[i - k_period + 1:i + 1])
+        k_values.append(50.0 if highest == lowest else 100 * (closes[i] - lowest) / (highest - lowest))
+    return {"%K": k_values, "%D": reference_sma(k_values, d_period)}
+
+
+class IndicatorCase:
+    """One TechnicalIndicators method with its parameters, reference and incremental twin"""
+
+    def __init__(self, name: str, method: str, params: tuple,
+                 reference: Callable[[Series], Dict[str, List[float]]],
+                 make_incremental: Callable[[], incremental.IncrementalIndicator],
+                 feed: Callable, keys: Dict[str, str]):
+        self.name = name
+        self.method = method
+        self.params = params
+        self.reference = reference
+        self.make_incremental = make_incremental
+        self.feed = feed
+        self.keys = keys  # incremental reading field -> batch output key
+
+    def batch(self, window) -> Dict[str, List[float]]:
+        result = getattr(TechnicalIndicators, self.method)(window, *self.params)
+        return result if isinstance(result, dict) else {"value": result}
+
+    def stream(self, series: Series) -> Dict[str, List[float]]:
+        """Feed the series tick by tick, collecting every reading"""
+        indicator = self.make_incremental()
+        feed = self.feed
+        out: Dict[str, List[float]] = {key: [] for key in self.keys.values()}
+        count = 0
+        for i in range(len(series)):
+            feed(indicator, series, i)
+            if indicator.count != count:
+                count = indicator.count
+                value = indicator.value
+                readings = value._asdict() if hasattr(value, '_asdict') else {"value": value}
+                for field, key in self.keys.items():
+                    if readings[field] is not None:
+                        out[key].append(readings[field])
+        return out
+
+    def time_stream(self, series: Series) -> None:
+        """Feed the series without collecting readings (timed path)"""
+        indicator = self.make_incremental()
+        feed = self.feed
+        for i in range(len(series)):
+            feed(indicator, series, i)
+
+
+def _close(indicator, series, i):
+    indicator.update(series.closes[i])
+
+
+def _high_low(indicator, series, i):
+    indicator.update(series.highs[i], series.lows[i])
+
+
+def _high_low_close(indicator, series, i):
+    indicator.update(series.highs[i], series.lows[i], series.closes[i])
+
+
+CASES = [
+    IndicatorCase("rsi", "calculate_rsi", (14,),
+                  lambda s: reference_rsi(s.closes, 14),
+                  lambda: incremental.RSI(14), _close, {"value": "value"}),
+    IndicatorCase("dmi", "calculate_dmi", (14,),
+                  lambda s: reference_dmi(s.highs, s.lows, 14),
+                  lambda: incremental.DMI(14), _high_low, {"plus_di": "+DI", "minus_di": "-DI"}),
+    IndicatorCase("sma", "calculate_sma", (20,),
+                  lambda s: {"value": reference_sma(s.closes, 20)},
+                  lambda: incremental.SMA(20), _close, {"value": "value"}),
+    IndicatorCase("ema", "calculate_ema", (20,),
+                  lambda s: {"value": reference_ema(s.closes, 20)},
+                  lambda: incremental.EMA(20), _close, {"value": "value"}),
+    IndicatorCase("bollinger_bands", "calculate_bollinger_bands", (20, 2.0),
+                  lambda s: reference_bollinger(s.closes, 20, 2.0),
+                  lambda: incremental.BollingerBands(20, 2.0), _close,
+                  {"upper": "upper", "middle": "middle", "lower": "lower"}),
+    IndicatorCase("macd", "calculate_macd", (12, 26, 9),
+                  lambda s: reference_macd(s.closes, 12, 26, 9),
+                  lambda: incremental.MACD(12, 26, 9), _close,
+                  {"macd": "macd", "signal": "signal", "histogram": "histogram"}),
+    IndicatorCase("stochastic", "calculate_stochastic", (14, 3),
+                  lambda s: reference_stochastic(s.highs, s.lows, s.closes, 14, 3),
+                  lambda: incremental.Stochastic(14, 3), _high_low_close, {"k": "%K", "d": "%D"}),
+]
+
+
+def compare(reference: Dict[str, List[float]], actual: Dict[str, List[float]], tolerance: float) -> Dict:
+    """Largest absolute and scaled errors over every output series"""
+    max_abs = max_scaled = 0.0
+    length_mismatches = []
+    for key, expected in reference.items():
+        got = actual.get(key, [])
+        if len(got) != len(expected):
+            length_mismatches.append({"output": key, "expected": len(expected), "actual": len(got)})
+        for a, b in zip(expected, got):
+            error = abs(a - b)
+            if math.isnan(error):
+                error = math.inf
+            max_abs = max(max_abs, error)
+            max_scaled = max(max_scaled, error / max(1.0, abs(a)))
+    return {
+        "max_abs_error": max_abs,
+        "max_scaled_error": max_scaled,
+        "length_mismatches": length_mismatches,
+        "agrees": not length_mismatches and max_scaled <= tolerance
+    }
+
+
+def measure(func: Callable[[], object], min_time: float, min_calls: int = 3) -> Dict:
+    """Best-of-runs time per call and peak traced memory of one call"""
+    if min_calls > 1:
+        func()  # Warm up
+    runs = []
+    calls = 0
+    started = time.perf_counter()
+    while True:
+        call_started = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - call_started)
+        calls += 1
+        if time.perf_counter() - started >= min_time and calls >= min_calls:
+            break
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": min(runs), "calls": calls, "peak_alloc_bytes": peak}
+
+
+def run_case(case: IndicatorCase, series: Series, window, backend: str, reference, min_time: float) -> Dict:
+    size = len(series)
+    # Long series are slow enough that a single cold run is representative
+    min_calls = 3 if size < LONG_SERIES else 1
+    if backend == "incremental":
+        timing = measure(lambda: case.time_stream(series), min_time, min_calls)
+        output = case.stream(series)
+    else:
+        # The NumPy backend is used for any length at threshold 0, never at infinity
+        indicators.VECTORIZE_THRESHOLD = 0 if backend == "vectorized" else math.inf
+        timing = measure(lambda: case.batch(window), min_time, min_calls)
+        output = case.batch(window)
+
+    return {
+        "indicator": case.name,
+        "method": case.method,
+        "params": list(case.params),
+        "series": series.kind,
+        "size": size,
+        "backend": backend,
+        "ns_per_tick": round(timing["seconds"] / size * 1e9, 2),
+        "seconds_per_call": timing["seconds"],
+        "calls": timing["calls"],
+        "peak_alloc_bytes": timing["peak_alloc_bytes"],
+        "alloc_bytes_per_tick": round(timing["peak_alloc_bytes"] / size, 2),
+        "outputs": {key: len(values) for key, values in output.items()},
+        **compare(reference, output, TOLERANCES[backend])
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run(sizes, kinds, backends, names, min_time: float, seed: int, replay_file: Optional[str]) -> Dict:
+    if "vectorized" in backends and not vectorized.NUMPY_AVAILABLE:
+        print("⚠️ NumPy not installed, skipping the vectorized backend", file=sys.stderr)
+        backends = [backend for backend in backends if backend != "vectorized"]
+
+    cases = [case for case in CASES if not names or case.name in names]
+    threshold = indicators.VECTORIZE_THRESHOLD
+    results = []
+    try:
+        for kind in kinds:
+            for size in sizes:
+                series = random_walk(size, seed) if kind == "random_walk" else replay(size, seed, replay_file)
+                window = series.window()
+                for case in cases:
+                    reference = case.reference(series)
+                    for backend in backends:
+                        result = run_case(case, series, window, backend, reference, min_time)
+                        results.append(result)
+                        status = "ok" if result["agrees"] else "MISMATCH"
+                        print(f"{kind:<12} {size:>7} {case.name:<16} {backend:<12} "
+                              f"{result['ns_per_tick']:>12.1f} ns/tick  {status}", file=sys.stderr)
+    finally:
+        indicators.VECTORIZE_THRESHOLD = threshold
+
+    disagreements = [f"{r['series']}/{r['size']}/{r['indicator']}/{r['backend']}" for r in results if not r["agrees"]]
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "numpy": getattr(vectorized.np, "__version__", None)
+        },
+        "config": {
+            "sizes": list(sizes),
+            "series": list(kinds),
+            "backends": list(backends),
+            "seed": seed,
+            "min_time": min_time,
+            "replay_file": replay_file,
+            "tolerances": {backend: TOLERANCES[backend] for backend in backends}
+        },
+        "results": results,
+        "summary": {
+            "results": len(results),
+            "disagreements": disagreements
+        }
+    }
+
+
+def _case_key(result: Dict) -> tuple:
+    return (result["indicator"], tuple(result["params"]), result["series"], result["size"], result["backend"])
+
+
+def find_regressions(report: Dict, baseline: Dict, max_slowdown: float) -> List[Dict]:
+    """Cases whose ns/tick grew by more than max_slowdown times since the baseline report"""
+    previous = {_case_key(result): result for result in baseline.get("results", [])}
+    regressions = []
+    for result in report["results"]:
+        before = previous.get(_case_key(result))
+        if not before or not before["ns_per_tick"]:
+            continue
+        ratio = result["ns_per_tick"] / before["ns_per_tick"]
+        if ratio > max_slowdown:
+            regressions.append({
+                "case": f"{result['series']}/{result['size']}/{result['indicator']}/{result['backend']}",
+                "baseline_ns_per_tick": before["ns_per_tick"],
+                "ns_per_tick": result["ns_per_tick"],
+                "slowdown": round(ratio, 3)
+            })
+    return regressions
+
+
+def _csv_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark and check TechnicalIndicators backends")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)), help='Comma-separated series lengths')
+    parser.add_argument('--series', default=','.join(SERIES_KINDS), help=f'Any of {",".join(SERIES_KINDS)}')
+    parser.add_argument('--backends', default=','.join(BACKENDS), help=f'Any of {",".join(BACKENDS)}')
+    parser.add_argument('--indicators', default='', help='Only these indicators (e.g. rsi,macd)')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Seconds to time each case for')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--replay-file', help='CSV with ltp[,high,low] columns to replay')
+    parser.add_argument('--output', help='Write JSON here instead of stdout')
+    parser.add_argument('--baseline', help='Earlier JSON report to compare timings with')
+    parser.add_argument('--max-slowdown', type=float, default=1.25,
+                        help='Slowdown ratio against --baseline reported as a regression')
+    args = parser.parse_args()
+
+    kinds = _csv_list(args.series)
+    backends = _csv_list(args.backends)
+    for value, allowed in ((kinds, SERIES_KINDS), (backends, BACKENDS)):
+        unknown = set(value) - set(allowed)
+        if unknown:
+            parser.error(f"unknown value(s) {sorted(unknown)}, expected {allowed}")
+
+    report = run([int(size) for size in _csv_list(args.sizes)], kinds, backends,
+                 set(_csv_list(args.indicators)), args.min_time, args.seed, args.replay_file)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["summary"]["baseline"] = {
+            "git_commit": baseline.get("git_commit"),
+            "generated_at": baseline.get("generated_at"),
+            "max_slowdown": args.max_slowdown,
+            "regressions": find_regressions(report, baseline, args.max_slowdown)
+        }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    summary = report["summary"]
+    regressed = summary.get("baseline", {}).get("regressions")
+    return 1 if summary["disagreements"] or regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
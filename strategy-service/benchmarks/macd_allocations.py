@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+MACD allocation microbenchmark
+
+Compares the previous ``calculate_macd``, which built a throwaway
+``MarketDataTick`` per MACD value to reuse ``calculate_ema`` for the signal
+line, with the kernel-based version (``macd_series`` over the close column).
+Reports time per call and peak traced memory per call for tick lists and for
+ring buffer windows.
+
+Usage: python benchmarks/macd_allocations.py [--sizes 50,200] [--repeat 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# Pure-Python path only: this measures the kernels, not the NumPy backend
+os.environ.setdefault('INDICATOR_VECTORIZE_THRESHOLD', str(10 ** 9))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.models import MarketDataTick
+from shared.tick_store import TickStore
+from shared.timezone import get_ist_now
+from base.indicators import TechnicalIndicators
+
+
+def legacy_calculate_macd(ticks, fast_period=12, slow_period=26, signal_period=9):
+    """calculate_macd as it was before the float-series kernels"""
+    if len(ticks) < slow_period:
+        return {"macd": [], "signal": [], "histogram": []}
+
+    fast_ema = TechnicalIndicators.calculate_ema(ticks, fast_period)
+    slow_ema = TechnicalIndicators.calculate_ema(ticks, slow_period)
+    macd_line = [fast_ema[i] - slow_ema[i] for i in range(min(len(fast_ema), len(slow_ema)))]
+    if len(macd_line) < signal_period:
+        return {"macd": macd_line, "signal": [], "histogram": []}
+
+    macd_ticks = [
+        MarketDataTick(
+            symbol="MACD", token="", ltp=value, change=0, change_percent=0,
+            high=value, low=value, volume=0, bid=value, ask=value, open=value, close=value,
+            timestamp=ticks[i].timestamp, exchange_timestamp=ticks[i].exchange_timestamp
+        )
+        for i, value in enumerate(macd_line)
+    ]
+    signal_line = TechnicalIndicators.calculate_ema(macd_ticks, signal_period)
+    histogram = [macd_line[i] - signal_line[i] for i in range(min(len(macd_line), len(signal_line)))]
+    return {"macd": macd_line, "signal": signal_line, "histogram": histogram}
+
+
+def make_ticks(n, seed=7):
+    rng = random.Random(seed)
+    now = get_ist_now()
+    price = 1000.0
+    ticks = []
+    for _ in range(n):
+        price += rng.gauss(0, 1)
+        ticks.append(MarketDataTick(
+            symbol="BENCH", token="0", ltp=price, change=0, change_percent=0,
+            high=price + 0.5, low=price - 0.5, volume=0, bid=price, ask=price,
+            open=price, close=price, timestamp=now, exchange_timestamp=now
+        ))
+    return ticks
+
+
+def measure(func, series, repeat):
+    func(series)  # Warm up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(series)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    func(series)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed / repeat * 1e6, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', default='50,200', help='Comma-separated series lengths')
+    parser.add_argument('--repeat', type=int, default=2000, help='Calls per timing')
+    args = parser.parse_args()
+
+    print(f"{'ticks':>6} {'input':<8} {'implementation':<16} {'us/call':>10} {'peak KiB':>10}")
+    for n in (int(size) for size in args.sizes.split(',')):
+        ticks = make_ticks(n)
+        store = TickStore(capacity=n)
+        for tick in ticks:
+            store.append(tick)
+        window = store.window("BENCH", n)
+
+        cases = [
+            ("list", "legacy", legacy_calculate_macd, ticks),
+            ("list", "kernels", TechnicalIndicators.calculate_macd, ticks),
+            ("window", "kernels", TechnicalIndicators.calculate_macd, window),
+        ]
+        for source, name, func, series in cases:
+            us, peak = measure(func, series, args.repeat)
+            print(f"{n:>6} {source:<8} {name:<16} {us:>10.1f} {peak / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+Sharded Strategy Host - runs the strategy host across several worker processes
+
+Indicator math is CPU-bound and one asyncio loop saturates one core, so the
+sharded host starts ``STRATEGY_HOST_WORKERS`` worker processes, each running its
+own ``StrategyHost`` over a slice of the symbol universe. Symbols are assigned
+to workers with a consistent hash ring (``STRATEGY_HOST_VNODES`` virtual nodes
+per worker), so:
+
+- every strategy on a symbol runs in the same worker and keeps sharing its
+  incremental indicators;
+- a strategy_configs row whose symbols span several workers runs as one
+  instance per worker, each over its own symbols;
+- changing the worker count only moves about 1/N of the symbols.
+
+Each worker is its own consumer-group member on the
+``market_data_stream:{symbol}`` streams of its symbols, named
+``{CONSUMER_NAME or host name}-w{worker_id}``. The name is stable across worker
+restarts, so a restarted worker first re-reads the entries it left unacknowledged.
+Workers send signals back over a multiprocessing queue and the parent publishes
+them through a single ``SignalPublisher``. Workers that die are restarted.
+"""
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import socket
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+# Add parent directories to path
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/strategy-service')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from shared.models import TradingSignal
+from base.market_data_consumer import CONSUMER_NAME
+from base.signal_publisher import SignalPublisher
+from strategy_host import StrategyConfigSource, StrategyHost
+
+logger = logging.getLogger(__name__)
+
+STRATEGY_HOST_VNODES = int(os.getenv('STRATEGY_HOST_VNODES', '128'))
+
+
+class HashRing:
+    """Consistent hash ring mapping symbols to worker indexes"""
+
+    def __init__(self, nodes: List[int], vnodes: int = STRATEGY_HOST_VNODES):
+        self.nodes = list(nodes)
+        self.vnodes = max(1, vnodes)
+        ring = sorted((self._hash(f"{node}#{replica}"), node)
+                      for node in self.nodes for replica in range(self.vnodes))
+        self._keys = [point for point, _ in ring]
+        self._nodes = [node for _, node in ring]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        # Stable across processes and restarts (unlike hash())
+        return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+    def get(self, key: str) -> int:
+        """Worker index owning a key"""
+        index = bisect.bisect(self._keys, self._hash(key)) % len(self._keys)
+        return self._nodes[index]
+
+    def partition(self, keys) -> Dict[int, List[str]]:
+        """{worker: [keys]} for every node, including empty ones"""
+        assignment: Dict[int, List[str]] = {node: [] for node in self.nodes}
+        for key in keys:
+            assignment[self.get(key)].append(key)
+        return assignment
+
+
+class QueueSignalPublisher:
+    """SignalPublisher stand-in for workers: forwards signals to the parent process"""
+
+    def __init__(self, signal_queue, worker_id: int):
+        self.signal_queue = signal_queue
+        self.worker_id = worker_id
+        self.signals_published = 0
+
+    async def connect(self):
+        return True
+
+    async def disconnect(self):
+        pass
+
+    async def publish_signal(self, signal: TradingSignal):
+        try:
+            self.signal_queue.put_nowait(("signal", self.worker_id, signal))
+            self.signals_published += 1
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to forward signal from worker {self.worker_id}: {e}")
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "signals_forwarded": self.signals_published,
+            "worker_id": self.worker_id
+        }
+
+
+def run_worker(worker_id: int, num_workers: int, vnodes: int, signal_queue, stop_event,
+               redis_url: str, consumer_group: str, signal_channel: str,
+               poll_interval: float, stats_interval: float):
+    """Worker process entry point"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f'%(asctime)s - worker-{worker_id} - %(name)s - %(levelname)s - %(message)s'
+    )
+    try:
+        asyncio.run(_worker_main(worker_id, num_workers, vnodes, signal_queue, stop_event,
+                                 redis_url, consumer_group, signal_channel,
+                                 poll_interval, stats_interval))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _worker_main(worker_id: int, num_workers: int, vnodes: int, signal_queue, stop_event,
+                       redis_url: str, consumer_group: str, signal_channel: str,
+                       poll_interval: float, stats_interval: float):
+    ring = HashRing(list(range(num_workers)), vnodes)
+    host = StrategyHost(
+        StrategyConfigSource(),
+        redis_url=redis_url,
+        consumer_group=consumer_group,
+        signal_channel=signal_channel,
+        signal_publisher=QueueSignalPublisher(signal_queue, worker_id),
+        symbol_filter=lambda symbol: ring.get(symbol) == worker_id,
+        consumer_name=f"{CONSUMER_NAME or socket.gethostname()}-w{worker_id}"
+    )
+
+    try:
+        if not await host.start():
+            logger.error(f"❌ Worker {worker_id} failed to start")
+            return
+
+        last_sync = last_stats = 0.0
+        while not stop_event.is_set():
+            now = time.monotonic()
+            if now - last_stats >= stats_interval:
+                last_stats = now
+                signal_queue.put_nowait(("stats", worker_id, host.get_stats()))
+            await asyncio.sleep(0.5)
+            if time.monotonic() - last_sync >= poll_interval:
+                await host.sync()
+                last_sync = time.monotonic()
+    except Exception as e:
+        logger.error(f"❌ Worker {worker_id} error: {e}")
+    finally:
+        await host.stop()
+
+
+class ShardedStrategyHost:
+    """Runs StrategyHost workers in separate processes and merges their signals"""
+
+    def __init__(self, num_workers: int, redis_url: str,
+                 consumer_group: str = "strategy_consumers",
+                 signal_channel: str = "strategy_signals",
+                 vnodes: int = STRATEGY_HOST_VNODES,
+                 poll_interval: float = 30.0,
+                 stats_interval: float = 5.0):
+        """
+        Args:
+            num_workers: Worker processes to partition symbols across
+            redis_url: Redis URL for market data and signals
+            consumer_group: Consumer group every worker joins
+            signal_channel: Channel merged signals are published to
+            vnodes: Virtual nodes per worker on the hash ring
+            poll_interval: Seconds between strategy_configs polls in each worker
+            stats_interval: Seconds between worker stats reports to the parent
+        """
+        self.num_workers = max(1, num_workers)
+        self.redis_url = redis_url
+        self.consumer_group = consumer_group
+        self.signal_channel = signal_channel
+        self.vnodes = vnodes
+        self.poll_interval = poll_interval
+        self.stats_interval = stats_interval
+        self.ring = HashRing(list(range(self.num_workers)), vnodes)
+
+        # spawn: workers must not inherit the parent's event loop or Redis sockets
+        self._context = multiprocessing.get_context('spawn')
+        self.signal_queue = self._context.Queue()
+        self.stop_event = self._context.Event()
+        self.workers: Dict[int, multiprocessing.Process] = {}
+        self.signal_publisher = SignalPublisher(redis_url, signal_channel)
+        self.worker_stats: Dict[int, Dict[str, Any]] = {}
+        self.signals_merged: Dict[int, int] = {}
+        self.restarts: Dict[int, int] = {}
+        self._drain_task: Optional[asyncio.Task] = None
+        self.running = False
+
+    def _spawn(self, worker_id: int):
+        process = self._context.Process(
+            target=run_worker,
+            name=f"strategy-host-{worker_id}",
+            args=(worker_id, self.num_workers, self.vnodes, self.signal_queue, self.stop_event,
+                  self.redis_url, self.consumer_group, self.signal_channel,
+                  self.poll_interval, self.stats_interval),
+            daemon=True
+        )
+        process.start()
+        self.workers[worker_id] = process
+        logger.info(f"🚀 Started strategy host worker {worker_id} (pid {process.pid})")
+
+    async def start(self) -> bool:
+        """Connect the publisher and start the workers"""
+        try:
+            logger.info(f"🚀 Starting Sharded Strategy Host with {self.num_workers} workers...")
+            if not await self.signal_publisher.connect():
+                logger.error("❌ Failed to connect to Redis for signal publishing")
+                return False
+            self.running = True
+            for worker_id in range(self.num_workers):
+                self._spawn(worker_id)
+            self._drain_task = asyncio.create_task(self._drain())
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to start Sharded Strategy Host: {e}")
+            return False
+
+    async def _drain(self):
+        """Publish worker signals and collect worker stats"""
+        while self.running:
+            try:
+                kind, worker_id, payload = await asyncio.to_thread(self.signal_queue.get, True, 0.5)
+            except queue.Empty:
+                continue
+            except Exception as e:
+                logger.error(f"❌ Error reading worker queue: {e}")
+                continue
+
+            if kind == "signal":
+                self.signals_merged[worker_id] = self.signals_merged.get(worker_id, 0) + 1
+                await self.signal_publisher.publish_signal(payload)
+            elif kind == "stats":
+                self.worker_stats[worker_id] = payload
+
+    async def run_forever(self, check_interval: float = 5.0, stats_interval: float = 300.0):
+        """Restart dead workers until stopped"""
+        since_stats = 0.0
+        while self.running and not self.stop_event.is_set():
+            await asyncio.sleep(check_interval)
+            for worker_id, process in list(self.workers.items()):
+                if not process.is_alive() and not self.stop_event.is_set():
+                    logger.warning(f"⚠️ Worker {worker_id} exited with {process.exitcode}, restarting")
+                    self.restarts[worker_id] = self.restarts.get(worker_id, 0) + 1
+                    self.worker_stats.pop(worker_id, None)
+                    self._spawn(worker_id)
+            since_stats += check_interval
+            if since_stats >= stats_interval:
+                since_stats = 0.0
+                logger.info(f"📊 Sharded Strategy Host Stats: {self.get_stats()}")
+
+    async def stop(self, timeout: float = 10.0):
+        """Stop the workers, then the signal drain and publisher"""
+        self.stop_event.set()
+        for worker_id, process in self.workers.items():
+            await asyncio.to_thread(process.join, timeout)
+            if process.is_alive():
+                logger.warning(f"⚠️ Worker {worker_id} did not stop, terminating")
+                process.terminate()
+
+        # Let signals sent during shutdown drain before stopping the reader
+        await asyncio.sleep(0.6)
+        self.running = False
+        if self._drain_task:
+            await self._drain_task
+        await self.signal_publisher.disconnect()
+        logger.info("✅ Sharded Strategy Host stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        symbols = {worker_id: stats.get("consumer_stats", {}).get("symbols", [])
+                   for worker_id, stats in self.worker_stats.items()}
+        return {
+            "workers": self.num_workers,
+            "alive_workers": sum(1 for process in self.workers.values() if process.is_alive()),
+            "partitioning": {
+                "method": "consistent_hash",
+                "key": "symbol",
+                "vnodes": self.vnodes,
+                "symbols_by_worker": symbols
+            },
+            "pids": {worker_id: process.pid for worker_id, process in self.workers.items()},
+            "restarts": dict(self.restarts),
+            "signals_merged": dict(self.signals_merged),
+            "publisher_stats": self.signal_publisher.get_stats(),
+            "worker_stats": dict(self.worker_stats)
+        }
@@ -30,6 +30,33 @@ class MarketDataTick:
     exchange_timestamp: datetime
     raw_data: Dict[str, Any] = field(default_factory=dict)
 
+@dataclass
+class Bar:
+    """OHLCV bar aggregated from ticks over a fixed exchange-time interval"""
+    symbol: str
+    interval: str  # e.g. "1s", "1m", "5m", "15m"
+    start: datetime  # Bucket start (exchange time)
+    end: datetime  # Bucket end, exclusive
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int = 0  # Traded volume within the bar
+    tick_count: int = 0
+    
+    @property
+    def ltp(self) -> float:
+        """Close price, so bars can be used wherever ticks are"""
+        return self.close
+    
+    @property
+    def timestamp(self) -> datetime:
+        return self.start
+    
+    @property
+    def exchange_timestamp(self) -> datetime:
+        return self.start
+
 @dataclass
 class TradingSignal:
     """Trading signal from strategy"""
@@ -52,6 +79,8 @@ class StrategyConfig:
     redis_url: str = "redis://redis:6379"
     consumer_group: str = "strategy_consumers"
     signal_channel: str = "strategy_signals"
+    bar_interval: Optional[str] = None  # e.g. "1m"; None runs the strategy on every tick
+    eval_debounce_ms: float = 0.0  # Coalescing window for evaluations; 0 = next loop iteration
 
 @dataclass
 class StrategyStats:
@@ -60,6 +89,7 @@ class StrategyStats:
     signals_generated: int = 0
     last_signal_time: Optional[datetime] = None
     ticks_processed: int = 0
+    bars_processed: int = 0
     errors_count: int = 0
     uptime_start: datetime = field(default_factory=datetime.now)
     is_healthy: bool = True
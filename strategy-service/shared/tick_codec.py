@@ -0,0 +1,107 @@
+"""
+Compact binary encoding for market data ticks on Redis Streams
+
+The legacy stream format is one string field per tick attribute (14 fields,
+two ISO timestamps). The compact format is a single field holding a packed
+struct: a version byte, prices as integer paise, volume, epoch-ns timestamps,
+then the symbol and token as length-prefixed UTF-8.
+
+Publishers opt in with ``MARKET_DATA_ENCODING=binary``; consumers accept both
+formats (``decode_fields`` returns None for legacy messages).
+"""
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+ENCODING_LEGACY = "fields"
+ENCODING_BINARY = "binary"
+
+# Stream field holding the packed payload
+PAYLOAD_FIELD = "d"
+_PAYLOAD_KEY = PAYLOAD_FIELD.encode()
+
+ENCODING_VERSION = 1
+
+# version, ltp, change, high, low, bid, ask, open, close (paise), change_percent,
+# volume, timestamp_ns, exchange_timestamp_ns, symbol length, token length
+_HEADER_V1 = struct.Struct('<B8qd3q2B')
+
+# IST has no DST, so a fixed offset is equivalent and much cheaper than pytz
+_IST = timezone(timedelta(hours=5, minutes=30))
+
+
+class TickDecodeError(ValueError):
+    """Raised when a compact tick payload cannot be decoded"""
+
+
+def _paise(price: float) -> int:
+    return int(round(price * 100))
+
+
+def encode_tick(symbol: str, token: str, ltp: float, change: float, change_percent: float,
+                high: float, low: float, volume: int, bid: float, ask: float,
+                open_price: float, close: float, timestamp_ns: int, exchange_timestamp_ns: int) -> bytes:
+    """Pack one tick into the compact binary format (prices in rupees)"""
+    symbol_bytes = symbol.encode()
+    token_bytes = str(token).encode()
+    header = _HEADER_V1.pack(
+        ENCODING_VERSION,
+        _paise(ltp), _paise(change), _paise(high), _paise(low),
+        _paise(bid), _paise(ask), _paise(open_price), _paise(close),
+        change_percent, int(volume), int(timestamp_ns), int(exchange_timestamp_ns),
+        len(symbol_bytes), len(token_bytes)
+    )
+    return header + symbol_bytes + token_bytes
+
+
+def encode_fields(*args, **kwargs) -> Dict[str, bytes]:
+    """Stream fields for XADD carrying one compact tick (same arguments as encode_tick)"""
+    return {PAYLOAD_FIELD: encode_tick(*args, **kwargs)}
+
+
+def decode_tick(payload: bytes) -> Dict[str, Any]:
+    """
+    Unpack a compact tick into MarketDataTick keyword arguments
+
+    Timestamps are returned as IST-aware datetimes.
+    """
+    if not payload or payload[0] != ENCODING_VERSION:
+        version = payload[0] if payload else None
+        raise TickDecodeError(f"Unsupported tick encoding version: {version}")
+
+    try:
+        (_, ltp, change, high, low, bid, ask, open_price, close, change_percent,
+         volume, timestamp_ns, exchange_timestamp_ns, symbol_len, token_len) = _HEADER_V1.unpack_from(payload)
+    except struct.error as e:
+        raise TickDecodeError(f"Truncated tick payload: {e}")
+
+    offset = _HEADER_V1.size
+    symbol = payload[offset:offset + symbol_len].decode()
+    token = payload[offset + symbol_len:offset + symbol_len + token_len].decode()
+
+    return {
+        'symbol': symbol,
+        'token': token,
+        'ltp': ltp / 100,
+        'change': change / 100,
+        'change_percent': change_percent,
+        'high': high / 100,
+        'low': low / 100,
+        'volume': volume,
+        'bid': bid / 100,
+        'ask': ask / 100,
+        'open': open_price / 100,
+        'close': close / 100,
+        'timestamp': datetime.fromtimestamp(timestamp_ns / 1e9, _IST),
+        'exchange_timestamp': datetime.fromtimestamp(exchange_timestamp_ns / 1e9, _IST),
+    }
+
+
+def decode_fields(fields: Dict) -> Optional[Dict[str, Any]]:
+    """Decode a stream message if it uses the compact format, else return None"""
+    payload = fields.get(_PAYLOAD_KEY)
+    if payload is None:
+        payload = fields.get(PAYLOAD_FIELD)
+        if payload is None:
+            return None
+    return decode_tick(payload)
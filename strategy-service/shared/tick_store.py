@@ -0,0 +1,236 @@
+"""
+Columnar ring-buffer tick store
+
+Keeps a fixed number of recent ticks per symbol as one preallocated array per
+field instead of a list of MarketDataTick objects. Appends are O(1) and never
+reallocate; ``last(n)`` windows are zero-copy memoryviews (or NumPy views).
+
+Each slot is written twice (at ``i`` and ``i + capacity``) so that any window
+of up to ``capacity`` ticks is contiguous in memory. Views share memory with
+the buffer and are only valid until the next append for that symbol.
+"""
+from array import array
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from shared.timezone import IST
+
+# Stored fields; timestamp is the exchange (event) time in epoch nanoseconds
+TICK_COLUMNS = ('ltp', 'high', 'low', 'volume', 'bid', 'ask', 'timestamp')
+_TYPECODES = {'volume': 'q', 'timestamp': 'q'}
+_NUMPY_DTYPES = {'d': '<f8', 'q': '<i8'}
+
+DEFAULT_CAPACITY = 1000
+
+
+def datetime_to_ns(dt: datetime) -> int:
+    """Convert a datetime into epoch nanoseconds"""
+    return int(dt.timestamp() * 1_000_000) * 1000
+
+
+def ns_to_datetime(ns: int) -> datetime:
+    """Convert epoch nanoseconds into an IST datetime"""
+    return datetime.fromtimestamp(ns / 1e9, IST)
+
+
+class TickRow:
+    """Lightweight read-only row materialised from a TickWindow"""
+
+    __slots__ = ('symbol', 'ltp', 'high', 'low', 'volume', 'bid', 'ask', 'timestamp_ns')
+
+    def __init__(self, symbol, ltp, high, low, volume, bid, ask, timestamp_ns):
+        self.symbol = symbol
+        self.ltp = ltp
+        self.high = high
+        self.low = low
+        self.volume = volume
+        self.bid = bid
+        self.ask = ask
+        self.timestamp_ns = timestamp_ns
+
+    @property
+    def timestamp(self) -> datetime:
+        return ns_to_datetime(self.timestamp_ns)
+
+    @property
+    def exchange_timestamp(self) -> datetime:
+        return ns_to_datetime(self.timestamp_ns)
+
+    def __repr__(self):
+        return f"<TickRow {self.symbol} ltp={self.ltp} ts={self.timestamp_ns}>"
+
+
+class TickWindow:
+    """Zero-copy sequence view over the most recent ticks of one symbol"""
+
+    __slots__ = ('symbol', '_columns', '_length')
+
+    def __init__(self, symbol: str, columns: Dict[str, memoryview]):
+        self.symbol = symbol
+        self._columns = columns
+        self._length = len(columns['ltp'])
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __bool__(self) -> bool:
+        return self._length > 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return TickWindow(self.symbol, {name: view[index] for name, view in self._columns.items()})
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("tick window index out of range")
+        c = self._columns
+        return TickRow(
+            self.symbol,
+            c['ltp'][index], c['high'][index], c['low'][index], c['volume'][index],
+            c['bid'][index], c['ask'][index], c['timestamp'][index]
+        )
+
+    def __iter__(self) -> Iterator[TickRow]:
+        for index in range(self._length):
+            yield self[index]
+
+    def column(self, name: str) -> memoryview:
+        """Zero-copy view of one field (e.g. 'ltp')"""
+        return self._columns[name]
+
+    def to_numpy(self) -> Dict:
+        """Zero-copy NumPy views of every field (copy them to keep past the next append)"""
+        import numpy as np
+        return {
+            name: np.frombuffer(view, dtype=_NUMPY_DTYPES[view.format])
+            for name, view in self._columns.items()
+        }
+
+
+class TickRingBuffer:
+    """Fixed-capacity columnar ring buffer for one symbol"""
+
+    def __init__(self, symbol: str, capacity: int = DEFAULT_CAPACITY):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.symbol = symbol
+        self.capacity = capacity
+        self._arrays = {
+            name: array(_TYPECODES.get(name, 'd'), bytes(2 * capacity * 8))
+            for name in TICK_COLUMNS
+        }
+        self._views = {name: memoryview(arr) for name, arr in self._arrays.items()}
+        self._next = 0  # Slot the next tick is written to
+        self._size = 0
+        self.sequence = 0  # Total ticks ever appended
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, ltp: float, high: float, low: float, volume: int,
+               bid: float, ask: float, timestamp_ns: int):
+        """Append one tick in O(1)"""
+        i = self._next
+        j = i + self.capacity
+        a = self._arrays
+        a['ltp'][i] = a['ltp'][j] = ltp
+        a['high'][i] = a['high'][j] = high
+        a['low'][i] = a['low'][j] = low
+        a['volume'][i] = a['volume'][j] = volume
+        a['bid'][i] = a['bid'][j] = bid
+        a['ask'][i] = a['ask'][j] = ask
+        a['timestamp'][i] = a['timestamp'][j] = timestamp_ns
+
+        self._next = i + 1 if i + 1 < self.capacity else 0
+        if self._size < self.capacity:
+            self._size += 1
+        self.sequence += 1
+
+    def append_tick(self, tick):
+        """Append a MarketDataTick (or any object with the same attributes)"""
+        self.append(
+            tick.ltp, tick.high, tick.low, int(tick.volume),
+            tick.bid, tick.ask, datetime_to_ns(tick.exchange_timestamp)
+        )
+
+    def last(self, n: Optional[int] = None, column: str = 'ltp') -> memoryview:
+        """Zero-copy view of the last n values of one field (all buffered values if n is None)"""
+        start, end = self._bounds(n)
+        return self._views[column][start:end]
+
+    def window(self, n: Optional[int] = None) -> TickWindow:
+        """Zero-copy view of the last n ticks across all fields"""
+        start, end = self._bounds(n)
+        return TickWindow(self.symbol, {name: view[start:end] for name, view in self._views.items()})
+
+    def latest(self, column: str = 'ltp'):
+        """Most recent value of one field (None when empty)"""
+        if not self._size:
+            return None
+        return self._arrays[column][self._next + self.capacity - 1]
+
+    def to_numpy(self, n: Optional[int] = None) -> Dict:
+        """Zero-copy NumPy views of the last n ticks"""
+        return self.window(n).to_numpy()
+
+    def nbytes(self) -> int:
+        """Memory held by the column arrays"""
+        return sum(arr.itemsize * len(arr) for arr in self._arrays.values())
+
+    def _bounds(self, n: Optional[int]):
+        count = self._size if n is None or n <= 0 else min(n, self._size)
+        end = self._next + self.capacity
+        return end - count, end
+
+
+class TickStore:
+    """Per-symbol ring buffers with a shared capacity"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._buffers: Dict[str, TickRingBuffer] = {}
+        # Sequence of discarded buffers, continued if the symbol comes back
+        self._retired: Dict[str, int] = {}
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._buffers
+
+    def __len__(self) -> int:
+        return len(self._buffers)
+
+    def track(self, symbol: str) -> TickRingBuffer:
+        """Get the buffer for a symbol, creating it if needed"""
+        buffer = self._buffers.get(symbol)
+        if buffer is None:
+            buffer = TickRingBuffer(symbol, self.capacity)
+            buffer.sequence = self._retired.pop(symbol, 0)
+            self._buffers[symbol] = buffer
+        return buffer
+
+    def discard(self, symbol: str):
+        """Free a symbol's buffer (its sequence keeps counting if it is tracked again)"""
+        buffer = self._buffers.pop(symbol, None)
+        if buffer is not None:
+            self._retired[symbol] = buffer.sequence
+
+    def get(self, symbol: str) -> Optional[TickRingBuffer]:
+        return self._buffers.get(symbol)
+
+    def append(self, tick) -> TickRingBuffer:
+        """Append a tick to its symbol's buffer"""
+        buffer = self.track(tick.symbol)
+        buffer.append_tick(tick)
+        return buffer
+
+    def window(self, symbol: str, n: Optional[int] = None) -> TickWindow:
+        """Zero-copy view of the last n ticks for a symbol (empty if unknown)"""
+        buffer = self._buffers.get(symbol)
+        if buffer is None:
+            return TickWindow(symbol, {name: memoryview(array(_TYPECODES.get(name, 'd'))) for name in TICK_COLUMNS})
+        return buffer.window(n)
+
+    def symbols(self) -> List[str]:
+        return list(self._buffers)
+
+    def nbytes(self) -> int:
+        return sum(buffer.nbytes() for buffer in self._buffers.values())
@@ -9,8 +9,18 @@ import pytz
 # IST Timezone
 IST = pytz.timezone('Asia/Kolkata')
 
+# Replacement for the wall clock (e.g. replay time in backtests); None uses the wall clock
+_clock = None
+
+def set_clock(clock=None):
+    """Make get_ist_now() return clock() (an IST-aware datetime); None restores the wall clock"""
+    global _clock
+    _clock = clock
+
 def get_ist_now():
     """Get current time in IST"""
+    if _clock is not None:
+        return _clock()
     return datetime.now(IST)
 
 def get_ist_timestamp():
@@ -40,6 +50,7 @@ os.environ['TZ'] = 'Asia/Kolkata'
 __all__ = [
     'IST',
     'get_ist_now',
+    'set_clock',
     'get_ist_timestamp', 
     'convert_to_ist',
     'format_ist_time'
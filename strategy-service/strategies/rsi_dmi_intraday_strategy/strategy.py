@@ -6,25 +6,26 @@ import asyncio
 import logging
 import os
 import sys
-from datetime import datetime
-from typing import Dict, List
-import redis.asyncio as redis
+from typing import Optional
 
 # Add parent directories to path
 sys.path.insert(0, '/app')
 sys.path.insert(0, '/app/strategy-service')
 
 from shared.models import MarketDataTick, TradingSignal, SignalType, StrategyConfig
-from shared.timezone import get_ist_now, get_ist_timestamp
+from shared.timezone import get_ist_now
 from base.base_strategy import BaseStrategy
+from base.symbol_view import SymbolView
 
 logger = logging.getLogger(__name__)
 
 class RSIDMIIntradayStrategy(BaseStrategy):
     """RSI DMI Intraday Strategy using new architecture"""
     
-    def __init__(self, config: StrategyConfig):
-        super().__init__(config)
+    INDICATORS = ('rsi', 'dmi')
+    
+    def __init__(self, config: StrategyConfig, **kwargs):
+        super().__init__(config, **kwargs)
         
         # Strategy parameters
         self.entry_rsi_ul = self.parameters.get('entry_rsi_UL', 70)
@@ -36,110 +37,89 @@ class RSIDMIIntradayStrategy(BaseStrategy):
         logger.info(f"  DI Upper Limit: {self.di_ul}")
         logger.info(f"  RSI Lower Limit: {self.rsi_ll}")
     
-    async def run(self, market_data: Dict[str, MarketDataTick]) -> List[TradingSignal]:
-        """Run RSI DMI Intraday strategy"""
-        signals = []
+    async def on_tick(self, symbol: str, view: SymbolView) -> Optional[TradingSignal]:
+        """Evaluate RSI DMI Intraday for the symbol that ticked"""
+        # RSI and DMI are maintained incrementally on every tick
+        indicators = view.indicators
+        if not indicators or not indicators.rsi.ready or not indicators.dmi.ready:
+            ticks_seen = indicators.ticks_seen if indicators else 0
+            logger.warning(f"⚠️ Insufficient historical data for {symbol}: {ticks_seen} ticks")
+            return None
+        
+        # Get last two candles for delayed entry check
+        hist_data = view.history(2)
+        if len(hist_data) < 2:
+            return None
+        last_sec_candle = hist_data[-2]
+        
+        # Check if candles are from today
+        if not self._is_today_candle(last_sec_candle):
+            return None
+        
+        # Get values for both candles
+        last_rsi = indicators.rsi.value
+        last_di_plus = indicators.dmi.value.plus_di
+        last_di_minus = indicators.dmi.value.minus_di
+        
+        sec_last_rsi = indicators.rsi.previous
+        sec_last_di_plus = indicators.dmi.previous.plus_di
+        sec_last_di_minus = indicators.dmi.previous.minus_di
         
-        for symbol in self.symbols:
-            if symbol not in market_data:
-                logger.warning(f"⚠️ No market data for {symbol}")
-                continue
+        current_tick = view.tick
+        
+        # Check buy conditions (both candles must satisfy)
+        if (last_rsi >= self.entry_rsi_ul and 
+            last_di_plus >= self.di_ul and
+            sec_last_rsi >= self.entry_rsi_ul and 
+            sec_last_di_plus >= self.di_ul):
             
-            try:
-                # Get historical data for RSI and DMI calculation
-                hist_data = self.get_historical_buffer(symbol, 50)  # Get last 50 ticks
-                if len(hist_data) < 15:  # Need at least 15 ticks for RSI/DMI calculation
-                    logger.warning(f"⚠️ Insufficient historical data for {symbol}: {len(hist_data)} ticks")
-                    continue
-                
-                # Check if we have enough data for delayed entry
-                if len(hist_data) < 2:
-                    continue
-                
-                # Get last two candles for delayed entry check
-                last_candle = hist_data[-1]
-                last_sec_candle = hist_data[-2]
-                
-                # Check if candles are from today
-                if not self._is_today_candle(last_sec_candle):
-                    continue
-                
-                # Calculate RSI and DMI for both candles
-                rsi_values = self.indicators.calculate_rsi(hist_data, 14)
-                dmi_data = self.indicators.calculate_dmi(hist_data, 14)
-                
-                if not rsi_values or not dmi_data or len(rsi_values) < 2 or len(dmi_data['+DI']) < 2:
-                    continue
-                
-                # Get values for both candles
-                last_rsi = rsi_values[-1]
-                last_di_plus = dmi_data['+DI'][-1]
-                last_di_minus = dmi_data['-DI'][-1]
-                
-                sec_last_rsi = rsi_values[-2]
-                sec_last_di_plus = dmi_data['+DI'][-2]
-                sec_last_di_minus = dmi_data['-DI'][-2]
-                
-                current_tick = market_data[symbol]
-                
-                # Check buy conditions (both candles must satisfy)
-                if (last_rsi >= self.entry_rsi_ul and 
-                    last_di_plus >= self.di_ul and
-                    sec_last_rsi >= self.entry_rsi_ul and 
-                    sec_last_di_plus >= self.di_ul):
-                    
-                    signal = TradingSignal(
-                        strategy_id=self.strategy_id,
-                        symbol=symbol,
-                        signal_type=SignalType.BUY,
-                        confidence=0.8,
-                        price=current_tick.ltp,
-                        quantity=self.calculate_quantity(current_tick.ltp),
-                        timestamp=get_ist_now(),
-                        metadata={
-                            'strategy': 'RSI DMI Intraday',
-                            'last_rsi': last_rsi,
-                            'last_di_plus': last_di_plus,
-                            'sec_last_rsi': sec_last_rsi,
-                            'sec_last_di_plus': sec_last_di_plus,
-                            'entry_rsi_ul': self.entry_rsi_ul,
-                            'di_ul': self.di_ul
-                        }
-                    )
-                    signals.append(signal)
-                    logger.info(f"📈 RSI DMI Intraday BUY signal for {symbol}: RSI={last_rsi:.2f}, +DI={last_di_plus:.2f}")
-                
-                # Check sell conditions (both candles must satisfy)
-                elif (last_rsi <= self.rsi_ll and 
-                      last_di_minus >= self.di_ul and
-                      sec_last_rsi <= self.rsi_ll and 
-                      sec_last_di_minus >= self.di_ul):
-                    
-                    signal = TradingSignal(
-                        strategy_id=self.strategy_id,
-                        symbol=symbol,
-                        signal_type=SignalType.SELL,
-                        confidence=0.8,
-                        price=current_tick.ltp,
-                        quantity=self.calculate_quantity(current_tick.ltp),
-                        timestamp=get_ist_now(),
-                        metadata={
-                            'strategy': 'RSI DMI Intraday',
-                            'last_rsi': last_rsi,
-                            'last_di_minus': last_di_minus,
-                            'sec_last_rsi': sec_last_rsi,
-                            'sec_last_di_minus': sec_last_di_minus,
-                            'rsi_ll': self.rsi_ll,
-                            'di_ul': self.di_ul
-                        }
-                    )
-                    signals.append(signal)
-                    logger.info(f"📉 RSI DMI Intraday SELL signal for {symbol}: RSI={last_rsi:.2f}, -DI={last_di_minus:.2f}")
-                    
-            except Exception as e:
-                logger.error(f"❌ Error in RSI DMI Intraday strategy for {symbol}: {e}")
-                
-        return signals
+            logger.info(f"📈 RSI DMI Intraday BUY signal for {symbol}: RSI={last_rsi:.2f}, +DI={last_di_plus:.2f}")
+            return TradingSignal(
+                strategy_id=self.strategy_id,
+                symbol=symbol,
+                signal_type=SignalType.BUY,
+                confidence=0.8,
+                price=current_tick.ltp,
+                quantity=self.calculate_quantity(current_tick.ltp),
+                timestamp=get_ist_now(),
+                metadata={
+                    'strategy': 'RSI DMI Intraday',
+                    'last_rsi': last_rsi,
+                    'last_di_plus': last_di_plus,
+                    'sec_last_rsi': sec_last_rsi,
+                    'sec_last_di_plus': sec_last_di_plus,
+                    'entry_rsi_ul': self.entry_rsi_ul,
+                    'di_ul': self.di_ul
+                }
+            )
+        
+        # Check sell conditions (both candles must satisfy)
+        if (last_rsi <= self.rsi_ll and 
+            last_di_minus >= self.di_ul and
+            sec_last_rsi <= self.rsi_ll and 
+            sec_last_di_minus >= self.di_ul):
+            
+            logger.info(f"📉 RSI DMI Intraday SELL signal for {symbol}: RSI={last_rsi:.2f}, -DI={last_di_minus:.2f}")
+            return TradingSignal(
+                strategy_id=self.strategy_id,
+                symbol=symbol,
+                signal_type=SignalType.SELL,
+                confidence=0.8,
+                price=current_tick.ltp,
+                quantity=self.calculate_quantity(current_tick.ltp),
+                timestamp=get_ist_now(),
+                metadata={
+                    'strategy': 'RSI DMI Intraday',
+                    'last_rsi': last_rsi,
+                    'last_di_minus': last_di_minus,
+                    'sec_last_rsi': sec_last_rsi,
+                    'sec_last_di_minus': sec_last_di_minus,
+                    'rsi_ll': self.rsi_ll,
+                    'di_ul': self.di_ul
+                }
+            )
+        
+        return None
     
     def _is_today_candle(self, candle: MarketDataTick) -> bool:
         """Check if candle is from today"""
@@ -184,7 +164,9 @@ async def main():
         symbols=symbols,
         parameters=parameters,
         enabled=True,
-        redis_url=redis_url
+        redis_url=redis_url,
+        bar_interval=os.getenv('BAR_INTERVAL') or None,  # e.g. "1m"; unset = every tick
+        eval_debounce_ms=float(os.getenv('EVAL_DEBOUNCE_MS', '0'))
     )
     
     # Create and start strategy
@@ -5,25 +5,26 @@ import asyncio
 import logging
 import os
 import sys
-from datetime import datetime
-from typing import Dict, List
-import redis.asyncio as redis
+from typing import Optional
 
 # Add parent directories to path
 sys.path.insert(0, '/app')
 sys.path.insert(0, '/app/strategy-service')
 
-from shared.models import MarketDataTick, TradingSignal, SignalType, StrategyConfig
-from shared.timezone import get_ist_now, get_ist_timestamp
+from shared.models import TradingSignal, SignalType, StrategyConfig
+from shared.timezone import get_ist_now
 from base.base_strategy import BaseStrategy
+from base.symbol_view import SymbolView
 
 logger = logging.getLogger(__name__)
 
 class RSIDMIStrategy(BaseStrategy):
     """RSI DMI Strategy using new architecture"""
     
-    def __init__(self, config: StrategyConfig):
-        super().__init__(config)
+    INDICATORS = ('rsi', 'dmi')
+    
+    def __init__(self, config: StrategyConfig, **kwargs):
+        super().__init__(config, **kwargs)
         
         # Strategy parameters
         self.entry_rsi_ul = self.parameters.get('entry_rsi_UL', 70)
@@ -35,100 +36,80 @@ class RSIDMIStrategy(BaseStrategy):
         logger.info(f"  DI Upper Limit: {self.di_ul}")
         logger.info(f"  RSI Lower Limit: {self.rsi_ll}")
     
-    async def run(self, market_data: Dict[str, MarketDataTick]) -> List[TradingSignal]:
-        """Run RSI DMI strategy"""
-        signals = []
+    async def on_tick(self, symbol: str, view: SymbolView) -> Optional[TradingSignal]:
+        """Evaluate RSI DMI for the symbol that ticked"""
+        # RSI and DMI are maintained incrementally on every tick
+        indicators = view.indicators
+        if not indicators or not indicators.rsi.ready or not indicators.dmi.ready:
+            ticks_seen = indicators.ticks_seen if indicators else 0
+            logger.warning(f"⚠️ Insufficient historical data for {symbol}: {ticks_seen} ticks")
+            return None
+        
+        # Get latest values
+        latest_rsi = indicators.rsi.value
+        latest_di_plus = indicators.dmi.value.plus_di
+        latest_di_minus = indicators.dmi.value.minus_di
+        
+        # Get previous values for confirmation
+        prev_rsi = indicators.rsi.previous
+        prev_di_plus = indicators.dmi.previous.plus_di
+        prev_di_minus = indicators.dmi.previous.minus_di
+        
+        current_tick = view.tick
         
-        for symbol in self.symbols:
-            if symbol not in market_data:
-                logger.warning(f"⚠️ No market data for {symbol}")
-                continue
+        # Check buy conditions (both current and previous must satisfy)
+        if (latest_rsi >= self.entry_rsi_ul and 
+            latest_di_plus >= self.di_ul and
+            prev_rsi >= self.entry_rsi_ul and 
+            prev_di_plus >= self.di_ul):
             
-            try:
-                # Get historical data for RSI and DMI calculation
-                hist_data = self.get_historical_buffer(symbol, 50)  # Get last 50 ticks
-                if len(hist_data) < 15:  # Need at least 15 ticks for RSI/DMI calculation
-                    logger.warning(f"⚠️ Insufficient historical data for {symbol}: {len(hist_data)} ticks")
-                    continue
-                
-                # Calculate RSI and DMI
-                rsi_values = self.indicators.calculate_rsi(hist_data, 14)
-                dmi_data = self.indicators.calculate_dmi(hist_data, 14)
-                
-                if not rsi_values or not dmi_data or len(rsi_values) < 2 or len(dmi_data['+DI']) < 2:
-                    logger.warning(f"⚠️ Insufficient indicator data for {symbol}")
-                    continue
-                
-                # Get latest values
-                latest_rsi = rsi_values[-1]
-                latest_di_plus = dmi_data['+DI'][-1]
-                latest_di_minus = dmi_data['-DI'][-1]
-                
-                # Get previous values for confirmation
-                prev_rsi = rsi_values[-2] if len(rsi_values) > 1 else latest_rsi
-                prev_di_plus = dmi_data['+DI'][-2] if len(dmi_data['+DI']) > 1 else latest_di_plus
-                prev_di_minus = dmi_data['-DI'][-2] if len(dmi_data['-DI']) > 1 else latest_di_minus
-                
-                current_tick = market_data[symbol]
-                
-                # Check buy conditions (both current and previous must satisfy)
-                if (latest_rsi >= self.entry_rsi_ul and 
-                    latest_di_plus >= self.di_ul and
-                    prev_rsi >= self.entry_rsi_ul and 
-                    prev_di_plus >= self.di_ul):
-                    
-                    signal = TradingSignal(
-                        strategy_id=self.strategy_id,
-                        symbol=symbol,
-                        signal_type=SignalType.BUY,
-                        confidence=0.8,
-                        price=current_tick.ltp,
-                        quantity=self.calculate_quantity(current_tick.ltp),
-                        timestamp=get_ist_now(),
-                        metadata={
-                            'strategy': 'RSI DMI',
-                            'latest_rsi': latest_rsi,
-                            'latest_di_plus': latest_di_plus,
-                            'prev_rsi': prev_rsi,
-                            'prev_di_plus': prev_di_plus,
-                            'entry_rsi_ul': self.entry_rsi_ul,
-                            'di_ul': self.di_ul
-                        }
-                    )
-                    signals.append(signal)
-                    logger.info(f"📈 RSI DMI BUY signal for {symbol}: RSI={latest_rsi:.2f}, +DI={latest_di_plus:.2f}")
-                
-                # Check sell conditions (both current and previous must satisfy)
-                elif (latest_rsi <= self.rsi_ll and 
-                      latest_di_minus >= self.di_ul and
-                      prev_rsi <= self.rsi_ll and 
-                      prev_di_minus >= self.di_ul):
-                    
-                    signal = TradingSignal(
-                        strategy_id=self.strategy_id,
-                        symbol=symbol,
-                        signal_type=SignalType.SELL,
-                        confidence=0.8,
-                        price=current_tick.ltp,
-                        quantity=self.calculate_quantity(current_tick.ltp),
-                        timestamp=get_ist_now(),
-                        metadata={
-                            'strategy': 'RSI DMI',
-                            'latest_rsi': latest_rsi,
-                            'latest_di_minus': latest_di_minus,
-                            'prev_rsi': prev_rsi,
-                            'prev_di_minus': prev_di_minus,
-                            'rsi_ll': self.rsi_ll,
-                            'di_ul': self.di_ul
-                        }
-                    )
-                    signals.append(signal)
-                    logger.info(f"📉 RSI DMI SELL signal for {symbol}: RSI={latest_rsi:.2f}, -DI={latest_di_minus:.2f}")
-                    
-            except Exception as e:
-                logger.error(f"❌ Error in RSI DMI strategy for {symbol}: {e}")
-                
-        return signals
+            logger.info(f"📈 RSI DMI BUY signal for {symbol}: RSI={latest_rsi:.2f}, +DI={latest_di_plus:.2f}")
+            return TradingSignal(
+                strategy_id=self.strategy_id,
+                symbol=symbol,
+                signal_type=SignalType.BUY,
+                confidence=0.8,
+                price=current_tick.ltp,
+                quantity=self.calculate_quantity(current_tick.ltp),
+                timestamp=get_ist_now(),
+                metadata={
+                    'strategy': 'RSI DMI',
+                    'latest_rsi': latest_rsi,
+                    'latest_di_plus': latest_di_plus,
+                    'prev_rsi': prev_rsi,
+                    'prev_di_plus': prev_di_plus,
+                    'entry_rsi_ul': self.entry_rsi_ul,
+                    'di_ul': self.di_ul
+                }
+            )
+        
+        # Check sell conditions (both current and previous must satisfy)
+        if (latest_rsi <= self.rsi_ll and 
+            latest_di_minus >= self.di_ul and
+            prev_rsi <= self.rsi_ll and 
+            prev_di_minus >= self.di_ul):
+            
+            logger.info(f"📉 RSI DMI SELL signal for {symbol}: RSI={latest_rsi:.2f}, -DI={latest_di_minus:.2f}")
+            return TradingSignal(
+                strategy_id=self.strategy_id,
+                symbol=symbol,
+                signal_type=SignalType.SELL,
+                confidence=0.8,
+                price=current_tick.ltp,
+                quantity=self.calculate_quantity(current_tick.ltp),
+                timestamp=get_ist_now(),
+                metadata={
+                    'strategy': 'RSI DMI',
+                    'latest_rsi': latest_rsi,
+                    'latest_di_minus': latest_di_minus,
+                    'prev_rsi': prev_rsi,
+                    'prev_di_minus': prev_di_minus,
+                    'rsi_ll': self.rsi_ll,
+                    'di_ul': self.di_ul
+                }
+            )
+        
+        return None
 
 async def main():
     """Main entry point for the strategy service"""
@@ -162,7 +143,9 @@ async def main():
         symbols=symbols,
         parameters=parameters,
         enabled=True,
-        redis_url=redis_url
+        redis_url=redis_url,
+        bar_interval=os.getenv('BAR_INTERVAL') or None,  # e.g. "1m"; unset = every tick
+        eval_debounce_ms=float(os.getenv('EVAL_DEBOUNCE_MS', '0'))
     )
     
     # Create and start strategy
@@ -6,25 +6,24 @@ import asyncio
 import logging
 import os
 import sys
-from datetime import datetime
-from typing import Dict, List
-import redis.asyncio as redis
+from typing import List, Optional
 
 # Add parent directories to path
 sys.path.insert(0, '/app')
 sys.path.insert(0, '/app/strategy-service')
 
 from shared.models import MarketDataTick, TradingSignal, SignalType, StrategyConfig
-from shared.timezone import get_ist_now, get_ist_timestamp
+from shared.timezone import get_ist_now
 from base.base_strategy import BaseStrategy
+from base.symbol_view import SymbolView
 
 logger = logging.getLogger(__name__)
 
 class SwingMomentumStrategy(BaseStrategy):
     """Swing Momentum Strategy using new architecture"""
     
-    def __init__(self, config: StrategyConfig):
-        super().__init__(config)
+    def __init__(self, config: StrategyConfig, **kwargs):
+        super().__init__(config, **kwargs)
         
         # Strategy parameters
         self.momentum_percentage = self.parameters.get('momentum_percentage', 4.0)
@@ -34,73 +33,59 @@ class SwingMomentumStrategy(BaseStrategy):
         logger.info(f"  Momentum Percentage: {self.momentum_percentage}")
         logger.info(f"  Holding Days: {self.holding_days}")
     
-    async def run(self, market_data: Dict[str, MarketDataTick]) -> List[TradingSignal]:
-        """Run Swing Momentum strategy"""
-        signals = []
+    async def on_tick(self, symbol: str, view: SymbolView) -> Optional[TradingSignal]:
+        """Evaluate Swing Momentum for the symbol that ticked"""
+        # Get historical data for momentum calculation
+        hist_data = view.history(50)  # Get last 50 ticks
+        if len(hist_data) < 2:
+            logger.warning(f"⚠️ Insufficient historical data for {symbol}: {len(hist_data)} ticks")
+            return None
         
-        for symbol in self.symbols:
-            if symbol not in market_data:
-                logger.warning(f"⚠️ No market data for {symbol}")
-                continue
-            
-            try:
-                # Get historical data for momentum calculation
-                hist_data = self.get_historical_buffer(symbol, 50)  # Get last 50 ticks
-                if len(hist_data) < 2:
-                    logger.warning(f"⚠️ Insufficient historical data for {symbol}: {len(hist_data)} ticks")
-                    continue
-                
-                # Check if we have MACD and Stochastic signals (simplified for new architecture)
-                if not await self._check_macd_stoch_signals(symbol):
-                    continue
-                
-                # Calculate momentum
-                momentum = self._calculate_momentum(hist_data)
-                if momentum is None:
-                    continue
-                
-                # Check momentum condition
-                if momentum >= self.momentum_percentage:
-                    current_tick = market_data[symbol]
-                    
-                    signal = TradingSignal(
-                        strategy_id=self.strategy_id,
-                        symbol=symbol,
-                        signal_type=SignalType.BUY,
-                        confidence=0.8,
-                        price=current_tick.ltp,
-                        quantity=self.calculate_quantity(current_tick.ltp),
-                        timestamp=get_ist_now(),
-                        metadata={
-                            'strategy': 'Swing Momentum',
-                            'momentum_percentage': momentum,
-                            'required_momentum': self.momentum_percentage,
-                            'holding_days': self.holding_days
-                        }
-                    )
-                    signals.append(signal)
-                    logger.info(f"📈 Swing Momentum BUY signal for {symbol}: Momentum={momentum:.2f}%")
-                    
-            except Exception as e:
-                logger.error(f"❌ Error in Swing Momentum strategy for {symbol}: {e}")
-                
-        return signals
+        # Check if we have MACD and Stochastic signals (simplified for new architecture)
+        if not await self._check_macd_stoch_signals(symbol, hist_data):
+            return None
+        
+        # Calculate momentum
+        momentum = self._calculate_momentum(hist_data)
+        if momentum is None:
+            return None
+        
+        # Check momentum condition
+        if momentum < self.momentum_percentage:
+            return None
+        
+        current_tick = view.tick
+        logger.info(f"📈 Swing Momentum BUY signal for {symbol}: Momentum={momentum:.2f}%")
+        return TradingSignal(
+            strategy_id=self.strategy_id,
+            symbol=symbol,
+            signal_type=SignalType.BUY,
+            confidence=0.8,
+            price=current_tick.ltp,
+            quantity=self.calculate_quantity(current_tick.ltp),
+            timestamp=get_ist_now(),
+            metadata={
+                'strategy': 'Swing Momentum',
+                'momentum_percentage': momentum,
+                'required_momentum': self.momentum_percentage,
+                'holding_days': self.holding_days
+            }
+        )
     
-    async def _check_macd_stoch_signals(self, symbol: str) -> bool:
+    async def _check_macd_stoch_signals(self, symbol: str, hist_data) -> bool:
         """Check if MACD and Stochastic signals are aligned"""
         try:
             # In the new architecture, we can calculate MACD and Stochastic directly
-            hist_data = self.get_historical_buffer(symbol, 50)
             if len(hist_data) < 26:  # Need at least 26 ticks for MACD calculation
                 return False
             
             # Calculate MACD
-            macd_data = self.indicators.calculate_macd(hist_data, 12, 26, 9)
+            macd_data = self.calculate_indicator(symbol, 'macd', hist_data, 12, 26, 9)
             if not macd_data or not macd_data['macd'] or len(macd_data['macd']) < 2:
                 return False
             
             # Calculate Stochastic
-            stoch_data = self.indicators.calculate_stochastic(hist_data, 14, 3)
+            stoch_data = self.calculate_indicator(symbol, 'stochastic', hist_data, 14, 3)
             if not stoch_data or not stoch_data['%K'] or len(stoch_data['%K']) < 2:
                 return False
             
@@ -171,7 +156,9 @@ async def main():
         symbols=symbols,
         parameters=parameters,
         enabled=True,
-        redis_url=redis_url
+        redis_url=redis_url,
+        bar_interval=os.getenv('BAR_INTERVAL') or None,  # e.g. "1m"; unset = every tick
+        eval_debounce_ms=float(os.getenv('EVAL_DEBOUNCE_MS', '0'))
     )
     
     # Create and start strategy
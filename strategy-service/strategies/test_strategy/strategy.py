@@ -23,8 +23,8 @@ logger = logging.getLogger(__name__)
 class TestStrategy(BaseStrategy):
     """Test Strategy using new architecture"""
     
-    def __init__(self, config: StrategyConfig):
-        super().__init__(config)
+    def __init__(self, config: StrategyConfig, **kwargs):
+        super().__init__(config, **kwargs)
         
         # Strategy parameters
         self.test_mode = self.parameters.get('test_mode', True)
@@ -43,10 +43,8 @@ class TestStrategy(BaseStrategy):
         logger.info(f"[TestStrategy] Processing market data for {len(market_data)} symbols")
         
         # Simple test logic - generate a basic signal for each symbol periodically
-        for symbol in self.symbols:
-            if symbol not in market_data:
-                logger.warning(f"⚠️ No market data for {symbol}")
-                continue
+        # Only symbols with new data since the last run are passed in
+        for symbol in market_data:
             
             try:
                 current_tick = market_data[symbol]
@@ -112,7 +110,9 @@ async def main():
         symbols=symbols,
         parameters=parameters,
         enabled=True,
-        redis_url=redis_url
+        redis_url=redis_url,
+        bar_interval=os.getenv('BAR_INTERVAL') or None,  # e.g. "1m"; unset = every tick
+        eval_debounce_ms=float(os.getenv('EVAL_DEBOUNCE_MS', '0'))
     )
     
     # Create and start strategy
@@ -0,0 +1,349 @@
+"""
+Strategy Host - runs many strategies in one process
+
+Loads strategy instances from the ``strategy_configs`` table (rows with
+``auto_start`` set and status ``ACTIVE``), imports each row's ``class_name``
+from its ``module_path`` and runs them all over one Redis connection, one
+market data consumer, one signal publisher and one shared incremental
+indicator cache. The table is polled, so rows added, changed or removed (or
+switched off) are started, restarted or stopped without restarting the host.
+
+A row's ``config_json`` holds the instance configuration::
+
+    {
+        "symbols": ["RELIANCE", "TCS"],
+        "parameters": {"entry_rsi_UL": 70, "di_UL": 25, "rsi_LL": 30},
+        "bar_interval": "1m",          # optional
+        "eval_debounce_ms": 0          # optional
+    }
+
+``module_path`` is a dotted module (``strategies.rsi_dmi_strategy.strategy``)
+or a ``.py`` path relative to ``strategy-service/``.
+"""
+import asyncio
+import hashlib
+import importlib
+import importlib.util
+import json
+import logging
+import os
+import sys
+from typing import Any, Callable, Dict, List, Optional
+
+import redis.asyncio as redis
+
+# Add parent directories to path
+sys.path.insert(0, '/app')
+sys.path.insert(0, '/app/strategy-service')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from shared.models import StrategyConfig
+from base.base_strategy import BaseStrategy
+from base.incremental_indicators import IndicatorCache
+from base.indicator_registry import IndicatorRegistry
+from base.market_data_consumer import MarketDataConsumer
+from base.signal_publisher import SignalPublisher
+
+logger = logging.getLogger(__name__)
+
+STRATEGY_SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STRATEGY_CONFIGS_QUERY = """
+    SELECT id::text, strategy_id, name, class_name, module_path, config_json, status, auto_start
+    FROM strategy_configs
+    WHERE auto_start = true AND status = 'ACTIVE'
+"""
+
+
+def load_strategy_class(module_path: str, class_name: str, modules: Optional[Dict[str, Any]] = None):
+    """Import a strategy class from a dotted module or a .py path (modules caches loaded modules)"""
+    modules = modules if modules is not None else {}
+    module = modules.get(module_path)
+    if module is None:
+        if module_path.endswith('.py'):
+            path = module_path if os.path.isabs(module_path) else os.path.join(STRATEGY_SERVICE_DIR, module_path)
+            module_name = os.path.splitext(os.path.relpath(path, STRATEGY_SERVICE_DIR))[0].replace(os.sep, '.')
+            spec = importlib.util.spec_from_file_location(module_name, path)
+            if spec is None:
+                raise ImportError(f"Cannot load strategy module from {path}")
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        else:
+            module = importlib.import_module(module_path)
+        modules[module_path] = module
+
+    strategy_class = getattr(module, class_name, None)
+    if not isinstance(strategy_class, type) or not issubclass(strategy_class, BaseStrategy):
+        raise ImportError(f"{class_name} in {module_path} is not a BaseStrategy")
+    return strategy_class
+
+
+class StrategyConfigSource:
+    """Reads runnable strategy_configs rows from Postgres (or a JSON file of rows)"""
+
+    def __init__(self, database_url: Optional[str] = None, config_file: Optional[str] = None):
+        self.database_url = database_url or os.getenv('DATABASE_URL')
+        self.config_file = config_file or os.getenv('STRATEGY_CONFIGS_FILE')
+
+    async def fetch(self) -> List[Dict[str, Any]]:
+        if self.config_file:
+            return await asyncio.to_thread(self._fetch_file)
+        return await asyncio.to_thread(self._fetch_database)
+
+    def _fetch_file(self) -> List[Dict[str, Any]]:
+        with open(self.config_file, 'r') as f:
+            rows = json.load(f)
+        return [row for row in rows if row.get('auto_start') and row.get('status', 'ACTIVE') == 'ACTIVE']
+
+    def _fetch_database(self) -> List[Dict[str, Any]]:
+        import psycopg2
+        import psycopg2.extras
+
+        if not self.database_url:
+            raise ValueError("DATABASE_URL environment variable is required")
+        # SQLAlchemy-style URLs (postgresql+psycopg2://) aren't understood by libpq
+        dsn = self.database_url.replace('+psycopg2', '')
+
+        conn = psycopg2.connect(dsn)
+        try:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                cursor.execute(STRATEGY_CONFIGS_QUERY)
+                return [dict(row) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+
+
+class StrategyHost:
+    """Runs strategy instances from strategy_configs over shared components"""
+
+    def __init__(self, source: StrategyConfigSource, redis_url: str,
+                 consumer_group: str = "strategy_consumers",
+                 signal_channel: str = "strategy_signals",
+                 signal_publisher: Optional[SignalPublisher] = None,
+                 symbol_filter: Optional[Callable[[str], bool]] = None,
+                 consumer_name: Optional[str] = None):
+        """
+        Args:
+            source: Where strategy_configs rows come from
+            redis_url: Redis URL for market data (and signals)
+            consumer_group: Consumer group for the market data streams
+            signal_channel: Channel signals are published to
+            signal_publisher: Publisher to use instead of a Redis one (e.g. a
+                worker forwarding signals to its parent)
+            symbol_filter: Only host the symbols it accepts (used to partition
+                symbols across worker processes)
+            consumer_name: Consumer-group member name (defaults to the host's
+                stable name, see MarketDataConsumer)
+        """
+        self.source = source
+        self.symbol_filter = symbol_filter
+        self.redis_url = redis_url
+        self.consumer_group = consumer_group
+        self.signal_channel = signal_channel
+
+        # One connection pool, consumer, publisher and indicator caches for every strategy
+        self.redis_client = redis.from_url(redis_url)
+        self.market_data_consumer = MarketDataConsumer(redis_url, consumer_group, redis_client=self.redis_client,
+                                                       consumer_name=consumer_name)
+        self.signal_publisher = signal_publisher or SignalPublisher(redis_url, signal_channel, redis_client=self.redis_client)
+        self.indicator_cache = IndicatorCache()
+        self.indicator_registry = IndicatorRegistry()
+
+        self.strategies: Dict[str, BaseStrategy] = {}  # strategy_configs.id -> instance
+        self._fingerprints: Dict[str, str] = {}
+        self._modules: Dict[str, Any] = {}
+        self.failed: Dict[str, str] = {}  # strategy_configs.id -> last load error
+        self.skipped = set()  # strategy_configs.id of rows with no symbols in this host's partition
+        self.running = False
+
+    async def start(self) -> bool:
+        """Connect the shared components and start every runnable strategy"""
+        try:
+            logger.info("🚀 Starting Strategy Host...")
+            if not await self.market_data_consumer.connect() or not await self.signal_publisher.connect():
+                logger.error("❌ Failed to connect to Redis for strategy host")
+                return False
+            self.running = True
+            await self.sync()
+            logger.info(f"✅ Strategy Host started with {len(self.strategies)} strategies")
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to start Strategy Host: {e}")
+            return False
+
+    async def sync(self):
+        """Start, restart or stop strategies to match strategy_configs"""
+        try:
+            rows = await self.source.fetch()
+        except Exception as e:
+            logger.error(f"❌ Failed to load strategy configs: {e}")
+            return
+
+        desired = {str(row['id']): row for row in rows}
+        for key in list(self.failed) + list(self.skipped):
+            if key not in desired:
+                self.failed.pop(key, None)
+                self.skipped.discard(key)
+                self._fingerprints.pop(key, None)
+
+        for key in list(self.strategies):
+            if key not in desired:
+                await self.remove_strategy(key)
+            elif self._fingerprint(desired[key]) != self._fingerprints.get(key):
+                logger.info(f"🔄 Config changed for {key}, restarting")
+                await self.remove_strategy(key)
+
+        for key, row in desired.items():
+            if key in self.strategies:
+                continue
+            # Don't retry a broken (or out-of-partition) row until it changes
+            if (key in self.failed or key in self.skipped) and self._fingerprints.get(key) == self._fingerprint(row):
+                continue
+            await self.add_strategy(row)
+
+    @staticmethod
+    def _fingerprint(row: Dict[str, Any]) -> str:
+        relevant = {name: row.get(name) for name in ('strategy_id', 'class_name', 'module_path', 'config_json')}
+        return hashlib.sha1(json.dumps(relevant, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _load_class(self, module_path: str, class_name: str):
+        return load_strategy_class(module_path, class_name, self._modules)
+
+    def _build_config(self, row: Dict[str, Any]) -> StrategyConfig:
+        config_json = row.get('config_json') or {}
+        if isinstance(config_json, str):
+            config_json = json.loads(config_json)
+        symbols = config_json.get('symbols') or []
+        if not symbols:
+            raise ValueError("config_json has no symbols")
+        if self.symbol_filter:
+            symbols = [symbol for symbol in symbols if self.symbol_filter(symbol)]
+        return StrategyConfig(
+            strategy_id=config_json.get('strategy_id') or row.get('strategy_id') or row.get('name') or str(row['id']),
+            symbols=symbols,
+            parameters=config_json.get('parameters', {}),
+            enabled=True,
+            redis_url=self.redis_url,
+            consumer_group=self.consumer_group,
+            signal_channel=self.signal_channel,
+            bar_interval=config_json.get('bar_interval'),
+            eval_debounce_ms=float(config_json.get('eval_debounce_ms', 0))
+        )
+
+    async def add_strategy(self, row: Dict[str, Any]) -> bool:
+        """Load and start one strategy_configs row"""
+        key = str(row['id'])
+        self._fingerprints[key] = self._fingerprint(row)
+        try:
+            strategy_class = self._load_class(row['module_path'], row['class_name'])
+            config = self._build_config(row)
+            if not config.symbols:
+                # All of this row's symbols are hosted elsewhere
+                self.skipped.add(key)
+                return False
+            strategy = strategy_class(
+                config,
+                market_data_consumer=self.market_data_consumer,
+                signal_publisher=self.signal_publisher,
+                indicator_cache=self.indicator_cache,
+                indicator_registry=self.indicator_registry
+            )
+            if not await strategy.start():
+                raise RuntimeError("strategy failed to start")
+        except Exception as e:
+            logger.error(f"❌ Failed to load strategy {key} ({row.get('class_name')}): {e}")
+            self.failed[key] = str(e)
+            return False
+
+        self.failed.pop(key, None)
+        self.skipped.discard(key)
+        self.strategies[key] = strategy
+        logger.info(f"✅ Hosting {row.get('class_name')} as {config.strategy_id} ({key}) on {config.symbols}")
+        return True
+
+    async def remove_strategy(self, key: str):
+        """Stop one hosted strategy (shared components keep running)"""
+        strategy = self.strategies.pop(key, None)
+        self._fingerprints.pop(key, None)
+        self.failed.pop(key, None)
+        if strategy:
+            await strategy.stop()
+            logger.info(f"🛑 Removed strategy {strategy.strategy_id} ({key})")
+
+    async def run_forever(self, poll_interval: float = 30.0, stats_interval: float = 300.0):
+        """Poll strategy_configs for changes until stopped"""
+        since_stats = 0.0
+        while self.running:
+            await asyncio.sleep(poll_interval)
+            await self.sync()
+            since_stats += poll_interval
+            if since_stats >= stats_interval:
+                since_stats = 0.0
+                logger.info(f"📊 Strategy Host Stats: {self.get_stats()}")
+
+    async def stop(self):
+        """Stop all strategies and the shared components"""
+        self.running = False
+        for key in list(self.strategies):
+            await self.remove_strategy(key)
+        await self.market_data_consumer.stop()
+        await self.market_data_consumer.disconnect()
+        await self.signal_publisher.disconnect()
+        logger.info("✅ Strategy Host stopped")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "strategies": {key: strategy.get_stats() for key, strategy in self.strategies.items()},
+            "failed": dict(self.failed),
+            "skipped": sorted(self.skipped),
+            "consumer_stats": self.market_data_consumer.get_stats(),
+            "publisher_stats": self.signal_publisher.get_stats(),
+            "indicator_cache": self.indicator_cache.get_stats(),
+            "indicator_registry": self.indicator_registry.get_stats()
+        }
+
+
+async def main():
+    """Main entry point for the strategy host"""
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    redis_url = os.getenv('REDIS_URL', 'redis://redis:6379')
+    consumer_group = os.getenv('CONSUMER_GROUP', 'strategy_consumers')
+    signal_channel = os.getenv('SIGNAL_CHANNEL', 'strategy_signals')
+    poll_interval = float(os.getenv('STRATEGY_HOST_POLL_SECONDS', '30'))
+    workers = int(os.getenv('STRATEGY_HOST_WORKERS', '1'))
+
+    if workers > 1:
+        try:
+            from sharded_host import ShardedStrategyHost
+        except ImportError as e:
+            logger.error(f"❌ Sharded host unavailable ({e}); running all strategies in one process")
+            workers = 1
+    if workers > 1:
+        host = ShardedStrategyHost(workers, redis_url, consumer_group, signal_channel,
+                                   poll_interval=poll_interval)
+    else:
+        host = StrategyHost(StrategyConfigSource(), redis_url, consumer_group, signal_channel)
+
+    try:
+        if await host.start():
+            if workers > 1:
+                await host.run_forever()
+            else:
+                await host.run_forever(poll_interval)
+        else:
+            logger.error("❌ Failed to start Strategy Host")
+    except KeyboardInterrupt:
+        logger.info("🛑 Received shutdown signal")
+    except Exception as e:
+        logger.error(f"❌ Strategy Host error: {e}")
+    finally:
+        await host.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())